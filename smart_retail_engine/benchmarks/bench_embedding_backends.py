@@ -0,0 +1,119 @@
+# smart_retail_engine/benchmarks/bench_embedding_backends.py
+"""
+Compares the embedding backends used before K-Means: the trained Keras autoencoder and the NumPy PCA
+projection. For each backend it reports the fit time, the cluster quality of K-Means in its latent
+space (silhouette, Davies-Bouldin, inertia) and the inference latency of the NumPy serving path
+(scaler -> encoder -> K-Means, through the exported `.npz` artifact) for one customer and for all.
+
+Uses the processed `rfm_df.csv` when it exists, synthetic RFM otherwise.
+
+Usage: python benchmarks/bench_embedding_backends.py [--backends autoencoder pca] [--n-clusters 3] [--output report.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from scripts.config import PROCESSED_DATA_DIR
+from scripts.numpy_inference import export_numpy_artifact, load_numpy_models
+from scripts.training import RFM_FEATURES, EMBEDDING_BACKENDS, fit_embedding
+
+
+def load_rfm(path, n_customers, seed=0):
+    """RFM features from the processed table, or `n_customers` synthetic rows if it does not exist."""
+    if os.path.exists(path):
+        return pd.read_csv(path)[RFM_FEATURES]
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Recency': rng.integers(1, 1500, n_customers),
+        'Frequency': rng.integers(1, 40, n_customers),
+        'Monetary': rng.lognormal(7, 1, n_customers),
+    })
+
+
+def latency_percentiles(func, repeats):
+    """p50/p99 of `func()` in microseconds over `repeats` calls."""
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, 50) * 1e6, np.percentile(timings, 99) * 1e6
+
+
+def compare_backend(backend, X_raw, n_clusters, repeats, silhouette_sample_size=10000):
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score, davies_bouldin_score
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X_raw)
+    training_report = {}
+    start = time.perf_counter()
+    encoder = fit_embedding(X_scaled, backend, report=training_report)
+    fit_seconds = time.perf_counter() - start
+
+    X_latent = encoder.predict(X_scaled, batch_size=4096, verbose=0)
+    kmeans_latent = KMeans(n_clusters=n_clusters, random_state=42, n_init=10).fit(X_latent)
+    labels = kmeans_latent.labels_
+    row = {
+        "backend": backend,
+        "customers": len(X_raw),
+        "fit_seconds": round(fit_seconds, 4),
+        "epochs_run": training_report.get("epochs_run"),
+        "silhouette": None,
+        "davies_bouldin": None,
+        "inertia": float(kmeans_latent.inertia_),
+    }
+    if 2 <= len(np.unique(labels)) < len(X_latent):
+        sample_size = silhouette_sample_size if len(X_latent) > silhouette_sample_size else None
+        row["silhouette"] = round(float(silhouette_score(X_latent, labels, sample_size=sample_size, random_state=42)), 4)
+        row["davies_bouldin"] = round(float(davies_bouldin_score(X_latent, labels)), 4)
+
+    # Serve through the exported artifact, as `load_models_and_data` does with the numpy backend
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifact_path = os.path.join(tmp_dir, "artifact.npz")
+        export_numpy_artifact(scaler, encoder, kmeans_latent, artifact_path)
+        np_scaler, np_encoder, np_kmeans = load_numpy_models(artifact_path)
+    single = X_raw[:1]
+    p50, p99 = latency_percentiles(lambda: np_kmeans.predict(np_encoder.predict(np_scaler.transform(single))), repeats)
+    batch_p50, _ = latency_percentiles(lambda: np_kmeans.predict(np_encoder.predict(np_scaler.transform(X_raw))), max(repeats // 100, 5))
+    row.update({
+        "single_p50_us": round(p50, 1),
+        "single_p99_us": round(p99, 1),
+        "all_customers_ms": round(batch_p50 / 1000, 3),
+        "served_matches_trained": bool((np_kmeans.predict(np_encoder.predict(np_scaler.transform(X_raw))) == labels).mean() > 0.999),
+    })
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--n-clusters", type=int, default=3)
+    parser.add_argument("--rfm", default=os.path.join(PROCESSED_DATA_DIR, "rfm_df.csv"))
+    parser.add_argument("--customers", type=int, default=100_000, help="Synthetic customers when --rfm does not exist.")
+    parser.add_argument("--repeats", type=int, default=2000, help="Timed single-customer inference calls per backend.")
+    parser.add_argument("--output", metavar="PATH", help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    X_raw = load_rfm(args.rfm, args.customers).to_numpy(dtype=np.float64)
+    rows = [compare_backend(backend, X_raw, args.n_clusters, args.repeats) for backend in args.backends]
+    print(pd.DataFrame(rows).to_string(index=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"[INFO] Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# smart_retail_engine/benchmarks/bench_minibatch_kmeans.py
+"""
+Benchmarks latent clustering: full `KMeans(n_init=10)` on the whole latent matrix against
+`fit_minibatch_kmeans` fed by chunked encoder output. Reports fit time (including encoding), inertia
+over all customers, label agreement after matching cluster IDs and the peak traced memory of each fit.
+
+Synthetic RFM is standardized and encoded with the PCA projection, so the benchmark runs without
+TensorFlow; the clustering step is the same for the autoencoder.
+
+Usage: python benchmarks/bench_minibatch_kmeans.py [--sizes 100000 1000000] [--n-clusters 3]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from scripts.training import fit_pca_encoder, fit_clusters, match_cluster_ids
+
+
+def make_scaled_rfm(n_customers, seed=0):
+    """Standardized synthetic (Recency, Frequency, Monetary) rows."""
+    rng = np.random.default_rng(seed)
+    frequency = rng.poisson(6, n_customers) + 1
+    X = np.column_stack([
+        rng.exponential(200, n_customers),
+        frequency,
+        frequency * rng.lognormal(5, 0.8, n_customers),
+    ])
+    return (X - X.mean(axis=0)) / X.std(axis=0)
+
+
+def timed_fit(encoder, X_scaled, n_clusters, algorithm, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    kmeans_latent = fit_clusters(encoder, X_scaled, n_clusters, algorithm)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    if trace_memory:
+        tracemalloc.stop()
+    return kmeans_latent, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--n-clusters", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows both fits down).")
+    args = parser.parse_args()
+
+    # Warm up imports and thread pools so the first size is not charged for them
+    warm_up = make_scaled_rfm(5000)
+    for algorithm in ("kmeans", "minibatch"):
+        fit_clusters(fit_pca_encoder(warm_up), warm_up, args.n_clusters, algorithm)
+
+    print(f"{'customers':>10} {'kmeans (s)':>11} {'minibatch (s)':>14} {'speedup':>8} "
+          f"{'inertia ratio':>14} {'agreement':>10} {'kmeans MB':>10} {'minibatch MB':>13}")
+    for n_customers in args.sizes:
+        X_scaled = make_scaled_rfm(n_customers)
+        encoder = fit_pca_encoder(X_scaled)
+        full, full_seconds, full_peak = timed_fit(encoder, X_scaled, args.n_clusters, "kmeans", not args.no_memory)
+        minibatch, minibatch_seconds, minibatch_peak = timed_fit(encoder, X_scaled, args.n_clusters, "minibatch", not args.no_memory)
+
+        mapping = match_cluster_ids(minibatch.labels_, full.labels_, args.n_clusters)
+        agreement = (mapping[minibatch.labels_] == full.labels_).mean()
+        memory = "-" if args.no_memory else None
+        print(f"{n_customers:>10} {full_seconds:>11.2f} {minibatch_seconds:>14.2f} {full_seconds / minibatch_seconds:>7.1f}x "
+              f"{minibatch.inertia_ / full.inertia_:>14.4f} {agreement:>10.4f} "
+              f"{memory or f'{full_peak / 2**20:.1f}':>10} {memory or f'{minibatch_peak / 2**20:.1f}':>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# smart_retail_engine/benchmarks/bench_response_shaping.py
+"""
+Benchmarks encoding of recommendation API responses for heavy buyers (customers with hundreds of
+purchased products): the previous `jsonify` serialization (stdlib json, sorted keys) against
+`response_shaping.dumps` (orjson when installed), compact shaped responses (a page of purchased
+products, product IDs) and gzip/brotli compression of the full body. Reports body bytes and
+microseconds per response.
+
+Usage: python benchmarks/bench_response_shaping.py [--purchased 50 500 2000] [--batch 100]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from scripts import response_shaping
+from scripts.response_shaping import GZIP_LEVEL, BROTLI_QUALITY, ShapeOptions, dumps, shape_response
+
+
+def make_catalog(n_products, seed=0):
+    """Product name -> ID for a synthetic catalog with Global Superstore-length product names."""
+    rng = np.random.default_rng(seed)
+    words = ["Office", "Ergonomic", "Executive", "Wireless", "Heavy-Duty", "Recycled", "Stackable", "Adjustable",
+             "Chair", "Binder", "Stapler", "Phone", "Bookcase", "Envelope", "Paper", "Table", "Labels", "Fasteners"]
+    names = [" ".join(rng.choice(words, 6)) + f", {i}" for i in range(n_products)]
+    return {name: f"OFF-{i:05d}" for i, name in enumerate(names)}
+
+
+def make_response(customer_id, catalog_names, n_purchased, rng):
+    return {
+        "customer_id": customer_id,
+        "cluster": int(rng.integers(0, 4)),
+        "recommendation_source": "index",
+        "r_score": 5, "f_score": 5, "m_score": 4,
+        "rfm_segment_label": "Champions",
+        "cluster_based_recommendations": list(rng.choice(catalog_names, 5, replace=False)),
+        "overall_popular_recommendations": list(rng.choice(catalog_names, 5, replace=False)),
+        "purchased_products": list(rng.choice(catalog_names, n_purchased, replace=False)),
+    }
+
+
+def jsonify_dumps(payload):
+    """What `flask.jsonify` produced: stdlib json with sorted keys and ASCII escaping."""
+    return json.dumps(payload, sort_keys=True, ensure_ascii=True, separators=(",", ":")).encode()
+
+
+def per_call_us(func, payload, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        body = func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--purchased", type=int, nargs="+", default=[50, 500, 2000],
+                        help="Purchased products per customer.")
+    parser.add_argument("--batch", type=int, default=100, help="Customers per batch response.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = make_catalog(max(args.purchased) * 2)
+    catalog_names = np.array(list(catalog))
+    shaped = ShapeOptions(purchased_limit=10, products="id")
+    encoders = [
+        ("jsonify (before)", jsonify_dumps),
+        (f"dumps ({'orjson' if response_shaping.orjson is not None else 'json'})", dumps),
+        ("dumps + gzip", lambda payload: gzip.compress(dumps(payload), compresslevel=GZIP_LEVEL, mtime=0)),
+    ]
+    if response_shaping.brotli is not None:
+        encoders.append(("dumps + brotli", lambda payload: response_shaping.brotli.compress(dumps(payload), quality=BROTLI_QUALITY)))
+    encoders.append(("shaped (10 purchased, IDs)", lambda payload: dumps(
+        {"results": [shape_response(result, shaped, catalog) for result in payload["results"]]}
+    )))
+
+    print(f"{'purchased':>9} {'encoding':<28} {'bytes/customer':>15} {'us/customer':>12} {'vs before':>10}")
+    for n_purchased in args.purchased:
+        rng = np.random.default_rng(n_purchased)
+        payload = {"results": [make_response(f"CU-{i:05d}", catalog_names, n_purchased, rng) for i in range(args.batch)]}
+        payload = json.loads(json.dumps(payload)) # plain str/int values, as the serving code returns
+        baseline = None
+        for name, encode in encoders:
+            micros, body = per_call_us(encode, payload, args.repeats)
+            baseline = baseline or (micros, len(body))
+            print(f"{n_purchased:>9} {name:<28} {len(body) / args.batch:>15.0f} {micros / args.batch:>12.1f} "
+                  f"{baseline[0] / micros:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# smart_retail_engine/benchmarks/bench_rfm_segments.py
+"""
+Benchmarks RFM segment labelling: the original row-wise `apply` + string concatenation against the
+vectorized `score_rfm` (np.select over score arrays, integer-coded segments with a label lookup).
+
+Usage: python benchmarks/bench_rfm_segments.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from scripts.training import score_rfm
+
+
+def make_scored_rfm(n_customers, seed=0):
+    """Synthetic RFM frame with quantile scores already assigned (the part both versions share)."""
+    rng = np.random.default_rng(seed)
+    rfm_df = pd.DataFrame({
+        'Recency': rng.integers(1, 1500, n_customers),
+        'Frequency': rng.integers(1, 40, n_customers),
+        'Monetary': rng.lognormal(7, 1, n_customers),
+    })
+    return score_rfm(rfm_df)
+
+
+def legacy_segments(rfm_df):
+    def rfm_segment_label(row):
+        if row['R_Score'] >= 4 and row['F_Score'] >= 4 and row['M_Score'] >= 4:
+            return 'Champions'
+        elif row['R_Score'] >= 4 and row['F_Score'] >= 3:
+            return 'Loyal Customers'
+        elif row['R_Score'] >= 3 and row['M_Score'] >= 3:
+            return 'Potential Loyalists'
+        elif row['R_Score'] <= 2 and row['M_Score'] >= 3:
+            return 'Big Spenders'
+        elif row['R_Score'] <= 2 and row['F_Score'] <= 2:
+            return 'At Risk'
+        elif row['R_Score'] >= 3 and row['F_Score'] <= 2:
+            return 'Needs Attention'
+        else:
+            return 'Other'
+
+    labels = rfm_df.apply(rfm_segment_label, axis=1)
+    segments = rfm_df['R_Score'].astype(str) + rfm_df['F_Score'].astype(str) + rfm_df['M_Score'].astype(str)
+    return labels, segments
+
+
+def best_of(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'customers':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}  identical")
+    for n_customers in args.sizes:
+        rfm_df = make_scored_rfm(n_customers)
+        raw = rfm_df[['Recency', 'Frequency', 'Monetary']]
+
+        # The legacy path is slow at 1M rows; time it once there
+        legacy_time, (labels, segments) = best_of(lambda: legacy_segments(rfm_df), 1 if n_customers >= 1_000_000 else args.repeats)
+        # Time the whole vectorized scoring (including qcut) to keep the comparison conservative
+        vectorized_time, scored = best_of(lambda: score_rfm(raw.copy()), args.repeats)
+
+        identical = (scored['RFM_Segment_Label'].astype(str).tolist() == labels.tolist()
+                     and scored['RFM_Segment'].tolist() == segments.tolist())
+        print(f"{n_customers:>10} {legacy_time:>12.3f} {vectorized_time:>15.4f} {legacy_time / vectorized_time:>8.0f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
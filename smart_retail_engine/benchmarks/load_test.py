@@ -0,0 +1,403 @@
+# smart_retail_engine/benchmarks/load_test.py
+"""
+Load test of the recommendation API on synthetic data at configurable scale.
+
+For every `--orders` size the harness writes a synthetic Orders export (customers with skewed order
+counts, churned customers with old last purchases and long-tailed basket values, so the resulting
+`rfm_df.csv` is shaped like the Superstore one), runs the real training pipeline on it in a scratch
+workspace (`RETAIL_MODELS_DIR` / `RETAIL_PROCESSED_DATA_DIR`), and then drives
+`/recommendations/<customer_id>` at a fixed concurrency:
+
+  in-process  Flask test client in a fresh process (handler + WSGI cost, no network)
+  socket      HTTP over a local socket against gunicorn (`--workers`) when installed, otherwise the
+              threaded Werkzeug server; with `--asgi`, against the ASGI app under uvicorn
+
+It reports p50/p95/p99 latency, requests/sec and the RSS of every serving process, prints a table and
+saves everything as JSON. `--baseline` compares against a previous JSON file, e.g. one saved on
+another commit.
+
+Usage: python benchmarks/load_test.py [--orders 10000 1000000] [--concurrency 8] [--requests 5000]
+                                      [--modes in-process socket] [--output load_test.json] [--baseline OLD.json]
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+MODES = ("in-process", "socket")
+# Superstore has about 32 order rows per customer and 5 rows per product
+ROWS_PER_CUSTOMER = 32
+ROWS_PER_PRODUCT = 5
+CATEGORIES = ("Furniture", "Office Supplies", "Technology")
+
+
+# --- Synthetic Data ---
+
+def write_synthetic_orders(path, n_rows, n_customers, n_products, seed=0, chunk_rows=1_000_000):
+    """
+    Writes `n_rows` synthetic order rows with the Orders export columns to a CSV file, in chunks.
+
+    Customers get log-normal activity weights (skewed Frequency) and an exponentially distributed
+    churn date before which all their orders fall (skewed Recency); products follow a Zipf-like
+    popularity and line values are log-normal (long-tailed Monetary).
+    """
+    rng = np.random.default_rng(seed)
+    customer_ids = np.array([f"C-{i:07d}" for i in range(n_customers)])
+    product_ids = np.array([f"P-{i:06d}" for i in range(n_products)])
+    activity = rng.lognormal(0, 0.8, n_customers)
+    activity /= activity.sum()
+    popularity = 1.0 / (np.arange(n_products) + 10.0)
+    popularity /= popularity.sum()
+    start, end = np.datetime64("2011-01-01"), np.datetime64("2014-12-31")
+    span_days = int((end - start) / np.timedelta64(1, "D"))
+    active_days = span_days - np.minimum(rng.exponential(150, n_customers), span_days - 1).astype(np.int64)
+
+    rows_written, order_number = 0, 0
+    with open(path, "w", newline="") as f:
+        while rows_written < n_rows:
+            rows = min(chunk_rows, n_rows - rows_written)
+            # Orders of 1-5 lines; a chunk ends on an order boundary
+            order_sizes = np.minimum(rng.poisson(1.0, rows) + 1, 5)
+            order_sizes = order_sizes[:np.searchsorted(np.cumsum(order_sizes), rows) + 1]
+            order_sizes[-1] -= order_sizes.sum() - rows
+            order_sizes = order_sizes[order_sizes > 0]
+            n_orders = len(order_sizes)
+
+            order_customers = rng.choice(n_customers, n_orders, p=activity)
+            order_days = (rng.random(n_orders) * active_days[order_customers]).astype(np.int64)
+            line_order = np.repeat(np.arange(n_orders), order_sizes)
+            customers = order_customers[line_order]
+            order_dates = start + order_days[line_order].astype("timedelta64[D]")
+            products = rng.choice(n_products, rows, p=popularity)
+            sales = np.round(rng.lognormal(4.0, 1.2, rows), 3)
+            discount = rng.choice([0.0, 0.0, 0.1, 0.2, 0.4], rows)
+
+            chunk = pd.DataFrame({
+                "Row ID": np.arange(rows_written, rows_written + rows) + 1,
+                "Order ID": np.char.add("O-", (order_number + line_order).astype(str)),
+                "Order Date": order_dates,
+                "Ship Date": order_dates + rng.integers(0, 7, rows).astype("timedelta64[D]"),
+                "Ship Mode": "Standard Class",
+                "Customer ID": customer_ids[customers],
+                "Customer Name": customer_ids[customers],
+                "Segment": np.array(["Consumer", "Corporate", "Home Office"])[customers % 3],
+                "City": "City", "State": "State", "Country": "Country", "Postal Code": np.nan,
+                "Market": "Market", "Region": "Region",
+                "Product ID": product_ids[products],
+                "Category": np.array(CATEGORIES)[products % len(CATEGORIES)],
+                "Sub-Category": "Sub",
+                "Product Name": product_ids[products],
+                "Sales": sales,
+                "Quantity": rng.poisson(2.0, rows) + 1,
+                "Discount": discount,
+                "Profit": np.round(sales * (0.15 - discount) + rng.normal(0, 5, rows), 3),
+                "Shipping Cost": np.round(sales * 0.1, 2),
+                "Order Priority": "Medium",
+            })
+            chunk.to_csv(f, header=rows_written == 0, index=False)
+            rows_written += rows
+            order_number += n_orders
+
+
+def run_pipeline(input_path, env, extra_args):
+    """Runs the training pipeline on `input_path`; returns (seconds, peak RSS in MB of any child so far)."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(project_root, "scripts", "pipeline.py"), "--input", input_path, *extra_args],
+        env=env, cwd=project_root, check=True, stdout=subprocess.DEVNULL
+    )
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    return seconds, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+
+# --- Load Generation ---
+
+def drive(send, customer_ids, concurrency, n_requests, warmup):
+    """
+    Issues `warmup` untimed and then `n_requests` timed requests from `concurrency` threads, each
+    calling `send(customer_id)` back to back. Returns latency percentiles, throughput and error count.
+    """
+    def worker(ids, latencies, errors):
+        for customer_id in ids:
+            start = time.perf_counter()
+            try:
+                ok = send(customer_id)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors.append(customer_id)
+
+    def run(ids):
+        latencies, errors = [[] for _ in range(concurrency)], [[] for _ in range(concurrency)]
+        threads = [threading.Thread(target=worker, args=(ids[i::concurrency], latencies[i], errors[i])) for i in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, np.concatenate(latencies), sum(map(len, errors))
+
+    rng = np.random.default_rng(1)
+    if warmup:
+        run(list(rng.choice(customer_ids, warmup)))
+    seconds, latencies, errors = run(list(rng.choice(customer_ids, n_requests)))
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": n_requests, "errors": errors, "seconds": round(seconds, 3), "rps": round(n_requests / seconds, 1),
+        "p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3),
+        "max_ms": round(latencies.max() * 1000, 3),
+    }
+
+
+def process_rss_mb(pid):
+    """RSS in MB of a process and its children (e.g. gunicorn workers), or None without psutil."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    process = psutil.Process(pid)
+    return [round(p.memory_info().rss / 2**20, 1) for p in [process, *process.children(recursive=True)]]
+
+
+def run_in_process(args):
+    """Worker-process entry point: drives the app through the Flask test client and prints the result as JSON."""
+    from scripts.app_flask import app, serving_state
+
+    local = threading.local()
+
+    def send(customer_id):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client.get(args.path.format(customer_id=customer_id)).status_code == 200
+
+    customer_ids = serving_state.rfm_df["Customer ID"].to_numpy()
+    result = drive(send, customer_ids, args.concurrency, args.requests, args.warmup)
+    result["rss_mb"] = process_rss_mb(os.getpid())
+    print(json.dumps(result))
+
+
+def serve(port):
+    """Worker-process entry point: serves the app with the threaded Werkzeug server."""
+    from werkzeug.serving import run_simple
+    from scripts.app_flask import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING) # no per-request access log
+    run_simple("127.0.0.1", port, app, threaded=True)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wsgi_server_command(port, workers):
+    if importlib.util.find_spec("gunicorn") is not None:
+        command = [sys.executable, "-m", "gunicorn", "-w", str(workers), "--threads", "4", "-b", f"127.0.0.1:{port}",
+                   "--log-level", "warning", "scripts.app_flask:app"]
+        server = f"gunicorn ({workers} workers)"
+    else:
+        if workers > 1:
+            print("[WARN] gunicorn is not installed; serving with one threaded Werkzeug process.")
+        command = [sys.executable, os.path.abspath(__file__), "--serve", str(port)]
+        server = "werkzeug (threaded)"
+    return command, server
+
+
+def _start_server(env, workers, asgi=False, timeout=300):
+    port = _free_port()
+    if asgi:
+        command = [sys.executable, os.path.join(project_root, "scripts", "app_asgi.py"), "--host", "127.0.0.1",
+                   "--port", str(port), "--workers", str(workers)]
+        server = f"uvicorn ({workers} workers)"
+    else:
+        command, server = _wsgi_server_command(port, workers)
+    proc = subprocess.Popen(command, env=env, cwd=project_root, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{server} exited with code {proc.returncode} during startup.")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/metrics")
+            if connection.getresponse().status == 200:
+                return proc, port, server
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{server} did not answer within {timeout}s.")
+
+
+def run_socket(args, env, customer_ids):
+    proc, port, server = _start_server(env, args.workers, args.asgi)
+    local = threading.local()
+
+    def send(customer_id):
+        if not hasattr(local, "connection"):
+            local.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        try:
+            local.connection.request("GET", args.path.format(customer_id=customer_id))
+            response = local.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            # Drop the connection so the next request reconnects
+            local.connection.close()
+            del local.connection
+            raise
+        return response.status == 200
+
+    try:
+        result = drive(send, customer_ids, args.concurrency, args.requests, args.warmup)
+        result["rss_mb"] = process_rss_mb(proc.pid)
+        result["server"] = server
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return result
+
+
+# --- Reporting ---
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(report, baseline=None):
+    baseline_runs = {}
+    for run in (baseline or {}).get("runs", []):
+        for result in run["serving"]:
+            baseline_runs[(run["orders"], result["mode"])] = result
+    print(f"{'orders':>10} {'customers':>10} {'mode':>11} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7} {'RSS MB':>16}" + (f" {'rps vs base':>12} {'p99 vs base':>12}" if baseline else ""))
+    for run in report["runs"]:
+        for result in run["serving"]:
+            rss = "-" if result["rss_mb"] is None else "+".join(f"{mb:.0f}" for mb in result["rss_mb"])
+            line = (f"{run['orders']:>10} {run['customers']:>10} {result['mode']:>11} {result['rps']:>9.1f} "
+                    f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7} {rss:>16}")
+            previous = baseline_runs.get((run["orders"], result["mode"]))
+            if previous:
+                line += f" {result['rps'] / previous['rps']:>11.2f}x {result['p99_ms'] / previous['p99_ms']:>11.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[10_000, 100_000], help="Order rows per dataset.")
+    parser.add_argument("--customers", type=int, help=f"Customers per dataset (default: orders / {ROWS_PER_CUSTOMER}).")
+    parser.add_argument("--products", type=int, help=f"Products per dataset (default: orders / {ROWS_PER_PRODUCT}, at most 10000).")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5000, help="Timed requests per mode and dataset.")
+    parser.add_argument("--warmup", type=int, default=500, help="Untimed requests before measuring.")
+    parser.add_argument("--workers", type=int, default=2, help="Server worker processes in socket mode.")
+    parser.add_argument("--asgi", action="store_true", help="Serve the ASGI app with uvicorn in socket mode.")
+    parser.add_argument("--path", default="/recommendations/{customer_id}", help="Request path template.")
+    parser.add_argument("--embedding", default="pca", help="Pipeline --embedding (pca keeps large datasets fast).")
+    parser.add_argument("--clustering", default="minibatch", help="Pipeline --clustering.")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache in the app.")
+    parser.add_argument("--workdir", help="Workspace for data and models (default: a temporary directory, removed afterwards).")
+    parser.add_argument("--output", default="load_test.json", help="Where to save the results as JSON.")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against.")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--in-process-run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+    if args.in_process_run:
+        run_in_process(args)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sre-load-test-")
+    report = {
+        "commit": git_commit(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(), "cpus": os.cpu_count(),
+        "settings": {key: getattr(args, key) for key in
+                     ("concurrency", "requests", "warmup", "workers", "asgi", "path", "embedding", "clustering", "no_cache")},
+        "runs": [],
+    }
+    try:
+        for n_rows in args.orders:
+            n_customers = args.customers or max(n_rows // ROWS_PER_CUSTOMER, 10)
+            n_products = args.products or min(max(n_rows // ROWS_PER_PRODUCT, 10), 10_000)
+            run_dir = os.path.join(workdir, f"orders_{n_rows}")
+            env = {
+                **os.environ,
+                "RETAIL_MODELS_DIR": os.path.join(run_dir, "models"),
+                "RETAIL_PROCESSED_DATA_DIR": os.path.join(run_dir, "processed"),
+                "RETAIL_MODEL_RELOAD_INTERVAL": "0",
+                "TF_CPP_MIN_LOG_LEVEL": "3",
+            }
+            if args.no_cache:
+                env["RETAIL_RESPONSE_CACHE_SIZE"] = "0"
+            os.makedirs(run_dir, exist_ok=True)
+
+            input_path = os.path.join(run_dir, "orders.csv")
+            print(f"[INFO] Generating {n_rows} order rows for {n_customers} customers and {n_products} products...")
+            start = time.perf_counter()
+            write_synthetic_orders(input_path, n_rows, n_customers, n_products)
+            generate_seconds = time.perf_counter() - start
+            print("[INFO] Running the training pipeline...")
+            pipeline_seconds, pipeline_peak_rss = run_pipeline(
+                input_path, env, ["--embedding", args.embedding, "--clustering", args.clustering]
+            )
+            customer_ids = pd.read_csv(os.path.join(run_dir, "processed", "rfm_df.csv"), usecols=["Customer ID"])["Customer ID"].to_numpy()
+
+            run = {
+                "orders": n_rows, "customers": len(customer_ids), "products": n_products,
+                "generate_seconds": round(generate_seconds, 2), "pipeline_seconds": round(pipeline_seconds, 2),
+                "pipeline_peak_rss_mb": round(pipeline_peak_rss, 1), "serving": [],
+            }
+            for mode in args.modes:
+                print(f"[INFO] Driving the API ({mode}, concurrency {args.concurrency})...")
+                if mode == "in-process":
+                    worker_args = [str(v) for v in ("--in-process-run", "--concurrency", args.concurrency, "--requests",
+                                                    args.requests, "--warmup", args.warmup, "--path", args.path)]
+                    output = subprocess.run([sys.executable, os.path.abspath(__file__), *worker_args], env=env,
+                                            cwd=project_root, check=True, capture_output=True, text=True).stdout
+                    result = json.loads(output.strip().splitlines()[-1])
+                else:
+                    result = run_socket(args, env, customer_ids)
+                run["serving"].append({"mode": mode, **result})
+            report["runs"].append(run)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(report, baseline)
+    print(f"[INFO] Results saved to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# smart_retail_engine/scripts/api_client.py
+"""
+HTTP client of the recommendation API shared by the Streamlit, Gradio and Tkinter front-ends.
+
+One `requests.Session` keeps connections to the API alive across clicks, every call has connect and
+read timeouts so a slow API cannot hang a UI, and failed connections and 502/503/504 responses
+(including the ASGI app's 503 "busy" with Retry-After) are retried a bounded number of times with
+exponential backoff. Read timeouts are not retried: a slow request fails after one read timeout. Recently viewed customers are answered from a small LRU + TTL cache (the
+API's `ResponseCache`), which `prefetch` fills for a list of customers with batch requests.
+
+Errors surface as the usual `requests` exceptions (ConnectionError, Timeout, HTTPError), so callers
+keep their existing handling.
+"""
+import threading
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scripts.config import (
+    API_URL, API_CONNECT_TIMEOUT, API_READ_TIMEOUT, API_RETRIES, API_RETRY_BACKOFF, API_CLIENT_CACHE_SIZE,
+    API_CLIENT_CACHE_TTL
+)
+from scripts.response_cache import ResponseCache
+
+# Cache parameters of a default single-customer response (what the UIs display)
+_RECOMMENDATIONS = ("recommendations",)
+# Customer IDs per batch request when prefetching (the API accepts up to BATCH_MAX_CUSTOMERS)
+PREFETCH_BATCH_SIZE = 500
+RETRY_STATUSES = (502, 503, 504)
+
+
+def _cacheable(result):
+    """False for error payloads and model-error fallbacks (cluster "Error"), which the API does not cache either."""
+    return "error" not in result and result.get("cluster") != "Error"
+
+
+class RecommendationClient:
+    """Pooled, retrying, caching client of one recommendation API; see the module docstring."""
+
+    def __init__(self, base_url=API_URL, connect_timeout=API_CONNECT_TIMEOUT, read_timeout=API_READ_TIMEOUT,
+                 retries=API_RETRIES, retry_backoff=API_RETRY_BACKOFF, cache_size=API_CLIENT_CACHE_SIZE,
+                 cache_ttl=API_CLIENT_CACHE_TTL, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        # Batch requests only read, so POST is as safe to retry as GET. read=False re-raises read errors
+        # (a slow API does not hold the UI for several read timeouts, and surfaces as ReadTimeout)
+        retry = Retry(
+            total=retries, read=False, backoff_factor=retry_backoff, status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}), respect_retry_after_header=True, raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_recommendations(self, customer_id):
+        """The API response for `customer_id`, from the cache when it was fetched recently."""
+        result = self.cache.get(customer_id, _RECOMMENDATIONS)
+        if result is None:
+            response = self.session.get(f"{self.base_url}/recommendations/{quote(customer_id, safe='')}", timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            if _cacheable(result):
+                self.cache.set(customer_id, _RECOMMENDATIONS, result)
+        return result
+
+    def prefetch(self, customer_ids, batch_size=PREFETCH_BATCH_SIZE):
+        """
+        Fetches the customers not already cached through the batch endpoint (`batch_size` IDs per
+        request) and caches them (except model-error fallbacks); returns {customer ID: response} for all
+        of `customer_ids`.
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        results = {customer_id: self.cache.get(customer_id, _RECOMMENDATIONS) for customer_id in customer_ids}
+        missing_ids = [customer_id for customer_id, result in results.items() if result is None]
+        for start in range(0, len(missing_ids), batch_size):
+            response = self.session.post(
+                f"{self.base_url}/recommendations/batch", json={"customer_ids": missing_ids[start:start + batch_size]},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            for result in response.json()["results"]:
+                results[result["customer_id"]] = result
+                if _cacheable(result):
+                    self.cache.set(result["customer_id"], _RECOMMENDATIONS, result)
+        return results
+
+    def prefetch_in_background(self, customer_ids):
+        """Runs `prefetch` on a daemon thread so a UI can start without waiting for it; failures are logged."""
+        def run():
+            try:
+                self.prefetch(customer_ids)
+                print(f"[INFO] Prefetched recommendations for {len(customer_ids)} customers.")
+            except requests.exceptions.RequestException as e:
+                print(f"[WARN] Prefetching recommendations failed: {e}")
+
+        thread = threading.Thread(target=run, name="recommendation-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.session.close()
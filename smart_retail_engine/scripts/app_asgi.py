@@ -0,0 +1,258 @@
+# smart_retail_engine/scripts/app_asgi.py
+"""
+ASGI (Starlette) entry point of the recommendation API, with the same endpoints and responses as
+`app_flask.py`.
+
+Requests are handled on an event loop; CPU-bound work (live scoring, batch requests) runs on a
+bounded `InferenceExecutor`, and when the executor queue is full requests get a 503 instead of
+waiting. With RETAIL_ASGI_SCORING=live, concurrent single-customer requests are coalesced by a
+`MicroBatcher` into one vectorized scale/encode/cluster call; by default they are answered from the
+precomputed recommendation index, which needs no inference and is fast enough to run on the loop.
+
+Run with `python scripts/app_asgi.py [--workers N]`, or `uvicorn scripts.app_asgi:app` from the
+project root.
+"""
+import os
+import sys
+import time
+import argparse
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.middleware import Middleware
+from starlette.routing import Route
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Import only the serving helpers; training code (TensorFlow, scikit-learn) is never imported here
+from scripts.serving import (
+    get_recommendations_from_index, get_recommendations_for_customers, get_item_recommendations_from_index,
+    RECOMMENDATION_SOURCES, get_similar_customers, parse_batch_request
+)
+from scripts.serving_state import ModelWatcher, load_current_state, model_metrics_text
+from scripts.config import (
+    RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_URL, MODEL_RELOAD_INTERVAL, ASGI_WORKERS, INFERENCE_THREADS,
+    INFERENCE_QUEUE_SIZE, MICRO_BATCH_WAIT_MS, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_PENDING, ASGI_SCORING
+)
+from scripts.response_cache import ResponseCache, make_shared_backend, cache_metrics_text
+from scripts.async_inference import ExecutorBusy, InferenceExecutor, MicroBatcher, inference_metrics_text
+from scripts.response_shaping import parse_shape_options, shape_response, encode_body
+from scripts import instrumentation
+from scripts.instrumentation import REQUEST_SECONDS, stage, histogram_metrics_text
+
+# Same limits as the Flask app
+BATCH_MAX_CUSTOMERS = int(os.getenv("BATCH_MAX_CUSTOMERS", "5000"))
+SIMILAR_MAX_K = int(os.getenv("SIMILAR_MAX_K", "100"))
+SCORING_MODES = ("index", "live")
+
+# Set up per worker process by `lifespan`; see app_flask.py for `serving_state` and the cache
+serving_state = None
+response_cache = None
+model_watcher = None
+executor = None
+batcher = None
+
+
+def _swap_state(state):
+    """Makes `state` the served one; requests already running finish on the previous state."""
+    global serving_state
+    serving_state = state
+    response_cache.set_model_version(state.version)
+
+
+def _score_customers(group, customer_ids):
+    """Micro-batch function: live responses for `customer_ids` with the (state, source) of `group`."""
+    state, source = group
+    return get_recommendations_for_customers(
+        customer_ids, state.rfm_df, state.df_orders_clustered, state.scaler, state.encoder, state.kmeans_latent,
+        state.cluster_top_items_dict, state.overall_top_products, state.rfm_features,
+        interactions=state.interactions, item_similarity=state.item_similarity if source == "item" else None
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global serving_state, response_cache, model_watcher, executor, batcher
+    if ASGI_SCORING not in SCORING_MODES:
+        raise ValueError(f"RETAIL_ASGI_SCORING must be one of: {', '.join(SCORING_MODES)}.")
+    # A failed initial load raises here, and the server does not start
+    serving_state = load_current_state()
+    response_cache = ResponseCache(
+        RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, make_shared_backend(RESPONSE_CACHE_URL), serving_state.version
+    )
+    executor = InferenceExecutor(INFERENCE_THREADS, INFERENCE_QUEUE_SIZE)
+    batcher = MicroBatcher(
+        _score_customers, executor, MICRO_BATCH_WAIT_MS / 1000, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_PENDING
+    )
+    if MODEL_RELOAD_INTERVAL > 0:
+        model_watcher = ModelWatcher(serving_state.version, _swap_state, MODEL_RELOAD_INTERVAL)
+        model_watcher.start()
+    print(f"[INFO] All models and pre-calculated data loaded successfully for ASGI app (model version {serving_state.version}).")
+    yield
+    if model_watcher is not None:
+        model_watcher.stop()
+    executor.shutdown()
+
+
+def _json_response(request, payload, status=200, headers=None):
+    """JSON response (orjson when available), compressed when the client accepts it and the body is large enough."""
+    body, encoding = encode_body(payload, request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding", **(headers or {})}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, status, headers=headers, media_type="application/json")
+
+
+def _busy_response(request):
+    return _json_response(request, {"error": "Server busy; retry shortly."}, 503, {"Retry-After": "1"})
+
+
+async def api_get_recommendations(request):
+    """
+    Recommendations for one customer; `?source=item` adds item-item co-purchase recommendations and
+    `fields`, `purchased_limit`/`purchased_offset` and `products=id` shape the response.
+    """
+    customer_id = request.path_params["customer_id"]
+    source = request.query_params.get("source", "cluster")
+    if source not in RECOMMENDATION_SOURCES:
+        return _json_response(request, {"error": f"'source' must be one of: {', '.join(RECOMMENDATION_SOURCES)}."}, 400)
+    try:
+        shape = parse_shape_options(request.query_params)
+    except ValueError as e:
+        return _json_response(request, {"error": str(e)}, 400)
+
+    state = serving_state
+    params = ("single", source)
+    result = response_cache.get(customer_id, params, state.version)
+    if result is None:
+        if ASGI_SCORING == "live":
+            try:
+                result = await batcher.submit(customer_id, (state, source))
+            except ExecutorBusy:
+                return _busy_response(request)
+        elif source == "item":
+            with stage("index_lookup"):
+                result = get_item_recommendations_from_index(
+                    customer_id, state.recommendation_index, state.overall_top_products, state.interactions, state.item_similarity
+                )
+        else:
+            with stage("index_lookup"):
+                result = get_recommendations_from_index(customer_id, state.recommendation_index, state.overall_top_products)
+        if result["cluster"] != "Error":
+            response_cache.set(customer_id, params, result, state.version)
+    return _json_response(request, shape_response(result, shape, state.product_ids if shape.products == "id" else None))
+
+
+async def api_get_similar_customers(request):
+    """The `?k=` (default 10) customers nearest to a customer in the encoder's latent space."""
+    customer_id = request.path_params["customer_id"]
+    try:
+        k = int(request.query_params.get("k", 10))
+    except ValueError:
+        return _json_response(request, {"error": "'k' must be an integer."}, 400)
+    if not 1 <= k <= SIMILAR_MAX_K:
+        return _json_response(request, {"error": f"'k' must be between 1 and {SIMILAR_MAX_K}."}, 400)
+
+    state = serving_state
+    with stage("similar_search"):
+        result = response_cache.get_or_compute(
+            customer_id, ("similar", k), lambda: get_similar_customers(customer_id, state.latent_index, state.recommendation_index, k),
+            state.version
+        )
+    if result is None:
+        return _json_response(request, {"error": f"Customer '{customer_id}' not found."}, 404)
+    return _json_response(request, result)
+
+
+async def api_get_batch_recommendations(request):
+    """Recommendations for many customers; same request body as the Flask endpoint."""
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = None
+    try:
+        customer_ids, source, top_n_cluster, top_n_overall, top_n_item = parse_batch_request(payload, BATCH_MAX_CUSTOMERS)
+        shape = parse_shape_options(payload)
+    except ValueError as e:
+        return _json_response(request, {"error": str(e)}, 400)
+
+    # Serve what the cache has and compute the rest in one batch call on the inference executor
+    state = serving_state
+    params = ("batch", source, top_n_cluster, top_n_overall, top_n_item)
+    results = [response_cache.get(customer_id, params, state.version) for customer_id in customer_ids]
+    missing_ids = list(dict.fromkeys(customer_id for customer_id, result in zip(customer_ids, results) if result is None))
+    computed = {}
+    if missing_ids:
+        try:
+            computed = dict(zip(missing_ids, await executor.run(
+                get_recommendations_for_customers,
+                missing_ids, state.rfm_df, state.df_orders_clustered, state.scaler, state.encoder, state.kmeans_latent,
+                state.cluster_top_items_dict, state.overall_top_products, state.rfm_features,
+                top_n_cluster=top_n_cluster, top_n_overall=top_n_overall, interactions=state.interactions,
+                item_similarity=state.item_similarity if source == "item" else None, top_n_item=top_n_item
+            )))
+        except ExecutorBusy:
+            return _busy_response(request)
+    for customer_id, result in computed.items():
+        # Model-error fallbacks are served but not cached, so the next request retries the model
+        if result["cluster"] != "Error":
+            response_cache.set(customer_id, params, result, state.version)
+    results = [computed[customer_id] if result is None else result for customer_id, result in zip(customer_ids, results)]
+    product_ids = state.product_ids if shape.products == "id" else None
+    return _json_response(request, {"results": [shape_response(result, shape, product_ids) for result in results]})
+
+
+async def api_metrics(request):
+    """
+    Prometheus text exposition of the served model version, cache and inference executor counters, and
+    the per-stage and per-endpoint latency histograms.
+    """
+    body = (model_metrics_text(serving_state, model_watcher) + cache_metrics_text(response_cache.stats())
+            + inference_metrics_text(executor.stats(), batcher.stats()) + histogram_metrics_text())
+    return Response(body, media_type="text/plain; version=0.0.4")
+
+
+class RequestTimer:
+    """ASGI middleware timing each HTTP request into the per-endpoint histogram on /metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not instrumentation.ENABLED:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router records the matched handler in the (shared) scope
+            endpoint = scope.get("endpoint")
+            REQUEST_SECONDS.observe(endpoint.__name__ if endpoint is not None else "unmatched", time.perf_counter() - start)
+
+
+app = Starlette(
+    routes=[
+        Route("/recommendations/batch", api_get_batch_recommendations, methods=["POST"]),
+        Route("/recommendations/{customer_id}", api_get_recommendations, methods=["GET"]),
+        Route("/customers/{customer_id}/similar", api_get_similar_customers, methods=["GET"]),
+        Route("/metrics", api_metrics, methods=["GET"]),
+    ],
+    middleware=[Middleware(RequestTimer)],
+    lifespan=lifespan,
+)
+
+# --- Running the ASGI Application ---
+if __name__ == '__main__':
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Smart Retail Engine recommendation API (ASGI).")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=ASGI_WORKERS,
+                        help="Worker processes, each with its own event loop and copy of the models "
+                             "(default: RETAIL_ASGI_WORKERS or the CPU count).")
+    args = parser.parse_args()
+    uvicorn.run("scripts.app_asgi:app", host=args.host, port=args.port, workers=args.workers, app_dir=project_root)
@@ -1,59 +1,232 @@
 # smart_retail_engine/scripts/app_flask.py
-from flask import Flask, jsonify, request
 import os
 import sys
+import time
+import argparse
+from contextlib import contextmanager
+
+# (stage, seconds) pairs recorded while the app starts, reported by `--profile-startup`
+startup_timings = []
+
+@contextmanager
+def _startup_stage(name):
+    start = time.perf_counter()
+    yield
+    startup_timings.append((name, time.perf_counter() - start))
+
+with _startup_stage("import flask"):
+    from flask import Flask, Response, g, request
 
 # Add the project root directory to the Python path to allow imports from 'scripts'
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-# Import functions and variables from pipeline.py
-from scripts.pipeline import load_models_and_data, get_recommendations_for_customer
+# Import only the serving helpers; training code (TensorFlow, scikit-learn) is never imported here
+with _startup_stage("import scripts.serving (numpy, pandas, joblib)"):
+    from scripts.serving import (
+        get_recommendations_from_index, get_recommendations_for_customers, get_item_recommendations_from_index,
+        RECOMMENDATION_SOURCES, get_similar_customers, parse_batch_request
+    )
+    from scripts.serving_state import ModelWatcher, load_current_state, model_metrics_text
+    from scripts.config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_URL, MODEL_RELOAD_INTERVAL
+    from scripts.response_cache import ResponseCache, make_shared_backend, cache_metrics_text
+    from scripts.response_shaping import parse_shape_options, shape_response, encode_body
+    from scripts import instrumentation
+    from scripts.instrumentation import REQUEST_SECONDS, stage, histogram_metrics_text
 
 app = Flask(__name__) # Initialize Flask app
 
+# Upper bound on customer IDs per batch request, to keep a single request from monopolizing a worker
+BATCH_MAX_CUSTOMERS = int(os.getenv("BATCH_MAX_CUSTOMERS", "5000"))
+# Upper bound on `k` for similar-customer queries
+SIMILAR_MAX_K = int(os.getenv("SIMILAR_MAX_K", "100"))
+
 # --- Model and Data Initialization (performed once when the app starts) ---
-# These global variables will hold the loaded models and data
-global_scaler = None
-global_encoder = None
-global_kmeans_latent = None
-global_rfm_df = None
-global_df_orders_clustered = None
-global_cluster_top_items_dict = None
-global_overall_top_products = None
-global_rfm_features = None
+# Models, tables and indexes of the served model version (see scripts/serving_state.py). Handlers read
+# this reference once per request; the model watcher replaces it when a new release is published.
+serving_state = None
+# Responses per (model version, customer, parameters); see scripts/response_cache.py
+response_cache = None
+# Background thread hot-swapping `serving_state` (None when RETAIL_MODEL_RELOAD_INTERVAL is 0)
+model_watcher = None
+
+def _swap_state(state):
+    """Makes `state` the served one; requests already running finish on the previous state."""
+    global serving_state
+    serving_state = state
+    response_cache.set_model_version(state.version)
 
 try:
-    global_scaler, global_encoder, global_kmeans_latent, \
-    global_rfm_df, global_df_orders_clustered, \
-    global_cluster_top_items_dict, global_overall_top_products, global_rfm_features = load_models_and_data()
-    print("[INFO] All models and pre-calculated data loaded successfully for Flask app.")
+    serving_state = load_current_state(timings=startup_timings)
+    response_cache = ResponseCache(
+        RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, make_shared_backend(RESPONSE_CACHE_URL), serving_state.version
+    )
+    print(f"[INFO] All models and pre-calculated data loaded successfully for Flask app (model version {serving_state.version}).")
 except Exception as e:
     print(f"[ERROR] Flask app failed to load models or data: {e}")
     sys.exit(1) # Exit if models/data can't be loaded, as the app won't function
 
+if MODEL_RELOAD_INTERVAL > 0:
+    model_watcher = ModelWatcher(serving_state.version, _swap_state, MODEL_RELOAD_INTERVAL)
+    model_watcher.start()
+
+@app.before_request
+def _start_request_timer():
+    if instrumentation.ENABLED:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request_time(response):
+    """Times the request into the per-endpoint histogram on /metrics."""
+    start = g.pop("request_start", None)
+    if start is not None:
+        REQUEST_SECONDS.observe(request.endpoint or "unmatched", time.perf_counter() - start)
+    return response
+
+def _json_response(payload, status=200):
+    """JSON response (orjson when available), compressed when the client accepts it and the body is large enough."""
+    body, encoding = encode_body(payload, request.headers.get("Accept-Encoding", ""))
+    response = Response(body, status=status, mimetype="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
 # --- Recommendation API Endpoint ---
 @app.route('/recommendations/<customer_id>', methods=['GET'])
 def api_get_recommendations(customer_id):
-    """API endpoint to get recommendations for a given customer ID."""
-    # Call the recommendation function from pipeline.py with loaded global assets
-    result = get_recommendations_for_customer(
-        customer_id,
-        global_rfm_df,
-        global_df_orders_clustered,
-        global_scaler,
-        global_encoder,
-        global_kmeans_latent,
-        global_cluster_top_items_dict,
-        global_overall_top_products,
-        global_rfm_features
-    )
-    
-    # Return the dictionary as a JSON response
-    return jsonify(result), 200
+    """
+    API endpoint to get recommendations for a given customer ID.
+    `?source=item` adds item-item co-purchase recommendations to the cluster-based response;
+    `fields`, `purchased_limit`/`purchased_offset` and `products=id` shape it (see scripts/response_shaping.py).
+    """
+    source = request.args.get("source", "cluster")
+    if source not in RECOMMENDATION_SOURCES:
+        return _json_response({"error": f"'source' must be one of: {', '.join(RECOMMENDATION_SOURCES)}."}, 400)
+    try:
+        shape = parse_shape_options(request.args)
+    except ValueError as e:
+        return _json_response({"error": str(e)}, 400)
+
+    # Answer from the precomputed per-customer index (O(1) lookup, no DataFrame scans or encoder calls)
+    state = serving_state
+    with stage("index_lookup"):
+        if source == "item":
+            result = response_cache.get_or_compute(customer_id, ("single", source), lambda: get_item_recommendations_from_index(
+                customer_id,
+                state.recommendation_index,
+                state.overall_top_products,
+                state.interactions,
+                state.item_similarity
+            ), state.version)
+        else:
+            result = response_cache.get_or_compute(customer_id, ("single", source), lambda: get_recommendations_from_index(
+                customer_id,
+                state.recommendation_index,
+                state.overall_top_products
+            ), state.version)
+
+    # Return the (shaped) dictionary as a JSON response
+    return _json_response(shape_response(result, shape, state.product_ids if shape.products == "id" else None))
+
+# --- Similar Customers API Endpoint ---
+@app.route('/customers/<customer_id>/similar', methods=['GET'])
+def api_get_similar_customers(customer_id):
+    """API endpoint returning the `?k=` (default 10) customers nearest to a customer in the encoder's latent space."""
+    try:
+        k = int(request.args.get("k", 10))
+    except ValueError:
+        return _json_response({"error": "'k' must be an integer."}, 400)
+    if not 1 <= k <= SIMILAR_MAX_K:
+        return _json_response({"error": f"'k' must be between 1 and {SIMILAR_MAX_K}."}, 400)
+
+    state = serving_state
+    with stage("similar_search"):
+        result = response_cache.get_or_compute(
+            customer_id, ("similar", k), lambda: get_similar_customers(customer_id, state.latent_index, state.recommendation_index, k),
+            state.version
+        )
+    if result is None:
+        return _json_response({"error": f"Customer '{customer_id}' not found."}, 404)
+    return _json_response(result)
+
+# --- Batch Recommendation API Endpoint ---
+@app.route('/recommendations/batch', methods=['POST'])
+def api_get_batch_recommendations():
+    """
+    API endpoint to get recommendations for many customers in one request.
+    Expects a JSON body like {"customer_ids": ["AA-10315", ...], "top_n_cluster": 5, "top_n_overall": 5};
+    "source": "item" (with an optional "top_n_item") adds item-item co-purchase recommendations, and
+    "fields", "purchased_limit"/"purchased_offset" and "products" shape every result.
+    """
+    payload = request.get_json(silent=True)
+    try:
+        customer_ids, source, top_n_cluster, top_n_overall, top_n_item = parse_batch_request(payload, BATCH_MAX_CUSTOMERS)
+        shape = parse_shape_options(payload)
+    except ValueError as e:
+        return _json_response({"error": str(e)}, 400)
+
+    # Serve what the cache has and compute the rest in one batch call
+    state = serving_state
+    params = ("batch", source, top_n_cluster, top_n_overall, top_n_item)
+    results = [response_cache.get(customer_id, params, state.version) for customer_id in customer_ids]
+    missing_ids = list(dict.fromkeys(customer_id for customer_id, result in zip(customer_ids, results) if result is None))
+    computed = {}
+    if missing_ids:
+        computed = dict(zip(missing_ids, get_recommendations_for_customers(
+            missing_ids,
+            state.rfm_df,
+            state.df_orders_clustered,
+            state.scaler,
+            state.encoder,
+            state.kmeans_latent,
+            state.cluster_top_items_dict,
+            state.overall_top_products,
+            state.rfm_features,
+            top_n_cluster=top_n_cluster,
+            top_n_overall=top_n_overall,
+            interactions=state.interactions,
+            item_similarity=state.item_similarity if source == "item" else None,
+            top_n_item=top_n_item
+        )))
+    for customer_id, result in computed.items():
+        # Model-error fallbacks are served but not cached, so the next request retries the model
+        if result["cluster"] != "Error":
+            response_cache.set(customer_id, params, result, state.version)
+    results = [computed[customer_id] if result is None else result for customer_id, result in zip(customer_ids, results)]
+    product_ids = state.product_ids if shape.products == "id" else None
+    return _json_response({"results": [shape_response(result, shape, product_ids) for result in results]})
+
+# --- Metrics Endpoint ---
+@app.route('/metrics', methods=['GET'])
+def api_metrics():
+    """
+    Prometheus text exposition of the served model version, model reload and response cache counters,
+    and the per-stage and per-endpoint latency histograms.
+    """
+    body = model_metrics_text(serving_state, model_watcher) + cache_metrics_text(response_cache.stats()) + histogram_metrics_text()
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+def print_startup_profile():
+    """Prints the import and model-load timings collected while this module started up."""
+    print("Startup profile:")
+    for stage, seconds in startup_timings:
+        print(f"  {stage:<50} {seconds * 1000:10.1f} ms")
+    print(f"  {'total':<50} {sum(seconds for _, seconds in startup_timings) * 1000:10.1f} ms")
+    heavy_modules = [module for module in ("tensorflow", "keras", "sklearn", "scipy") if module in sys.modules]
+    print(f"Heavy modules imported: {', '.join(heavy_modules) if heavy_modules else 'none'}")
 
 # --- Running the Flask Application ---
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Smart Retail Engine recommendation API.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print import and model-load timings and exit without serving.")
+    parser.add_argument("--debug", action="store_true", help="Run with the Flask debugger and reloader.")
+    args = parser.parse_args()
+    if args.profile_startup:
+        print_startup_profile()
+        sys.exit(0)
+
     # Use host='0.0.0.0' to make it accessible from other machines in the network
-    # For production, set debug=False and use a production-ready WSGI server (e.g., Gunicorn)
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # For production use a production-ready WSGI server (e.g., Gunicorn) or the ASGI app (scripts/app_asgi.py)
+    app.run(debug=args.debug, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -8,9 +8,14 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
+from scripts.api_client import RecommendationClient
+from scripts.config import API_PREFETCH_IDS
+
 # --- Flask API URL Configuration ---
 # Replace with your Flask server's IP/Domain if the API is running elsewhere
 FLASK_API_URL = os.getenv("FLASK_API_URL", "http://localhost:5000")
+# Shared by all Gradio sessions: pooled connections, timeouts, retries and a cache of recent customers
+api_client = RecommendationClient(FLASK_API_URL)
 
 def get_recommendations_gradio(customer_id):
     """Function to fetch recommendations from the Flask API for Gradio."""
@@ -24,9 +29,7 @@ def get_recommendations_gradio(customer_id):
         )
 
     try:
-        response = requests.get(f"{FLASK_API_URL}/recommendations/{customer_id}")
-        response.raise_for_status() # Raises an HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
+        data = api_client.get_recommendations(customer_id) # Raises an HTTPError for bad responses (4xx or 5xx)
 
         if "error" in data:
             error_msg = f"Error: {data['error']}"
@@ -69,6 +72,14 @@ def get_recommendations_gradio(customer_id):
                 personalized_recs_text,
                 overall_popular_recs_text
             )
+    # Before ConnectionError: ConnectTimeout subclasses both
+    except requests.exceptions.Timeout:
+        return (
+            "The Flask API did not respond in time. Please try again.",
+            f"API URL: `{FLASK_API_URL}`", "N/A", "N/A", "N/A",
+            "Timeout.",
+            "Timeout."
+        )
     except requests.exceptions.ConnectionError:
         return (
             "Could not connect to Flask API. Please ensure the API is running.",
@@ -142,4 +153,6 @@ with gr.Blocks(title="Smart Retail Recommendation Engine (Gradio)") as demo:
 
 if __name__ == "__main__":
     # Ensure Flask API is running separately at http://localhost:5000
+    if API_PREFETCH_IDS:
+        api_client.prefetch_in_background(API_PREFETCH_IDS)
     demo.launch()
\ No newline at end of file
@@ -8,12 +8,24 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
+from scripts.api_client import RecommendationClient
+from scripts.config import API_PREFETCH_IDS
+
 # --- Flask API URL Configuration ---
 # Get Flask API URL from environment variable or default to localhost
 FLASK_API_URL = os.getenv("FLASK_API_URL", "http://localhost:5000") 
 
+@st.cache_resource(show_spinner=False)
+def get_api_client():
+    """One pooled, caching API client per Streamlit server (the script itself re-runs on every interaction)."""
+    client = RecommendationClient(FLASK_API_URL)
+    if API_PREFETCH_IDS:
+        client.prefetch_in_background(API_PREFETCH_IDS)
+    return client
+
 # --- Streamlit Page Configuration ---
 st.set_page_config(page_title="Smart Retail Recommender", layout="centered")
+api_client = get_api_client()
 
 # --- Streamlit UI Elements ---
 st.title("🛍️ Smart Retail Recommendation Engine")
@@ -31,10 +43,8 @@ if st.button("Get Recommendations", type="primary"):
     if customer_id:
         with st.spinner("Fetching recommendations..."): # Show spinner while fetching
             try:
-                # Make a GET request to the Flask API
-                response = requests.get(f"{FLASK_API_URL}/recommendations/{customer_id}")
-                response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-                data = response.json() # Parse JSON response
+                # Ask the Flask API (or the client's cache); raises an HTTPError for bad responses (4xx or 5xx)
+                data = api_client.get_recommendations(customer_id)
 
                 if "error" in data: # Check for custom error messages from Flask API
                     st.error(f"An error occurred: {data['error']}")
@@ -86,6 +96,9 @@ if st.button("Get Recommendations", type="primary"):
                     else:
                         st.warning("No overall popular recommendations available.")
 
+            # Before ConnectionError: ConnectTimeout subclasses both
+            except requests.exceptions.Timeout:
+                st.error(f"The Flask API at `{FLASK_API_URL}` did not respond in time. Please try again.")
             except requests.exceptions.ConnectionError:
                 st.error("Could not connect to Flask API. Please ensure the API is running at "
                          f"`{FLASK_API_URL}`.")
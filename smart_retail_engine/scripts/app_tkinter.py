@@ -9,12 +9,19 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
+from scripts.api_client import RecommendationClient
+from scripts.config import API_PREFETCH_IDS
+
 # --- Flask API URL Configuration ---
 FLASK_API_URL = os.getenv("FLASK_API_URL", "http://localhost:5000")
 
 class RecommendationApp:
     def __init__(self, master):
         self.master = master
+        # Pooled connections, timeouts and retries, and a cache of recently viewed customers
+        self.api_client = RecommendationClient(FLASK_API_URL)
+        if API_PREFETCH_IDS:
+            self.api_client.prefetch_in_background(API_PREFETCH_IDS)
         master.title("Smart Retail Recommender")
         master.geometry("650x700") # Adjust size for more content
         master.resizable(False, False)
@@ -90,9 +97,7 @@ class RecommendationApp:
         self.button_recommend.config(state=tk.DISABLED, text="Fetching...") # Disable button and show status
 
         try:
-            response = requests.get(f"{FLASK_API_URL}/recommendations/{customer_id}")
-            response.raise_for_status() # Raises an HTTPError for bad responses (4xx or 5xx)
-            data = response.json()
+            data = self.api_client.get_recommendations(customer_id) # Raises an HTTPError for bad responses (4xx or 5xx)
 
             if "error" in data:
                 messagebox.showerror("API Error", f"An error occurred: {data['error']}")
@@ -129,6 +134,9 @@ class RecommendationApp:
                 self.text_overall_popular_recs.delete(1.0, tk.END)
                 self.text_overall_popular_recs.insert(tk.END, overall_popular_recs_text)
 
+        # Before ConnectionError: ConnectTimeout subclasses both
+        except requests.exceptions.Timeout:
+            messagebox.showerror("Timeout", f"The Flask API at `{FLASK_API_URL}` did not respond in time. Please try again.")
         except requests.exceptions.ConnectionError:
             messagebox.showerror("Connection Error", "Could not connect to Flask API. Please ensure the API is running at "
                                  f"`{FLASK_API_URL}`.")
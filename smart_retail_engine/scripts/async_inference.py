@@ -0,0 +1,158 @@
+# smart_retail_engine/scripts/async_inference.py
+"""
+Running CPU-bound inference from an asyncio event loop.
+
+`InferenceExecutor` runs blocking calls (scaling, encoding, K-Means, index building) on a small
+thread pool so the event loop keeps accepting and answering requests, and caps the number of calls
+waiting for a thread: beyond it `ExecutorBusy` is raised at once, so overload turns into fast 503s
+instead of an ever-growing queue and unbounded latency.
+
+`MicroBatcher` coalesces single-item requests: items submitted within `max_wait` seconds of the first
+pending one (or until `max_batch_size` are pending) are passed to one vectorized `batch_fn` call on the
+executor, and every caller gets the result for its own item. Items are grouped by a hashable `group`
+(e.g. the serving state and request parameters), and each group gets its own call. While as many
+batches are running as the executor has threads, new items keep collecting and go out together as
+soon as one finishes, so batches grow with the load instead of queueing up one small call each.
+At most `max_pending` items wait this way; beyond that `submit` raises `ExecutorBusy` as well.
+
+Both are meant to be used from a single event loop thread and are not thread-safe.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorBusy(Exception):
+    """Raised when the inference queue is full."""
+
+
+class InferenceExecutor:
+    """Thread pool of `max_workers` threads with at most `max_pending` calls running or queued."""
+
+    def __init__(self, max_workers=2, max_pending=64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.counters = dict.fromkeys(("calls", "rejected"), 0)
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="inference")
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs `fn(*args, **kwargs)` on the pool and returns its result; raises `ExecutorBusy` when full."""
+        if self.pending >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise ExecutorBusy(f"{self.pending} inference calls pending.")
+        self.pending += 1
+        self.counters["calls"] += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {**self.counters, "pending": self.pending, "max_pending": self.max_pending, "threads": self.max_workers}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent `submit(item, group)` calls into `batch_fn(group, items)` calls on `executor`.
+    `batch_fn` returns one result per item, in order; duplicate items of a batch are computed once.
+    """
+
+    def __init__(self, batch_fn, executor, max_wait=0.002, max_batch_size=256, max_pending=1024):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self.max_pending = max_pending
+        self.counters = dict.fromkeys(("batches", "items", "rejected"), 0)
+        self._pending = {} # group -> [(item, future)]
+        self._pending_items = 0
+        self._timer = None
+        self._running = 0
+        self._tasks = set() # running batches (the event loop only keeps weak references to tasks)
+
+    async def submit(self, item, group=None):
+        """
+        The result of `batch_fn` for `item`, computed together with the other items pending in `group`.
+        Raises `ExecutorBusy` when `max_pending` items are already waiting for a batch.
+        """
+        if self._pending_items >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise ExecutorBusy(f"{self._pending_items} items pending for micro-batches.")
+        self._pending_items += 1
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(group, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_batch_size and self._running < self.executor.max_workers:
+            self._start(group, self._pending.pop(group))
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        self._timer = None
+        # With every executor thread busy, leave the items pending; the next finished batch flushes them
+        while self._pending and self._running < self.executor.max_workers:
+            group = next(iter(self._pending))
+            batch = self._pending[group]
+            if len(batch) > self.max_batch_size:
+                self._start(group, batch[:self.max_batch_size])
+                self._pending[group] = batch[self.max_batch_size:]
+            else:
+                self._start(group, self._pending.pop(group))
+
+    def _start(self, group, batch):
+        self._running += 1
+        self._pending_items -= len(batch)
+        self.counters["batches"] += 1
+        self.counters["items"] += len(batch)
+        task = asyncio.ensure_future(self._run(group, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group, batch):
+        items = list(dict.fromkeys(item for item, _ in batch))
+        try:
+            results = dict(zip(items, await self.executor.run(self.batch_fn, group, items)))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._running -= 1
+            if self._pending and self._timer is None:
+                self._flush()
+        for item, future in batch:
+            if not future.done():
+                future.set_result(results[item])
+
+    def stats(self):
+        return {**self.counters, "pending": self._pending_items, "max_pending": self.max_pending}
+
+
+def inference_metrics_text(executor_stats, batcher_stats=None, prefix="retail_inference"):
+    """Prometheus text exposition of `InferenceExecutor.stats()` and `MicroBatcher.stats()`."""
+    lines = [
+        f"# HELP {prefix}_calls_total Calls run on the inference executor.", f"# TYPE {prefix}_calls_total counter",
+        f"{prefix}_calls_total {executor_stats['calls']}",
+        f"# HELP {prefix}_rejected_total Calls rejected because the inference queue was full.",
+        f"# TYPE {prefix}_rejected_total counter", f"{prefix}_rejected_total {executor_stats['rejected']}",
+        f"# HELP {prefix}_pending Calls running or queued on the inference executor.", f"# TYPE {prefix}_pending gauge",
+        f"{prefix}_pending {executor_stats['pending']}",
+    ]
+    if batcher_stats is not None:
+        lines += [
+            f"# HELP {prefix}_batches_total Micro-batches scored.", f"# TYPE {prefix}_batches_total counter",
+            f"{prefix}_batches_total {batcher_stats['batches']}",
+            f"# HELP {prefix}_batched_items_total Single-customer requests scored in micro-batches.",
+            f"# TYPE {prefix}_batched_items_total counter", f"{prefix}_batched_items_total {batcher_stats['items']}",
+            f"# HELP {prefix}_batch_rejected_total Single-customer requests rejected because too many were waiting for a batch.",
+            f"# TYPE {prefix}_batch_rejected_total counter", f"{prefix}_batch_rejected_total {batcher_stats['rejected']}",
+            f"# HELP {prefix}_batch_pending Single-customer requests waiting for a micro-batch.",
+            f"# TYPE {prefix}_batch_pending gauge", f"{prefix}_batch_pending {batcher_stats['pending']}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,131 @@
+# smart_retail_engine/scripts/columnar_store.py
+"""
+Columnar on-disk format for the processed tables: one `.npy` file per column, memory-mapped on load.
+
+String-like columns are dictionary-encoded (integer codes + a JSON list of categories) and come back
+as pandas categoricals; timezone-naive datetimes are stored as int64 nanoseconds. Timedeltas,
+timezone-aware datetimes, periods and intervals are rejected. Because the column files are opened
+with `mmap_mode='r'`, every worker process that loads the same table shares its pages through the OS
+page cache instead of holding a private copy.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = "schema.json"
+
+
+def _codes_dtype(n_categories):
+    """Smallest signed integer dtype pandas uses for categorical codes (keeps loading zero-copy)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _column_kind(column, dtype):
+    """Storage kind ("numeric", "datetime" or "dictionary") of a column; ValueError for unsupported dtypes."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Categories are stored as JSON, so they must be numbers or strings themselves
+        if _column_kind(column, dtype.categories.dtype) == "datetime":
+            raise ValueError(f"Column '{column}' has datetime categories, which the columnar store does not support.")
+        return "dictionary"
+    if isinstance(dtype, (pd.DatetimeTZDtype, pd.PeriodDtype, pd.IntervalDtype)) or pd.api.types.is_timedelta64_dtype(dtype):
+        raise ValueError(
+            f"Column '{column}' has dtype {dtype}, which the columnar store does not support; convert it first "
+            "(e.g. timedeltas to a number of days, timezone-aware datetimes with `.dt.tz_convert(None)`)."
+        )
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return "datetime"
+    return "dictionary"
+
+
+def save_columnar_table(df, directory):
+    """
+    Writes `df` as a columnar table into `directory`, replacing any previous version.
+
+    The table is written to a temporary sibling directory first and then swapped in, so readers never
+    see a half-written table (processes that already mapped the old files keep reading them). Column
+    dtypes are checked before anything is written; an unsupported one raises ValueError.
+    """
+    kinds = [_column_kind(column, dtype) for column, dtype in df.dtypes.items()]
+    directory = os.path.abspath(directory)
+    tmp_directory = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+
+    schema = {"num_rows": len(df), "columns": []}
+    try:
+        for position, (column, kind) in enumerate(zip(df.columns, kinds)):
+            series = df[column]
+            file_name = f"col_{position:03d}"
+            entry = {"name": column, "file": f"{file_name}.npy", "kind": kind}
+
+            if kind == "numeric":
+                values = series.to_numpy()
+            elif kind == "datetime":
+                values = series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            else:
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+                    entry["ordered"] = bool(series.cat.ordered)
+                else:
+                    codes, categories = pd.factorize(series)
+                    entry["ordered"] = False
+                values = codes.astype(_codes_dtype(len(categories)))
+                entry["categories_file"] = f"{file_name}.categories.json"
+                with open(os.path.join(tmp_directory, entry["categories_file"]), "w") as f:
+                    json.dump(categories.tolist(), f)
+
+            np.save(os.path.join(tmp_directory, entry["file"]), np.ascontiguousarray(values))
+            schema["columns"].append(entry)
+
+        with open(os.path.join(tmp_directory, SCHEMA_FILE), "w") as f:
+            json.dump(schema, f, indent=2)
+    except Exception:
+        # e.g. object values json cannot encode; leave any previous table in place
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        raise
+
+    old_directory = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.rename(directory, old_directory)
+    os.rename(tmp_directory, directory)
+    shutil.rmtree(old_directory, ignore_errors=True)
+
+
+def columnar_table_exists(directory):
+    """Returns True if `directory` holds a table written by `save_columnar_table`."""
+    return os.path.exists(os.path.join(directory, SCHEMA_FILE))
+
+
+def load_columnar_table(directory, columns=None, mmap=True):
+    """
+    Loads a table written by `save_columnar_table` as a DataFrame backed by memory-mapped arrays.
+
+    Columns are read-only when `mmap` is True. `columns` restricts loading to a subset of columns.
+    """
+    with open(os.path.join(directory, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+
+    data = {}
+    for entry in schema["columns"]:
+        if columns is not None and entry["name"] not in columns:
+            continue
+        values = np.load(os.path.join(directory, entry["file"]), mmap_mode="r" if mmap else None)
+        if entry["kind"] == "datetime":
+            values = values.view("datetime64[ns]")
+        elif entry["kind"] == "dictionary":
+            with open(os.path.join(directory, entry["categories_file"])) as f:
+                categories = json.load(f)
+            dtype = pd.CategoricalDtype(categories, ordered=entry["ordered"])
+            values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        data[entry["name"]] = values
+
+    # copy=False keeps each column as its own block over the mapped file instead of consolidating
+    return pd.DataFrame(data, copy=False)
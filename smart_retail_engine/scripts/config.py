@@ -0,0 +1,108 @@
+# smart_retail_engine/scripts/config.py
+"""Shared path and artifact configuration for the training pipeline and the serving code."""
+import os
+
+# --- Path Configurations (relative to the project root) ---
+_current_script_dir = os.path.dirname(os.path.abspath(__file__))
+# Both can be pointed elsewhere (e.g. a scratch workspace for benchmarks) through the environment
+PROCESSED_DATA_DIR = os.getenv("RETAIL_PROCESSED_DATA_DIR", os.path.join(_current_script_dir, '..', 'data', 'processed'))
+MODELS_DIR = os.getenv("RETAIL_MODELS_DIR", os.path.join(_current_script_dir, '..', 'models'))
+RAW_DATA_PATH = os.path.join(_current_script_dir, '..', 'data', 'raw', 'global-superstore.xlsx')
+RECOMMENDATION_INDEX_FILE = "recommendation_index.joblib"
+# Per-cluster and overall product popularity tables computed at pipeline time
+TOP_ITEMS_FILE = "top_items.joblib"
+# Customer x product purchase counts in CSR layout
+INTERACTIONS_FILE = "interactions.npz"
+# Top-k co-purchase neighbours per product for the item-based engine, and k
+ITEM_SIMILARITY_FILE = "item_similarity.npz"
+ITEM_NEIGHBOURS = int(os.getenv("RETAIL_ITEM_NEIGHBOURS", "20"))
+# Memory-mappable copies of the processed CSV tables (one sub-directory per table)
+COLUMNAR_SUBDIR = 'columnar'
+COLUMNAR_DATA_DIR = os.path.join(PROCESSED_DATA_DIR, COLUMNAR_SUBDIR)
+# Typed columnar copies of parsed raw workbooks, keyed by the workbook's content hash
+INGESTION_CACHE_DIR = os.path.join(PROCESSED_DATA_DIR, 'ingest_cache')
+
+# "numpy" serves from the exported .npz artifact, "keras" from the saved scaler/encoder/KMeans,
+# "auto" picks numpy whenever the artifact exists
+INFERENCE_BACKEND = os.getenv("RETAIL_INFERENCE_BACKEND", "auto")
+
+# API response cache: entries kept in each process (0 disables the local level), seconds an entry stays
+# valid, and an optional shared second level ("memory://" or a redis:// URL; empty for none)
+RESPONSE_CACHE_SIZE = int(os.getenv("RETAIL_RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RETAIL_RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_URL = os.getenv("RETAIL_RESPONSE_CACHE_URL", "")
+# Content codings API responses may be compressed with (comma-separated "br" and/or "gzip"; empty
+# disables compression) and the smallest body worth compressing
+RESPONSE_COMPRESSION = tuple(filter(None, os.getenv("RETAIL_RESPONSE_COMPRESSION", "br,gzip").split(",")))
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RETAIL_RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+
+# Per-stage and per-endpoint latency histograms on the API's /metrics, and the per-step wall time and
+# peak memory report of training runs (saved as RUN_REPORT_FILE next to the models); "0" turns both off
+INSTRUMENTATION = os.getenv("RETAIL_INSTRUMENTATION", "1") != "0"
+RUN_REPORT_FILE = "run_report.json"
+
+# ASGI serving (scripts/app_asgi.py): uvicorn worker processes (each loads its own copy of the models),
+# threads per worker for CPU-bound inference and how many calls may queue for them before requests
+# get a 503. Concurrent single-customer requests arriving within MICRO_BATCH_WAIT_MS are scored
+# together, up to MICRO_BATCH_MAX_SIZE customers per call, when ASGI_SCORING is "live" (at most
+# MICRO_BATCH_MAX_PENDING may wait for a batch before requests get a 503); with "index" they are
+# answered from the precomputed recommendation index
+ASGI_WORKERS = int(os.getenv("RETAIL_ASGI_WORKERS", str(os.cpu_count() or 1)))
+INFERENCE_THREADS = int(os.getenv("RETAIL_INFERENCE_THREADS", "2"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("RETAIL_INFERENCE_QUEUE_SIZE", "64"))
+MICRO_BATCH_WAIT_MS = float(os.getenv("RETAIL_MICRO_BATCH_WAIT_MS", "2"))
+MICRO_BATCH_MAX_SIZE = int(os.getenv("RETAIL_MICRO_BATCH_MAX_SIZE", "256"))
+MICRO_BATCH_MAX_PENDING = int(os.getenv("RETAIL_MICRO_BATCH_MAX_PENDING", "1024"))
+ASGI_SCORING = os.getenv("RETAIL_ASGI_SCORING", "index")
+
+# Front-end HTTP client (scripts/api_client.py): API base URL, connect and read timeouts in seconds,
+# retries of failed connections and 502/503/504 responses (exponential backoff starting at
+# API_RETRY_BACKOFF seconds), the recently viewed customers kept client-side and for how long, and
+# customer IDs (comma-separated) the UIs prefetch in one batch request at startup
+API_URL = os.getenv("FLASK_API_URL", "http://localhost:5000")
+API_CONNECT_TIMEOUT = float(os.getenv("RETAIL_API_CONNECT_TIMEOUT", "3"))
+API_READ_TIMEOUT = float(os.getenv("RETAIL_API_READ_TIMEOUT", "10"))
+API_RETRIES = int(os.getenv("RETAIL_API_RETRIES", "3"))
+API_RETRY_BACKOFF = float(os.getenv("RETAIL_API_RETRY_BACKOFF", "0.3"))
+API_CLIENT_CACHE_SIZE = int(os.getenv("RETAIL_API_CLIENT_CACHE_SIZE", "256"))
+API_CLIENT_CACHE_TTL = float(os.getenv("RETAIL_API_CLIENT_CACHE_TTL", "60"))
+API_PREFETCH_IDS = tuple(filter(None, os.getenv("RETAIL_UI_PREFETCH_IDS", "").split(",")))
+
+# Published serving releases: immutable snapshots of the models and serving tables, one sub-directory
+# per model version, with a "CURRENT" pointer file naming the one API workers serve. Workers check the
+# pointer every MODEL_RELOAD_INTERVAL seconds (0 disables hot reload); older releases beyond
+# RELEASES_TO_KEEP are deleted on publish
+RELEASES_DIR = os.path.join(MODELS_DIR, 'releases')
+RELEASES_TO_KEEP = int(os.getenv("RETAIL_RELEASES_TO_KEEP", "3"))
+MODEL_RELOAD_INTERVAL = float(os.getenv("RETAIL_MODEL_RELOAD_INTERVAL", "30"))
+
+# Incremental refresh state written by a full training run: per-customer RFM aggregates and the
+# frozen R/F/M score bin edges
+RFM_STATE_FILE = "rfm_state.npz"
+RFM_SCORE_BINS_FILE = "rfm_score_bins.json"
+# Largest absolute mean of the standardized RFM features an incremental refresh tolerates before
+# falling back to a full retrain (the training population has mean 0 on every feature)
+DRIFT_THRESHOLD = float(os.getenv("RETAIL_DRIFT_THRESHOLD", "0.25"))
+
+# How customers are embedded before K-Means: "autoencoder" trains the Keras autoencoder, "pca" fits a
+# NumPy PCA projection (no training, no TensorFlow needed at fit time)
+EMBEDDING_BACKEND = os.getenv("RETAIL_EMBEDDING_BACKEND", "autoencoder")
+
+# Clustering of the latent vectors: "kmeans" runs full K-Means (n_init=10) on the whole latent matrix,
+# "minibatch" streams it from the encoder in chunks of LATENT_CHUNK_SIZE customers into MiniBatchKMeans
+# (MINIBATCH_SIZE rows per update, MINIBATCH_PASSES shuffled passes) for customer bases in the millions
+CLUSTERING_ALGORITHM = os.getenv("RETAIL_CLUSTERING", "kmeans")
+MINIBATCH_SIZE = int(os.getenv("RETAIL_MINIBATCH_SIZE", "4096"))
+MINIBATCH_PASSES = int(os.getenv("RETAIL_MINIBATCH_PASSES", "2"))
+LATENT_CHUNK_SIZE = int(os.getenv("RETAIL_LATENT_CHUNK_SIZE", "65536"))
+
+# Autoencoder training: seed for weights, shuffling and the validation split; upper bound on epochs
+# (early stopping usually ends sooner); batch size; epochs without a better held-out reconstruction
+# loss before stopping; and the share of customers held out for that loss
+TRAINING_SEED = int(os.getenv("RETAIL_TRAINING_SEED", "42"))
+TRAINING_MAX_EPOCHS = int(os.getenv("RETAIL_TRAINING_MAX_EPOCHS", "200"))
+TRAINING_BATCH_SIZE = int(os.getenv("RETAIL_TRAINING_BATCH_SIZE", "256"))
+EARLY_STOPPING_PATIENCE = int(os.getenv("RETAIL_EARLY_STOPPING_PATIENCE", "10"))
+VALIDATION_FRACTION = float(os.getenv("RETAIL_VALIDATION_FRACTION", "0.1"))
+# Epochs, wall time and loss curves of the last training run, written next to the models
+TRAINING_REPORT_FILE = "training_report.json"
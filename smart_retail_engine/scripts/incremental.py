@@ -0,0 +1,190 @@
+# smart_retail_engine/scripts/incremental.py
+"""
+Incremental refresh of RFM scores, clusters and recommendation artifacts from new order rows.
+
+A full training run persists the per-customer RFM aggregates (`RFMAccumulator`) and the frozen R/F/M
+score bin edges. `refresh_from_new_orders` folds only the new orders into those aggregates, re-scores
+R/F/M for everyone against the frozen bins (Recency moves with the analysis date for all customers),
+re-assigns the customers the new orders touch with the frozen scaler/encoder/K-Means, and rebuilds
+the top-item lists, the interaction and co-purchase artifacts, the similar-customer index and the
+recommendation index, then publishes them as a new serving release. With `partial_fit`, a mini-batch
+K-Means model also folds the touched customers into its centroids and every customer is
+re-assigned. When the standardized RFM features drift past `DRIFT_THRESHOLD`, the frozen models no
+longer describe the customer base and a full retrain runs instead, with the embedding backend the
+saved models were trained with.
+"""
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scripts.config import (
+    PROCESSED_DATA_DIR, MODELS_DIR, RFM_STATE_FILE, RFM_SCORE_BINS_FILE, DRIFT_THRESHOLD, INFERENCE_BACKEND, CLUSTERING_ALGORITHM,
+    EMBEDDING_BACKEND
+)
+from scripts.rfm_streaming import RFMAccumulator
+from scripts.numpy_inference import NUMPY_ARTIFACT_FILE, export_numpy_artifact
+from scripts.ingestion import read_orders_file, read_returns_file
+from scripts.latent_index import LATENT_INDEX_FILE, build_latent_index
+from scripts.releases import publish_release
+from scripts.training import (
+    RFM_FEATURES, RFM_SEGMENT_LABELS, preprocess_orders, attach_clusters, compute_rfm_score_bins, score_rfm, score_rfm_and_cluster,
+    save_processed_data, save_models_and_data, save_training_report, load_training_report, partial_fit_clusters
+)
+from scripts.serving import (
+    read_processed_table, load_inference_models, refresh_top_items, refresh_interaction_artifacts, build_recommendation_index,
+    save_recommendation_index
+)
+
+# --- Persisted State ---
+
+def save_incremental_state(accumulator, score_bins, processed_data_dir=PROCESSED_DATA_DIR):
+    """Saves the RFM aggregates and the frozen score bin edges next to the processed tables."""
+    os.makedirs(processed_data_dir, exist_ok=True)
+    accumulator.save(os.path.join(processed_data_dir, RFM_STATE_FILE))
+    with open(os.path.join(processed_data_dir, RFM_SCORE_BINS_FILE), "w") as f:
+        json.dump(score_bins, f)
+
+
+def load_incremental_state(processed_data_dir=PROCESSED_DATA_DIR):
+    """Returns (accumulator, score_bins) saved by `save_incremental_state`, or None if either is missing."""
+    state_path = os.path.join(processed_data_dir, RFM_STATE_FILE)
+    bins_path = os.path.join(processed_data_dir, RFM_SCORE_BINS_FILE)
+    if not (os.path.exists(state_path) and os.path.exists(bins_path)):
+        return None
+    with open(bins_path) as f:
+        score_bins = json.load(f)
+    return RFMAccumulator.load(state_path), score_bins
+
+
+# --- Refresh ---
+
+def read_new_orders(file_path, returns_path=None):
+    """Reads new raw order rows (Orders sheet layout) from CSV or Parquet and preprocesses them."""
+    df_returns = read_returns_file(returns_path) if returns_path else None
+    return preprocess_orders(read_orders_file(file_path), df_returns)
+
+
+def rfm_feature_drift(rfm_df, scaler, rfm_features=RFM_FEATURES):
+    """Largest absolute mean of the standardized RFM features (0 for the population the scaler was fit on)."""
+    X_scaled = scaler.transform(rfm_df[rfm_features].to_numpy(dtype=np.float64))
+    return float(np.abs(X_scaled.mean(axis=0)).max())
+
+
+def assign_clusters(rfm_df, scaler, encoder, kmeans_latent, rfm_features=RFM_FEATURES):
+    """Cluster IDs of `rfm_df` rows from the frozen scaler, encoder and latent K-Means."""
+    if rfm_df.empty:
+        return np.empty(0, dtype=int)
+    X_scaled = scaler.transform(rfm_df[rfm_features].to_numpy(dtype=np.float64))
+    return kmeans_latent.predict(encoder.predict(X_scaled, verbose=0)).astype(int)
+
+
+def update_cluster_centroids(rfm_df, scaler, encoder, rfm_features=RFM_FEATURES, models_dir=MODELS_DIR):
+    """
+    Folds the customers of `rfm_df` into the saved mini-batch K-Means with `partial_fit`, saves the
+    updated model (joblib and NumPy artifact) and returns it.
+    """
+    kmeans_path = os.path.join(models_dir, "kmeans_latent_model.joblib")
+    kmeans_latent = joblib.load(kmeans_path)
+    if not hasattr(kmeans_latent, "partial_fit"):
+        raise ValueError("The saved K-Means model was fitted in full; retrain with `--clustering minibatch` to update it incrementally.")
+    if not rfm_df.empty:
+        X_scaled = scaler.transform(rfm_df[rfm_features].to_numpy(dtype=np.float64))
+        partial_fit_clusters(kmeans_latent, encoder, X_scaled)
+    joblib.dump(kmeans_latent, kmeans_path)
+    export_numpy_artifact(scaler, encoder, kmeans_latent, os.path.join(models_dir, NUMPY_ARTIFACT_FILE))
+    return kmeans_latent
+
+
+def refresh_from_new_orders(new_orders, drift_threshold=DRIFT_THRESHOLD, backend=INFERENCE_BACKEND, partial_fit=False):
+    """
+    Applies preprocessed `new_orders` to the saved RFM table, clusters and recommendation index.
+    With `partial_fit`, the affected customers also update the centroids of a saved mini-batch K-Means.
+
+    Rows whose (Customer ID, Order ID) is already part of the saved aggregates are skipped, so
+    re-running with an overlapping file does not double-count sales. Returns a summary dict.
+    """
+    state = load_incremental_state()
+    if state is None:
+        raise FileNotFoundError(
+            f"Incremental state ({RFM_STATE_FILE}, {RFM_SCORE_BINS_FILE}) not found in {PROCESSED_DATA_DIR}; "
+            "run the full pipeline once first."
+        )
+    accumulator, score_bins = state
+    scaler, encoder, kmeans_latent = load_inference_models(backend)
+
+    known_rows = accumulator.known_orders(new_orders)
+    if known_rows.any():
+        print(f"[WARN] Skipping {int(known_rows.sum())} order rows that were already ingested.")
+        new_orders = new_orders[~known_rows]
+
+    previous_rfm = read_processed_table("rfm_df")
+    previous_rfm['Customer ID'] = previous_rfm['Customer ID'].astype(object)
+    previous_rfm = previous_rfm.set_index('Customer ID')
+    previous_orders = read_processed_table("df_orders_ca_with_clusters")
+
+    accumulator.update(new_orders)
+    # R/F/M for everyone: Recency moves with the new analysis date even for untouched customers, so all
+    # scores are recomputed against the frozen bins (vectorized, cheap); only clusters are carried over
+    rfm_df = score_rfm(accumulator.result(), score_bins=score_bins)
+    rfm_df['RFM_Segment_Label'] = pd.Categorical(rfm_df['RFM_Segment_Label'], categories=RFM_SEGMENT_LABELS)
+    affected = rfm_df['Customer ID'].isin(set(new_orders['Customer ID'].astype(object))).to_numpy()
+
+    clusters = previous_rfm['Cluster_AE'].reindex(rfm_df['Customer ID']).to_numpy(copy=True)
+    clusters[affected] = assign_clusters(rfm_df[affected], scaler, encoder, kmeans_latent)
+    rfm_df['Cluster_AE'] = clusters.astype(int)
+    rescored = rfm_df[affected]
+
+    previous_clusters = previous_rfm['Cluster_AE'].reindex(rescored['Customer ID'])
+    reassigned = previous_clusters.notna().to_numpy() & (previous_clusters.to_numpy() != rescored['Cluster_AE'].to_numpy())
+    summary = {
+        "new_order_rows": len(new_orders),
+        "affected_customers": int(affected.sum()),
+        "new_customers": int(previous_clusters.isna().sum()),
+        "reassigned_customers": int(reassigned.sum()),
+        "drift": rfm_feature_drift(rfm_df, scaler),
+        "drift_threshold": drift_threshold,
+        "retrained": False,
+        "centroids_updated": False,
+    }
+
+    df_orders = pd.concat([previous_orders.drop(columns=['Cluster_AE']), new_orders], ignore_index=True)
+    for date_column in ['Order Date', 'Ship Date']:
+        df_orders[date_column] = pd.to_datetime(df_orders[date_column]) # CSV fallback reads dates as strings
+    if summary["drift"] > drift_threshold:
+        print(f"[WARN] RFM feature drift {summary['drift']:.3f} exceeds {drift_threshold}; running a full retrain.")
+        embedding = load_training_report().get("embedding")
+        if embedding is None:
+            print(f"[WARN] No training report records the saved models' embedding backend; retraining with '{EMBEDDING_BACKEND}'.")
+            embedding = EMBEDDING_BACKEND
+        training_report = {}
+        rfm_df, scaler, encoder, kmeans_latent, _ = score_rfm_and_cluster(
+            rfm_df[['Customer ID'] + RFM_FEATURES].copy(), kmeans_latent.n_clusters, training_report=training_report,
+            embedding=embedding, clustering="minibatch" if partial_fit else CLUSTERING_ALGORITHM
+        )
+        score_bins = compute_rfm_score_bins(rfm_df)
+        df_orders = attach_clusters(df_orders, rfm_df)
+        save_models_and_data(rfm_df, df_orders, scaler, encoder, kmeans_latent)
+        save_training_report(training_report)
+        summary["retrained"] = True
+    else:
+        if partial_fit:
+            kmeans_latent = update_cluster_centroids(rescored, scaler, encoder)
+            rfm_df['Cluster_AE'] = assign_clusters(rfm_df, scaler, encoder, kmeans_latent)
+            previous_clusters = previous_rfm['Cluster_AE'].reindex(rfm_df['Customer ID'])
+            summary["reassigned_customers"] = int((previous_clusters.notna().to_numpy()
+                                                   & (previous_clusters.to_numpy() != rfm_df['Cluster_AE'].to_numpy())).sum())
+            summary["centroids_updated"] = True
+        df_orders = attach_clusters(df_orders, rfm_df)
+        save_processed_data(rfm_df, df_orders)
+        build_latent_index(rfm_df, scaler, encoder, RFM_FEATURES).save(os.path.join(MODELS_DIR, LATENT_INDEX_FILE))
+
+    cluster_top_items_dict, overall_top_products = refresh_top_items(df_orders)
+    interactions, _ = refresh_interaction_artifacts(df_orders)
+    save_recommendation_index(build_recommendation_index(rfm_df, df_orders, cluster_top_items_dict, overall_top_products, interactions))
+    save_incremental_state(accumulator, score_bins)
+    publish_release()
+    print(f"[INFO] Incremental refresh complete: {summary}")
+    return summary
@@ -0,0 +1,143 @@
+# smart_retail_engine/scripts/ingestion.py
+"""
+Raw order ingestion: the Global Superstore workbook through a columnar cache, or CSV/Parquet exports.
+
+Parsing the workbook with openpyxl is the slowest step of the pipeline, so `load_workbook_tables`
+converts the "Orders" and "Returns" sheets once into typed columnar tables (see `scripts.columnar_store`)
+stored under a directory named after the workbook's SHA-256. Later runs load those tables instead and
+only re-parse when the workbook's contents change. CSV and Parquet exports are read directly with the
+same explicit column types.
+"""
+import hashlib
+import os
+import shutil
+
+import pandas as pd
+
+from scripts.config import RAW_DATA_PATH, INGESTION_CACHE_DIR
+from scripts.columnar_store import save_columnar_table, columnar_table_exists, load_columnar_table
+
+# Column types of the "Orders" sheet; columns missing from an export are simply not cast
+ORDER_COLUMN_DTYPES = {
+    'Row ID': 'int64', 'Order ID': str, 'Ship Mode': str, 'Customer ID': str, 'Customer Name': str,
+    'Segment': str, 'City': str, 'State': str, 'Country': str, 'Postal Code': 'float64', 'Market': str,
+    'Region': str, 'Product ID': str, 'Category': str, 'Sub-Category': str, 'Product Name': str,
+    'Sales': 'float64', 'Quantity': 'int64', 'Discount': 'float64', 'Profit': 'float64',
+    'Shipping Cost': 'float64', 'Order Priority': str,
+}
+ORDER_DATE_COLUMNS = ['Order Date', 'Ship Date']
+RETURN_COLUMN_DTYPES = {'Returned': str, 'Order ID': str, 'Market': str}
+
+_WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+
+
+def file_sha256(file_path, block_size=1 << 20):
+    """Hex SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _apply_column_types(df, column_dtypes, date_columns=()):
+    """Casts the numeric and date columns present in `df`; string columns are typed by the readers."""
+    for column, dtype in column_dtypes.items():
+        if column in df.columns and dtype is not str:
+            df[column] = df[column].astype(dtype)
+    for column in date_columns:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+
+def _read_table(file_path, column_dtypes, date_columns=(), categorical=False):
+    """Reads a CSV or Parquet file with explicit column types; string columns become categoricals if `categorical`."""
+    string_dtype = 'category' if categorical else str
+    if os.path.splitext(file_path)[1].lower() == '.parquet':
+        df = pd.read_parquet(file_path)
+        if categorical:
+            for column, dtype in column_dtypes.items():
+                if column in df.columns and dtype is str:
+                    df[column] = df[column].astype('category')
+        return _apply_column_types(df, column_dtypes, date_columns)
+    header = pd.read_csv(file_path, nrows=0).columns
+    present_dates = [column for column in date_columns if column in header]
+    df = pd.read_csv(file_path, dtype={column: string_dtype for column, dtype in column_dtypes.items() if dtype is str},
+                     parse_dates=present_dates)
+    return _apply_column_types(df, column_dtypes, date_columns)
+
+
+def read_orders_file(file_path, categorical=False):
+    """
+    Reads an Orders export (CSV or Parquet) with explicit dtypes and parsed order/ship dates.
+
+    With `categorical=True` string columns are parsed straight into categoricals, so the full
+    string columns are never materialized.
+    """
+    return _read_table(file_path, ORDER_COLUMN_DTYPES, ORDER_DATE_COLUMNS, categorical=categorical)
+
+
+def read_returns_file(file_path):
+    """Reads a Returns export (CSV or Parquet) with explicit dtypes."""
+    return _read_table(file_path, RETURN_COLUMN_DTYPES)
+
+
+def _load_cached_table(directory, categorical=False):
+    """Loads a cached table; dictionary-encoded string columns become plain strings unless `categorical`."""
+    df = load_columnar_table(directory, mmap=False)
+    if categorical:
+        return df
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(df[column].cat.categories.dtype)
+    return df
+
+
+def load_workbook_tables(file_path=RAW_DATA_PATH, cache_dir=INGESTION_CACHE_DIR, use_cache=True, categorical=False):
+    """
+    Returns the workbook's (orders, returns) sheets, parsing the workbook only on a cache miss.
+
+    Cache entries live in `cache_dir/<file name>-<sha256 prefix>`; writing a new entry removes older
+    entries of the same file name. With `categorical=True` cached order string columns are returned
+    as categoricals straight from their dictionary encoding.
+    """
+    file_name = os.path.basename(file_path)
+    cache_entry = os.path.join(cache_dir, f"{file_name}-{file_sha256(file_path)[:16]}")
+    orders_dir, returns_dir = os.path.join(cache_entry, "orders"), os.path.join(cache_entry, "returns")
+
+    if use_cache and columnar_table_exists(orders_dir) and columnar_table_exists(returns_dir):
+        print(f"[INFO] Loading {file_name} from the ingestion cache.")
+        return _load_cached_table(orders_dir, categorical), _load_cached_table(returns_dir)
+
+    print(f"[INFO] Parsing {file_name}; this can take a while.")
+    df_orders = pd.read_excel(file_path, sheet_name="Orders", dtype=ORDER_COLUMN_DTYPES)
+    df_returns = pd.read_excel(file_path, sheet_name="Returns", dtype=RETURN_COLUMN_DTYPES)
+    df_orders = _apply_column_types(df_orders, ORDER_COLUMN_DTYPES, ORDER_DATE_COLUMNS)
+
+    if use_cache:
+        if os.path.isdir(cache_dir):
+            for stale_entry in os.listdir(cache_dir):
+                if stale_entry.rsplit('-', 1)[0] == file_name and stale_entry != os.path.basename(cache_entry):
+                    shutil.rmtree(os.path.join(cache_dir, stale_entry), ignore_errors=True)
+        save_columnar_table(df_orders, orders_dir)
+        save_columnar_table(df_returns, returns_dir)
+        print(f"[INFO] Ingestion cache written to {cache_entry}.")
+    return df_orders, df_returns
+
+
+def load_raw_tables(file_path=RAW_DATA_PATH, returns_path=None, use_cache=True, categorical=False):
+    """
+    Returns raw (orders, returns) DataFrames from a workbook, or from a CSV/Parquet Orders export.
+
+    `returns_path` (CSV/Parquet) overrides the workbook's Returns sheet; for exports without it the
+    returns table is None and every order is treated as not returned. `categorical` loads the order
+    string columns as categoricals (the small returns table always keeps plain strings).
+    """
+    if os.path.splitext(file_path)[1].lower() in _WORKBOOK_EXTENSIONS:
+        df_orders, df_returns = load_workbook_tables(file_path, use_cache=use_cache, categorical=categorical)
+    else:
+        df_orders, df_returns = read_orders_file(file_path, categorical=categorical), None
+    if returns_path is not None:
+        df_returns = read_returns_file(returns_path)
+    return df_orders, df_returns
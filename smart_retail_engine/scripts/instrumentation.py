@@ -0,0 +1,207 @@
+# smart_retail_engine/scripts/instrumentation.py
+"""
+Lightweight timing instrumentation for the API and the training pipeline.
+
+API side: `stage(name)` times a block into the `STAGE_SECONDS` latency histogram (lookup, scale,
+encode, cluster, purchased-item filtering, serialization, ...) and the apps time whole requests per
+endpoint into `REQUEST_SECONDS`; `histogram_metrics_text` renders both for `/metrics`. Histograms are
+per process, like the cache counters (each gunicorn/uvicorn worker exposes its own).
+
+Pipeline side: `RunReport.step(name)` records the wall time and peak resident memory of each training
+step, printed at the end of the run and saved as JSON (RUN_REPORT_FILE) next to the models. The
+per-step peak comes from resetting the kernel's RSS high-water mark (Linux `/proc/self/clear_refs`);
+elsewhere it falls back to the process-wide peak so far.
+
+With RETAIL_INSTRUMENTATION=0 `stage` returns a shared no-op context manager and steps are not
+recorded, so the cost is one global lookup per instrumented block.
+"""
+import bisect
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from scripts.config import INSTRUMENTATION, MODELS_DIR, RUN_REPORT_FILE
+
+# Read on every `stage` call, so tests and embedding code can switch instrumentation at runtime
+ENABLED = INSTRUMENTATION
+# Upper bounds (seconds) of the latency histogram buckets, from 100 us index lookups to multi-second batches
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = contextlib.nullcontext()
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with one series per label value."""
+
+    def __init__(self, name, description, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {} # label value -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        """{label value: (cumulative bucket counts, sum, count)}."""
+        with self._lock:
+            series = {label_value: (list(counts), total, count) for label_value, (counts, total, count) in self._series.items()}
+        snapshot = {}
+        for label_value, (counts, total, count) in series.items():
+            cumulative, running = [], 0
+            for bucket_count in counts:
+                running += bucket_count
+                cumulative.append(running)
+            snapshot[label_value] = (cumulative, total, count)
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "name", "start")
+
+    def __init__(self, histogram, name):
+        self.histogram = histogram
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+STAGE_SECONDS = Histogram("retail_stage_duration_seconds", "Time spent in each stage of serving a request.", "stage")
+REQUEST_SECONDS = Histogram("retail_request_duration_seconds", "Time to handle an API request, per endpoint.", "endpoint")
+
+
+def stage(name, histogram=STAGE_SECONDS):
+    """Context manager timing its block into `histogram` under `name` (a no-op when instrumentation is off)."""
+    if not ENABLED:
+        return _NOOP
+    return _StageTimer(histogram, name)
+
+
+def histogram_metrics_text(*histograms):
+    """Prometheus text exposition of histograms (STAGE_SECONDS and REQUEST_SECONDS by default)."""
+    lines = []
+    for histogram in histograms or (STAGE_SECONDS, REQUEST_SECONDS):
+        lines += [f"# HELP {histogram.name} {histogram.description}", f"# TYPE {histogram.name} histogram"]
+        for label_value, (cumulative, total, count) in sorted(histogram.snapshot().items()):
+            label = f'{histogram.label}="{label_value}"'
+            for bound, bucket_count in zip((*histogram.buckets, "+Inf"), cumulative):
+                lines.append(f'{histogram.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+            lines += [f"{histogram.name}_sum{{{label}}} {total:.6f}", f"{histogram.name}_count{{{label}}} {count}"]
+    return "\n".join(lines) + "\n"
+
+
+# --- Pipeline Run Report ---
+
+def _status_kb(field):
+    """A memory field of /proc/self/status (e.g. VmRSS, VmHWM) in kB, or None where it is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            match = re.search(rf"^{field}:\s+(\d+)\s+kB", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+
+def _reset_peak_rss():
+    """Resets the kernel's RSS high-water mark of this process; False where that is not supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _peak_rss_mb():
+    peak_kb = _status_kb("VmHWM")
+    if peak_kb is None:
+        try:
+            import resource
+        except ImportError: # Windows
+            return None
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin": # bytes there, kB on Linux
+            peak_kb /= 1024
+    return peak_kb / 1024
+
+
+class RunReport:
+    """Wall time and peak memory per step of a pipeline run; see the module docstring."""
+
+    def __init__(self, name="training"):
+        self.name = name
+        self.steps = []
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def step(self, name):
+        """Records the block as step `name` (a no-op when instrumentation is off)."""
+        if not ENABLED:
+            yield
+            return
+        per_step_peak = _reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            peak_mb = _peak_rss_mb()
+            rss_kb = _status_kb("VmRSS")
+            self.steps.append({
+                "step": name,
+                "seconds": round(time.perf_counter() - start, 4),
+                "peak_rss_mb": None if peak_mb is None else round(peak_mb, 1),
+                "peak_rss_scope": "step" if per_step_peak else "process",
+                "rss_after_mb": None if rss_kb is None else round(rss_kb / 1024, 1),
+            })
+
+    def to_dict(self):
+        peaks = [step["peak_rss_mb"] for step in self.steps if step["peak_rss_mb"] is not None]
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "argv": sys.argv[1:],
+            "total_seconds": round(time.perf_counter() - self._start, 4),
+            "peak_rss_mb": max(peaks) if peaks else None,
+            "steps": self.steps,
+        }
+
+    def print_summary(self):
+        print(f"[INFO] {self.name} run steps:")
+        for step in self.steps:
+            peak = "n/a" if step["peak_rss_mb"] is None else f"{step['peak_rss_mb']:.0f} MB"
+            print(f"  {step['step']:<32} {step['seconds']:>9.2f} s   peak RSS {peak}")
+
+    def save(self, models_dir=MODELS_DIR):
+        """Writes the report as JSON next to the models; returns its path (None when nothing was recorded)."""
+        if not self.steps:
+            return None
+        os.makedirs(models_dir, exist_ok=True)
+        path = os.path.join(models_dir, RUN_REPORT_FILE)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
@@ -0,0 +1,138 @@
+# smart_retail_engine/scripts/interactions.py
+"""
+Sparse customer x product interaction matrix built from the clustered orders table.
+
+`InteractionMatrix` stores purchase counts in CSR layout (`indptr`, `indices`, `data`) with customers
+and products integer-coded, so "what did this customer buy" is an array slice and excluding purchased
+items from a recommendation pool is a vectorized mask operation over product codes. The arrays are
+plain NumPy; `to_scipy` builds a `scipy.sparse.csr_matrix` view for item-based scoring when needed.
+"""
+import numpy as np
+import pandas as pd
+
+
+class InteractionMatrix:
+    """
+    Customer x product purchase counts in CSR layout.
+
+    Row `i` belongs to `customer_ids[i]` and column `j` to `product_names[j]`. Within a row, products
+    are kept in order of first purchase, so `purchased_products` matches `Series.unique()` on the
+    customer's orders.
+    """
+
+    def __init__(self, indptr, indices, data, customer_ids, product_names):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.customer_index = pd.Index(customer_ids, dtype=object)
+        self.product_index = pd.Index(product_names, dtype=object)
+
+    @property
+    def shape(self):
+        return len(self.customer_index), len(self.product_index)
+
+    @classmethod
+    def from_orders(cls, df_orders):
+        """Builds the matrix from order rows with 'Customer ID' and 'Product Name' columns."""
+        customer_codes, customer_ids = pd.factorize(df_orders['Customer ID'])
+        product_codes, product_names = pd.factorize(df_orders['Product Name'])
+        valid_rows = (customer_codes >= 0) & (product_codes >= 0)
+        n_customers, n_products = len(customer_ids), len(product_names)
+
+        # (customer, product) pairs numbered in order of first appearance, with their row counts
+        pair_codes, pair_keys = pd.factorize(customer_codes[valid_rows].astype(np.int64) * n_products + product_codes[valid_rows])
+        counts = np.bincount(pair_codes, minlength=len(pair_keys))
+        pair_customers, pair_products = np.divmod(pair_keys, max(n_products, 1))
+        order = np.argsort(pair_customers, kind='stable') # group rows, keep first-purchase order
+
+        indptr = np.zeros(n_customers + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_customers, minlength=n_customers), out=indptr[1:])
+        return cls(
+            indptr, pair_products[order].astype(np.int32), counts[order].astype(np.int32),
+            np.asarray(customer_ids, dtype=object), np.asarray(product_names, dtype=object),
+        )
+
+    def customer_positions(self, customer_ids):
+        """Row positions of `customer_ids` (-1 for customers without purchases)."""
+        return self.customer_index.get_indexer(customer_ids)
+
+    def customer_position(self, customer_id):
+        """Row position of a single customer (-1 if they have no purchases); cheaper than `customer_positions` for one ID."""
+        try:
+            return self.customer_index.get_loc(customer_id)
+        except KeyError:
+            return -1
+
+    def product_codes(self, product_names):
+        """Column codes of `product_names` (-1 for products never purchased)."""
+        return self.product_index.get_indexer(product_names)
+
+    def row(self, position):
+        """Product codes bought by the customer at `position`, in order of first purchase."""
+        if position < 0:
+            return self.indices[:0]
+        return self.indices[self.indptr[position]:self.indptr[position + 1]]
+
+    def purchased_products(self, customer_id):
+        """Names of the products bought by `customer_id`, in order of first purchase."""
+        return self.product_index.take(self.row(self.customer_position(customer_id))).tolist()
+
+    def gather_rows(self, positions):
+        """
+        The purchases of the customers at `positions` as flat (batch row, product code) arrays, where
+        batch row `i` refers to `positions[i]`. Unknown customers (-1) contribute no purchases.
+        """
+        positions = np.asarray(positions)
+        known = positions >= 0
+        starts = np.where(known, self.indptr[np.maximum(positions, 0)], 0)
+        lengths = np.where(known, self.indptr[np.maximum(positions, 0) + 1] - starts, 0)
+        batch_rows = np.repeat(np.arange(len(positions)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return batch_rows, self.indices[np.repeat(starts, lengths) + offsets]
+
+    def contains(self, positions, product_codes):
+        """
+        Boolean mask of shape `product_codes.shape`: True where customer `positions[i]` bought
+        product `product_codes[i, j]`.
+
+        Rows of unknown customers (-1) and codes outside the product vocabulary (e.g. -1 padding) are
+        always False.
+        """
+        product_codes = np.asarray(product_codes)
+        batch_rows, purchased_codes = self.gather_rows(positions)
+        # Test (batch row, product) keys of the pools against those of the purchases
+        n_products = max(len(self.product_index), 1)
+        purchased_keys = batch_rows * n_products + purchased_codes
+        pool_keys = np.arange(len(product_codes))[:, None] * n_products + product_codes
+        # Out-of-vocabulary codes can alias a neighbouring row's key, so they are masked explicitly
+        return np.isin(pool_keys, purchased_keys) & (product_codes >= 0) & (product_codes < len(self.product_index))
+
+    def to_scipy(self, binary=False):
+        """
+        The counts as a `scipy.sparse.csr_matrix` (SciPy is imported on first use). With `binary=True`
+        every purchased (customer, product) pair is 1.0 regardless of how often it was bought.
+        """
+        from scipy.sparse import csr_matrix
+
+        data = np.ones(len(self.indices), dtype=np.float32) if binary else self.data
+        return csr_matrix((data, self.indices, self.indptr), shape=self.shape)
+
+    def save(self, path):
+        """Persists the matrix and its ID vocabularies to a `.npz` file."""
+        np.savez(
+            path,
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data,
+            customer_ids=self.customer_index.to_numpy(dtype=str),
+            product_names=self.product_index.to_numpy(dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads a matrix written by `save`."""
+        with np.load(path) as arrays:
+            return cls(
+                arrays['indptr'], arrays['indices'], arrays['data'],
+                arrays['customer_ids'].astype(object), arrays['product_names'].astype(object),
+            )
@@ -0,0 +1,99 @@
+# smart_retail_engine/scripts/item_similarity.py
+"""
+Item-item co-purchase model: the top-k most similar products of every product.
+
+Similarity is the cosine between two products' customer columns of the binarized customer x product
+matrix, i.e. co-purchasing customers / sqrt(buyers of i * buyers of j). It is computed once at pipeline
+time (SciPy sparse product) and only the `n_neighbours` best neighbours per product are kept, as two
+padded (n_products, k) arrays. A customer's candidate scores are the sparse product of their binary
+purchase history with that neighbour table, so serving needs only NumPy.
+"""
+import numpy as np
+import pandas as pd
+
+
+class ItemSimilarity:
+    """
+    Top-k neighbour table over the product vocabulary of an `InteractionMatrix`.
+
+    Row `j` of `neighbours` holds product codes ordered by decreasing similarity to product `j`
+    (ties broken by product code) and is padded with -1; `scores` holds the matching similarities.
+    """
+
+    def __init__(self, neighbours, scores, product_names):
+        self.neighbours = neighbours
+        self.scores = scores
+        self.product_index = pd.Index(product_names, dtype=object)
+
+    @property
+    def n_neighbours(self):
+        return self.neighbours.shape[1]
+
+    @classmethod
+    def from_interactions(cls, interactions, n_neighbours=20):
+        """Computes the cosine neighbour table from an `InteractionMatrix`."""
+        n_products = interactions.shape[1]
+        bought = interactions.to_scipy(binary=True)
+        co_purchases = (bought.T @ bought).tocoo()
+        buyers = np.bincount(interactions.indices, minlength=n_products).astype(np.float64)
+
+        rows, cols = co_purchases.row, co_purchases.col
+        off_diagonal = rows != cols
+        rows, cols = rows[off_diagonal], cols[off_diagonal]
+        similarity = co_purchases.data[off_diagonal] / np.sqrt(buyers[rows] * buyers[cols])
+
+        # Rank each product's neighbours and keep the first n_neighbours of every row
+        order = np.lexsort((cols, -similarity, rows))
+        rows, cols, similarity = rows[order], cols[order], similarity[order]
+        row_counts = np.bincount(rows, minlength=n_products)
+        ranks = np.arange(len(rows)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        kept = ranks < n_neighbours
+
+        neighbours = np.full((n_products, n_neighbours), -1, dtype=np.int32)
+        scores = np.zeros((n_products, n_neighbours), dtype=np.float32)
+        neighbours[rows[kept], ranks[kept]] = cols[kept]
+        scores[rows[kept], ranks[kept]] = similarity[kept]
+        return cls(neighbours, scores, interactions.product_index.to_numpy())
+
+    def matches(self, interactions):
+        """True if the table was built over the same product vocabulary as `interactions`."""
+        return self.product_index.equals(interactions.product_index)
+
+    def recommend(self, interactions, positions, top_n=5):
+        """
+        Top `top_n` product names for each customer at `positions` (one list per customer).
+
+        A product's score is the summed similarity to every product the customer bought; purchased
+        products are excluded and ties are broken by product code. Customers without purchases
+        (position -1) get an empty list.
+        """
+        n_products = max(len(self.product_index), 1)
+        batch_rows, history = interactions.gather_rows(positions)
+        candidates = self.neighbours[history]
+        valid = candidates >= 0
+        candidate_rows = np.broadcast_to(batch_rows[:, None], candidates.shape)[valid]
+
+        # Sum the similarities per (batch row, candidate) key
+        keys, inverse = np.unique(candidate_rows.astype(np.int64) * n_products + candidates[valid], return_inverse=True)
+        totals = np.bincount(inverse.ravel(), weights=self.scores[history][valid], minlength=len(keys))
+        keep = ~np.isin(keys, batch_rows.astype(np.int64) * n_products + history) & (totals > 0)
+        rows, codes = np.divmod(keys[keep], n_products)
+        totals = totals[keep]
+
+        order = np.lexsort((codes, -totals, rows))
+        rows, codes = rows[order], codes[order]
+        row_counts = np.bincount(rows, minlength=len(positions))
+        ranks = np.arange(len(rows)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        top_names = self.product_index.to_numpy()[codes[ranks < top_n]].tolist()
+        bounds = np.concatenate([[0], np.cumsum(np.minimum(row_counts, top_n))])
+        return [top_names[bounds[i]:bounds[i + 1]] for i in range(len(positions))]
+
+    def save(self, path):
+        """Persists the neighbour table and its product vocabulary to a `.npz` file."""
+        np.savez(path, neighbours=self.neighbours, scores=self.scores, product_names=self.product_index.to_numpy(dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Loads a table written by `save`."""
+        with np.load(path) as arrays:
+            return cls(arrays['neighbours'], arrays['scores'], arrays['product_names'].astype(object))
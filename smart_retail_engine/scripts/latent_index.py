@@ -0,0 +1,151 @@
+# smart_retail_engine/scripts/latent_index.py
+"""
+Nearest-neighbour index over the customers' autoencoder latent vectors ("similar customers").
+
+The latent space is low-dimensional (2-D for the current encoder), so a grid is enough: each axis is
+cut at quantiles of the data, points are bucketed into the resulting cells (a few customers each on
+average) and stored sorted by cell, with CSR-style cell offsets. A k-NN query scans rings of cells
+around the query's cell and stops as soon as the k-th best distance is no larger than the distance
+from the query to the border of the scanned block, so results are exact while only a handful of cells
+are touched. The index is plain NumPy and is saved as a `.npz` next to the K-Means model.
+"""
+import numpy as np
+import pandas as pd
+
+LATENT_INDEX_FILE = "latent_neighbour_index.npz"
+
+
+class LatentNeighbourIndex:
+    """
+    Exact k-nearest-neighbour search over latent vectors with a quantile grid.
+
+    Axis `a` has `grid_shape[a]` cells; cell `i` along it spans `[edges[a, i], edges[a, i + 1])`, with
+    a -inf first edge and +inf from edge `grid_shape[a]` on (rows of `edges` are padded with +inf).
+    `points` and `customer_ids` are stored in cell order; cell `c` (row-major over the grid) holds the
+    points `cell_starts[c]:cell_starts[c + 1]`.
+    """
+
+    def __init__(self, points, customer_ids, edges, grid_shape, cell_starts):
+        self.points = points
+        self.customer_index = pd.Index(customer_ids, dtype=object)
+        self.edges = edges
+        self.grid_shape = grid_shape
+        self.cell_starts = cell_starts
+
+    def __len__(self):
+        return len(self.points)
+
+    @classmethod
+    def from_points(cls, points, customer_ids, points_per_cell=8):
+        """Buckets `points` (one latent vector per customer) into a grid of about `points_per_cell` per cell."""
+        points = np.asarray(points, dtype=np.float64).reshape(len(customer_ids), -1)
+        n_points, n_dims = points.shape
+        cells_per_axis = max(1, int(np.ceil((n_points / points_per_cell) ** (1 / n_dims))))
+        inner_quantiles = np.arange(1, cells_per_axis) / cells_per_axis
+        # Repeated quantiles (many identical coordinates) would make empty zero-width cells; drop them
+        inner_edges = [np.unique(np.quantile(points[:, axis], inner_quantiles)) if n_points else np.empty(0) for axis in range(n_dims)]
+        grid_shape = np.array([len(axis_edges) + 1 for axis_edges in inner_edges], dtype=np.int64)
+        edges = np.full((n_dims, grid_shape.max() + 1), np.inf)
+        edges[:, 0] = -np.inf
+        for axis, axis_edges in enumerate(inner_edges):
+            edges[axis, 1:len(axis_edges) + 1] = axis_edges
+
+        n_cells = int(grid_shape.prod())
+        cell_ids = np.ravel_multi_index(_cell_coords(points, edges, grid_shape).T, grid_shape)
+        order = np.argsort(cell_ids, kind='stable')
+        cell_starts = np.zeros(n_cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell_ids, minlength=n_cells), out=cell_starts[1:])
+        return cls(points[order], np.asarray(customer_ids, dtype=object)[order], edges, grid_shape, cell_starts)
+
+    def position(self, customer_id):
+        """Position of `customer_id` in the index, or -1 if it is not indexed."""
+        try:
+            return self.customer_index.get_loc(customer_id)
+        except KeyError:
+            return -1
+
+    def query(self, vector, k=10, exclude=-1):
+        """
+        (positions, distances) of the `k` points closest to `vector`, nearest first (ties by position).
+        The point at position `exclude` (e.g. the query customer itself) is skipped.
+        """
+        vector = np.asarray(vector, dtype=np.float64).ravel()
+        if k <= 0 or len(self.points) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        home = _cell_coords(vector[None, :], self.edges, self.grid_shape)[0]
+        axes = np.arange(len(self.grid_shape))
+        max_radius = int(self.grid_shape.max())
+
+        best_positions = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0)
+        # The first step scans the query's cell and its direct neighbours together
+        for radius in range(1, max(max_radius, 1) + 1):
+            candidates = self._ring_positions(home, radius, include_inner=radius == 1)
+            candidates = candidates[candidates != exclude]
+            distances = np.sqrt(((self.points[candidates] - vector) ** 2).sum(axis=1))
+            best_positions = np.concatenate([best_positions, candidates])
+            best_distances = np.concatenate([best_distances, distances])
+            order = np.lexsort((best_positions, best_distances))[:k]
+            best_positions, best_distances = best_positions[order], best_distances[order]
+            # Points outside the scanned block of cells are at least as far as the block's nearest face
+            low_faces = self.edges[axes, np.maximum(home - radius, 0)]
+            high_faces = self.edges[axes, np.minimum(home + radius + 1, self.grid_shape)]
+            unseen_bound = min((vector - low_faces).min(), (high_faces - vector).min())
+            if len(best_positions) >= k and best_distances[-1] <= unseen_bound:
+                break
+        return best_positions, best_distances
+
+    def similar_customers(self, customer_id, k=10):
+        """
+        The `k` customers closest to `customer_id` in latent space as (customer ID, distance) pairs,
+        or None if the customer is not indexed.
+        """
+        position = self.position(customer_id)
+        if position < 0:
+            return None
+        positions, distances = self.query(self.points[position], k, exclude=position)
+        return list(zip(self.customer_index.take(positions).tolist(), distances.tolist()))
+
+    def _ring_positions(self, home, radius, include_inner=False):
+        """
+        Positions of the points in grid cells at Chebyshev distance `radius` from cell `home` (at most
+        `radius` with `include_inner`).
+        """
+        n_dims = len(self.grid_shape)
+        offsets = np.indices((2 * radius + 1,) * n_dims).reshape(n_dims, -1).T - radius
+        if not include_inner:
+            offsets = offsets[np.abs(offsets).max(axis=1) == radius]
+        cells = home + offsets
+        cells = cells[((cells >= 0) & (cells < self.grid_shape)).all(axis=1)]
+        cell_ids = np.ravel_multi_index(cells.T, self.grid_shape)
+        starts, ends = self.cell_starts[cell_ids], self.cell_starts[cell_ids + 1]
+        lengths = ends - starts
+        offsets_in_cell = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(starts, lengths) + offsets_in_cell
+
+    def save(self, path):
+        """Persists the grid and the customer IDs to a `.npz` file."""
+        np.savez(
+            path, points=self.points, customer_ids=self.customer_index.to_numpy(dtype=str), edges=self.edges,
+            grid_shape=self.grid_shape, cell_starts=self.cell_starts,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index written by `save`."""
+        with np.load(path) as arrays:
+            return cls(arrays['points'], arrays['customer_ids'].astype(object), arrays['edges'], arrays['grid_shape'], arrays['cell_starts'])
+
+
+def _cell_coords(points, edges, grid_shape):
+    """Integer grid coordinates of `points` (one row per point)."""
+    return np.stack([
+        np.searchsorted(edges[axis, 1:grid_shape[axis]], points[:, axis], side='right') for axis in range(len(grid_shape))
+    ], axis=1)
+
+
+def build_latent_index(rfm_df, scaler, encoder, rfm_features, points_per_cell=8):
+    """Encodes every customer of `rfm_df` with the fitted scaler/encoder and indexes the latent vectors."""
+    X_scaled = scaler.transform(rfm_df[rfm_features].to_numpy(dtype=np.float64))
+    latent = encoder.predict(X_scaled, batch_size=4096, verbose=0)
+    return LatentNeighbourIndex.from_points(latent, rfm_df['Customer ID'].tolist(), points_per_cell)
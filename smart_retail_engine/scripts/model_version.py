@@ -0,0 +1,38 @@
+# smart_retail_engine/scripts/model_version.py
+"""
+Version stamp of the saved serving artifacts.
+
+Every write of new models or recommendation artifacts stores a fresh version string in
+`models/model_version`. Serving processes read it together with the artifacts and use it in their
+response-cache keys, so answers computed from older artifacts are never served for newer ones.
+"""
+import os
+import time
+import uuid
+
+from scripts.config import MODELS_DIR
+
+MODEL_VERSION_FILE = "model_version"
+# Version reported for artifacts written before the stamp existed
+UNVERSIONED = "unversioned"
+
+
+def write_model_version(models_dir=MODELS_DIR):
+    """Stamps the artifacts in `models_dir` with a new version (UTC time plus a random suffix) and returns it."""
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(models_dir, exist_ok=True)
+    path = os.path.join(models_dir, MODEL_VERSION_FILE)
+    # Write then rename, so readers never see a partially written stamp
+    with open(path + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(path + ".tmp", path)
+    return version
+
+
+def read_model_version(models_dir=MODELS_DIR):
+    """The current artifact version, or `UNVERSIONED` if no stamp has been written yet."""
+    try:
+        with open(os.path.join(models_dir, MODEL_VERSION_FILE)) as f:
+            return f.read().strip() or UNVERSIONED
+    except FileNotFoundError:
+        return UNVERSIONED
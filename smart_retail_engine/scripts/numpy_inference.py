@@ -0,0 +1,110 @@
+# smart_retail_engine/scripts/numpy_inference.py
+"""
+NumPy-only inference path for the RFM scaler, autoencoder encoder and latent K-Means.
+
+`export_numpy_artifact` extracts the StandardScaler statistics, the encoder's Dense weights and the
+K-Means centroids into one small `.npz` file (an encoder that is already a `NumpyEncoder`, such as the
+PCA projection, is exported as is). `load_numpy_models` reads it back into three light
+objects exposing the same `transform` / `predict` methods as the sklearn and Keras models, so the
+serving code can use them interchangeably without importing TensorFlow or scikit-learn.
+"""
+import numpy as np
+
+NUMPY_ARTIFACT_FILE = "encoder_kmeans_numpy.npz"
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+}
+
+
+# --- Exporter ---
+
+def extract_dense_layers(encoder):
+    """Returns the encoder's Dense layers as a list of (weights, bias, activation name) tuples."""
+    if isinstance(encoder, NumpyEncoder):
+        return encoder.dense_layers
+    dense_layers = []
+    for layer in encoder.layers:
+        weights = layer.get_weights()
+        if not weights:
+            continue # Input layers carry no weights
+        config = layer.get_config()
+        if len(weights) != 2 or "activation" not in config:
+            raise ValueError(f"Layer '{layer.name}' is not a Dense layer with bias; cannot export to NumPy.")
+        activation = config["activation"]
+        if activation not in _ACTIVATIONS:
+            raise ValueError(f"Activation '{activation}' of layer '{layer.name}' is not supported by the NumPy path.")
+        dense_layers.append((weights[0], weights[1], activation))
+    return dense_layers
+
+
+def export_numpy_artifact(scaler, encoder, kmeans_latent, path):
+    """Saves scaler statistics, encoder Dense weights and K-Means centroids into a `.npz` file."""
+    dense_layers = extract_dense_layers(encoder)
+    n_features = len(scaler.scale_) if scaler.scale_ is not None else len(scaler.mean_)
+    arrays = {
+        "scaler_mean": scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features),
+        "scaler_scale": scaler.scale_ if scaler.scale_ is not None else np.ones(n_features),
+        "activations": np.array([activation for _, _, activation in dense_layers]),
+        "centroids": kmeans_latent.cluster_centers_,
+    }
+    for i, (weights, bias, _) in enumerate(dense_layers):
+        arrays[f"kernel_{i}"] = weights
+        arrays[f"bias_{i}"] = bias
+    np.savez(path, **arrays)
+
+
+# --- NumPy Models ---
+
+class NumpyScaler:
+    """Drop-in replacement for a fitted `StandardScaler.transform`."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class NumpyEncoder:
+    """Drop-in replacement for the Keras encoder's `predict`, computed in the weights' float32 precision."""
+
+    def __init__(self, dense_layers):
+        self.dense_layers = dense_layers
+
+    def predict(self, X, verbose=0, batch_size=None):
+        output = np.asarray(X, dtype=self.dense_layers[0][0].dtype)
+        for weights, bias, activation in self.dense_layers:
+            output = _ACTIVATIONS[activation](output @ weights + bias)
+        return output
+
+
+class NumpyKMeans:
+    """Drop-in replacement for `KMeans.predict`: assigns each row to its nearest centroid."""
+
+    def __init__(self, cluster_centers):
+        self.cluster_centers_ = cluster_centers
+        self.n_clusters = len(cluster_centers)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        centers = self.cluster_centers_.astype(np.float64)
+        # ||x - c||^2 up to the per-row constant ||x||^2, which does not change the argmin
+        distances = (centers ** 2).sum(axis=1) - 2 * X @ centers.T
+        return distances.argmin(axis=1)
+
+
+def load_numpy_models(path):
+    """Loads a `.npz` artifact written by `export_numpy_artifact` as (scaler, encoder, kmeans_latent)."""
+    with np.load(path) as artifact:
+        activations = artifact["activations"].tolist()
+        dense_layers = [
+            (artifact[f"kernel_{i}"], artifact[f"bias_{i}"], activation) for i, activation in enumerate(activations)
+        ]
+        scaler = NumpyScaler(artifact["scaler_mean"], artifact["scaler_scale"])
+        kmeans_latent = NumpyKMeans(artifact["centroids"])
+    return scaler, NumpyEncoder(dense_layers), kmeans_latent
@@ -1,267 +1,309 @@
 # smart_retail_engine/scripts/pipeline.py
+"""
+Entry point of the Smart Retail Engine pipeline.
+
+Running this file trains and saves all models; flags run individual offline jobs instead. The
+training functions live in `scripts.training` and the serving functions in `scripts.serving`; both
+are re-exported here so existing `from scripts.pipeline import ...` imports keep working.
+"""
 import pandas as pd
-import numpy as np
 import os
-import joblib
-import tensorflow as tf
-from tensorflow.keras.models import load_model, Model
-from tensorflow.keras.layers import Input, Dense
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from datetime import datetime
-
-# --- Path Configurations (relative to the project root) ---
-_current_script_dir = os.path.dirname(os.path.abspath(__file__))
-PROCESSED_DATA_DIR = os.path.join(_current_script_dir, '..', 'data', 'processed')
-MODELS_DIR = os.path.join(_current_script_dir, '..', 'models')
-RAW_DATA_PATH = os.path.join(_current_script_dir, '..', 'data', 'raw', 'global-superstore.xlsx')
-
-
-# --- Main Pipeline Functions ---
-
-def load_and_preprocess_data(file_path=RAW_DATA_PATH):
-    """Loads raw data and performs initial preprocessing."""
-    df_orders = pd.read_excel(file_path, sheet_name="Orders")
-    df_returns = pd.read_excel(file_path, sheet_name="Returns")
-
-    if 'Postal Code' in df_orders.columns:
-        df_orders = df_orders.drop(columns=['Postal Code'])
-
-    df_orders = df_orders.merge(df_returns[["Order ID", "Returned"]], on="Order ID", how="left")
-    df_orders["Returned"] = df_orders["Returned"].fillna("No").astype("category")
-
-    df_orders["Shipping Duration"] = (df_orders["Ship Date"] - df_orders["Order Date"]).dt.days
-    df_orders["Order Year"] = df_orders["Order Date"].dt.year
-    df_orders["Order Month"] = df_orders["Order Date"].dt.month
-    df_orders['Discount Rate'] = df_orders['Discount'] / (1 - df_orders['Discount'])
-    df_orders['Sales Category'] = pd.cut(df_orders['Sales'], bins=[0, 100, 500, 1000, 100000], labels=['Low', 'Medium', 'High', 'Very High'])
-
-    df_orders_ca = df_orders.copy()
-    positive_profit_mask = df_orders_ca['Profit'] > 0
-    df_orders_ca['Profit_log'] = df_orders_ca['Profit'].copy()
-    df_orders_ca.loc[positive_profit_mask, 'Profit_log'] = np.log1p(df_orders_ca.loc[positive_profit_mask, 'Profit'])
-    epsilon = np.finfo(float).eps
-    df_orders_ca['Sales_log'] = np.log1p(df_orders_ca['Sales'].replace(0, epsilon))
-    df_orders_ca['Quantity_log'] = np.log1p(df_orders_ca['Quantity'].replace(0, epsilon))
-
-    return df_orders_ca
-
-
-def calculate_rfm(df_orders_ca):
-    """Calculates Recency, Frequency, Monetary metrics."""
-    df_orders_ca['Order Date'] = pd.to_datetime(df_orders_ca['Order Date'])
-    analysis_date = df_orders_ca['Order Date'].max() + pd.Timedelta(days=1)
-
-    recency_df = df_orders_ca.groupby('Customer ID')['Order Date'].max().reset_index()
-    recency_df['Recency'] = (analysis_date - recency_df['Order Date']).dt.days
-    recency_df = recency_df[['Customer ID', 'Recency']]
-
-    frequency_df = df_orders_ca.groupby('Customer ID')['Order ID'].nunique().reset_index()
-    frequency_df.columns = ['Customer ID', 'Frequency']
-
-    monetary_df = df_orders_ca.groupby('Customer ID')['Sales'].sum().reset_index()
-    monetary_df.columns = ['Customer ID', 'Monetary']
-
-    rfm_df = recency_df.merge(frequency_df, on='Customer ID')
-    rfm_df = rfm_df.merge(monetary_df, on='Customer ID')
+import sys
+import json
+import argparse
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from scripts.config import (
+    PROCESSED_DATA_DIR, MODELS_DIR, RAW_DATA_PATH, COLUMNAR_DATA_DIR, DRIFT_THRESHOLD, ITEM_NEIGHBOURS, EMBEDDING_BACKEND,
+    CLUSTERING_ALGORITHM
+)
+from scripts.numpy_inference import NUMPY_ARTIFACT_FILE, export_numpy_artifact
+from scripts.columnar_store import save_columnar_table
+from scripts.training import (
+    load_and_preprocess_data, dtype_memory_report, attach_clusters, calculate_rfm, compute_rfm_score_bins, score_rfm,
+    EMBEDDING_BACKENDS, CLUSTERING_ALGORITHMS, score_rfm_and_cluster, save_models_and_data, save_training_report
+)
+from scripts.rfm_streaming import RFMAccumulator, calculate_rfm_streaming
+from scripts.sweep import SWEEP_RESULTS_FILE, sweep_clusters
+from scripts.ingestion import load_workbook_tables
+from scripts.incremental import save_incremental_state, read_new_orders, refresh_from_new_orders
+from scripts.serving import (
+    TOP_ITEM_WEIGHTS, compute_top_items, refresh_top_items, load_keras_models, load_models_and_data,
+    get_recommendations_for_customer, build_recommendation_index, save_recommendation_index, load_recommendation_index,
+    get_recommendations_from_index, get_recommendations_for_customers, load_interaction_matrix, RECOMMENDATION_SOURCES,
+    load_item_similarity, refresh_interaction_artifacts
+)
+from scripts.interactions import InteractionMatrix
+from scripts.item_similarity import ItemSimilarity
+from scripts.latent_index import LATENT_INDEX_FILE, build_latent_index
+from scripts.releases import set_current_release, list_releases, publish_release
+from scripts.instrumentation import RunReport
+
+
+# --- Offline Jobs ---
+
+def export_numpy_models():
+    """Exports the saved Keras/scikit-learn models to the NumPy inference artifact."""
+    scaler, encoder, kmeans_latent = load_keras_models()
+    artifact_path = os.path.join(MODELS_DIR, NUMPY_ARTIFACT_FILE)
+    export_numpy_artifact(scaler, encoder, kmeans_latent, artifact_path)
+    print(f"[INFO] NumPy inference artifact saved to {artifact_path}.")
+
+def convert_processed_tables_to_columnar():
+    """Writes memory-mappable columnar copies of the processed CSV tables saved by an earlier run."""
+    for table_name in ["rfm_df", "df_orders_ca_with_clusters"]:
+        csv_path = os.path.join(PROCESSED_DATA_DIR, f"{table_name}.csv")
+        if not os.path.exists(csv_path):
+            print(f"[WARN] {csv_path} not found; skipping.")
+            continue
+        save_columnar_table(pd.read_csv(csv_path), os.path.join(COLUMNAR_DATA_DIR, table_name))
+        print(f"[INFO] Columnar copy of {table_name} saved.")
+
+
+def stream_rfm(order_files, output_path, chunksize=500000):
+    """Computes and scores RFM from order files chunk by chunk, without loading the full history."""
+    rfm_df, _ = calculate_rfm_streaming(order_files, chunksize=chunksize)
+    rfm_df = score_rfm(rfm_df)
+    rfm_df.to_csv(output_path, index=False)
+    print(f"[INFO] Streamed RFM for {len(rfm_df)} customers saved to {output_path}.")
     return rfm_df
 
-def score_rfm_and_cluster(rfm_df, n_clusters_optimal=3):
-    """Scores RFM and performs Autoencoder clustering."""
-    segment_count = 5
-    rfm_df['R_Score'] = pd.qcut(rfm_df['Recency'], q=segment_count, labels=range(segment_count, 0, -1), duplicates='drop').astype(int)
-    rfm_df['F_Score'] = pd.qcut(rfm_df['Frequency'], q=segment_count, labels=range(1, segment_count + 1), duplicates='drop').astype(int)
-    rfm_df['M_Score'] = pd.qcut(rfm_df['Monetary'], q=segment_count, labels=range(1, segment_count + 1), duplicates='drop').astype(int)
-    
-    # Map RFM Score to a more descriptive segment name
-    def rfm_segment_label(row):
-        # Example RFM segmentation logic (you can customize this)
-        if row['R_Score'] >= 4 and row['F_Score'] >= 4 and row['M_Score'] >= 4:
-            return 'Champions'
-        elif row['R_Score'] >= 4 and row['F_Score'] >= 3:
-            return 'Loyal Customers'
-        elif row['R_Score'] >= 3 and row['M_Score'] >= 3:
-            return 'Potential Loyalists'
-        elif row['R_Score'] <= 2 and row['M_Score'] >= 3:
-            return 'Big Spenders'
-        elif row['R_Score'] <= 2 and row['F_Score'] <= 2:
-            return 'At Risk'
-        elif row['R_Score'] >= 3 and row['F_Score'] <= 2:
-            return 'Needs Attention'
-        else:
-            return 'Other' # For any unhandled combinations
-
-    rfm_df['RFM_Segment_Label'] = rfm_df.apply(rfm_segment_label, axis=1)
-    
-    rfm_df['RFM_Segment'] = rfm_df['R_Score'].astype(str) + rfm_df['F_Score'].astype(str) + rfm_df['M_Score'].astype(str)
-    rfm_df['RFM_Score'] = rfm_df[['R_Score', 'F_Score', 'M_Score']].sum(axis=1)
-
-    rfm_features = ['Recency', 'Frequency', 'Monetary']
-    X = rfm_df[rfm_features]
-
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    input_dim = X_scaled.shape[1]
-    latent_dim = 2
-    
-    input_layer = Input(shape=(input_dim,))
-    encoder_layer = Dense(8, activation='relu')(input_layer)
-    encoder_layer = Dense(4, activation='relu')(encoder_layer)
-    latent_space = Dense(latent_dim, activation='relu', name='latent_space')(encoder_layer)
-    decoder_layer = Dense(4, activation='relu')(latent_space)
-    decoder_layer = Dense(8, activation='relu')(decoder_layer)
-    output_layer = Dense(input_dim, activation='linear')(decoder_layer)
-    autoencoder = Model(inputs=input_layer, outputs=output_layer)
-    autoencoder.compile(optimizer='adam', loss='mse')
-    autoencoder.fit(X_scaled, X_scaled, epochs=50, batch_size=32, shuffle=True, verbose=0)
-    encoder = Model(inputs=input_layer, outputs=latent_space)
-
-    X_latent = encoder.predict(X_scaled)
-
-    kmeans_latent = KMeans(n_clusters=n_clusters_optimal, random_state=42, n_init=10)
-    rfm_df['Cluster_AE'] = kmeans_latent.fit_predict(X_latent)
-
-    return rfm_df, scaler, encoder, kmeans_latent, rfm_features
 
+def report_preprocessing_memory(file_path=RAW_DATA_PATH, returns_path=None):
+    """Prints bytes per column of the preprocessed orders with default and with compact dtypes."""
+    reference_df = load_and_preprocess_data(file_path, returns_path)
+    compact_df = load_and_preprocess_data(file_path, returns_path, compact=True)
+    report = dtype_memory_report(reference_df, compact_df)
+    print(report.to_string())
+    return report
 
-def save_models_and_data(rfm_df, df_orders_ca_with_clusters, scaler, encoder, kmeans_latent):
-    """Saves processed data and trained models."""
-    os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
-    os.makedirs(MODELS_DIR, exist_ok=True)
-
-    rfm_df.to_csv(os.path.join(PROCESSED_DATA_DIR, "rfm_df.csv"), index=False)
-    df_orders_ca_with_clusters.to_csv(os.path.join(PROCESSED_DATA_DIR, "df_orders_ca_with_clusters.csv"), index=False)
-    
-    joblib.dump(scaler, os.path.join(MODELS_DIR, "rfm_scaler.joblib"))
-    joblib.dump(kmeans_latent, os.path.join(MODELS_DIR, "kmeans_latent_model.joblib"))
-    encoder.save(os.path.join(MODELS_DIR, "autoencoder_encoder_model.h5"))
-    print("[INFO] Models and processed data saved.")
-
-
-def load_models_and_data():
-    """Loads saved models and pre-calculated data for real-time inference."""
-    # Added compile=False for safety when loading H5 models in newer TF versions
-    scaler = joblib.load(os.path.join(MODELS_DIR, "rfm_scaler.joblib"))
-    encoder = load_model(os.path.join(MODELS_DIR, "autoencoder_encoder_model.h5"), compile=False) 
-    kmeans_latent = joblib.load(os.path.join(MODELS_DIR, "kmeans_latent_model.joblib"))
-    
-    rfm_df_global = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, "rfm_df.csv"))
-    df_orders_clustered_global = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, "df_orders_ca_with_clusters.csv"))
-
-    cluster_top_items_dict = {}
-    for cluster_id in sorted(df_orders_clustered_global['Cluster_AE'].unique()):
-        cluster_data = df_orders_clustered_global[df_orders_clustered_global['Cluster_AE'] == cluster_id]
-        # Get top 20 items from each cluster to give more options after filtering
-        top_items = cluster_data['Product Name'].value_counts().index.tolist()[:20] 
-        cluster_top_items_dict[cluster_id] = top_items
-    
-    # Get top 15 overall popular products
-    overall_top_products_global = df_orders_clustered_global['Product Name'].value_counts().head(15).index.tolist()
-
-    rfm_features = ['Recency', 'Frequency', 'Monetary']
-
-    return scaler, encoder, kmeans_latent, rfm_df_global, df_orders_clustered_global, cluster_top_items_dict, overall_top_products_global, rfm_features
 
+def rebuild_recommendation_index(n_neighbours=ITEM_NEIGHBOURS, **top_items_params):
+    """
+    Rebuilds the top-items, interaction and co-purchase artifacts, the similar-customer index and the
+    recommendation index from already saved models and data.
 
-def get_recommendations_for_customer(customer_id, rfm_df_global, df_orders_clustered_global, scaler, encoder, kmeans_latent, cluster_top_items_dict, overall_top_products_global, rfm_features, top_n_cluster=5, top_n_overall=5):
+    `top_items_params` (depth, weight, half-life) override the ones stored with the previous artifact.
     """
-    Provides both cluster-based and overall popularity-based recommendations for a given customer ID,
-    prioritizing unique cluster recommendations, and includes RFM details and purchased products.
+    scaler, encoder, _, rfm_df, df_orders_clustered, _, _, rfm_features = load_models_and_data()
+    build_latent_index(rfm_df, scaler, encoder, rfm_features).save(os.path.join(MODELS_DIR, LATENT_INDEX_FILE))
+    cluster_top_items_dict, overall_top_products = refresh_top_items(df_orders_clustered, **top_items_params)
+    interactions, _ = refresh_interaction_artifacts(df_orders_clustered, n_neighbours)
+    recommendation_index = build_recommendation_index(
+        rfm_df, df_orders_clustered, cluster_top_items_dict, overall_top_products, interactions
+    )
+    save_recommendation_index(recommendation_index)
+    publish_release()
+    return recommendation_index
+
+def export_recommendations(output_path, top_n_cluster=5, top_n_overall=5, chunk_size=100000, source="cluster", top_n_item=5):
     """
-    # Use .copy() to prevent SettingWithCopyWarning later
-    customer_rfm = rfm_df_global[rfm_df_global['Customer ID'] == customer_id].copy() 
-    
-    cluster_recommendations = []
-    customer_cluster = "Unknown"
-    recommendation_source = ""
-    purchased_products_current_customer = []
-    
-    # Default RFM info if customer not found
-    customer_r_score = "N/A"
-    customer_f_score = "N/A"
-    customer_m_score = "N/A"
-    customer_rfm_segment_label = "N/A"
+    Writes recommendations for every customer in `rfm_df.csv` to a Parquet or CSV file in one pass.
 
-    if customer_rfm.empty:
-        recommendation_source = "Popularity-based (Customer not found)"
-        final_overall_popular_recs = overall_top_products_global[:top_n_overall]
+    Customers are scored in chunks of `chunk_size` through `get_recommendations_for_customers`;
+    `source="item"` adds the co-purchase recommendations. Recommendation lists are stored as list
+    columns in Parquet and as JSON strings in CSV.
+    """
+    scaler, encoder, kmeans_latent, rfm_df, df_orders_clustered, cluster_top_items_dict, overall_top_products, rfm_features = load_models_and_data()
+    interactions = load_interaction_matrix()
+    if interactions is None:
+        interactions = InteractionMatrix.from_orders(df_orders_clustered)
+    item_similarity = None
+    if source == "item":
+        item_similarity = load_item_similarity()
+        if item_similarity is None or not item_similarity.matches(interactions):
+            item_similarity = ItemSimilarity.from_interactions(interactions)
+
+    all_customer_ids = rfm_df['Customer ID'].tolist()
+    rows = []
+    for start in range(0, len(all_customer_ids), chunk_size):
+        rows.extend(get_recommendations_for_customers(
+            all_customer_ids[start:start + chunk_size], rfm_df, df_orders_clustered, scaler, encoder, kmeans_latent,
+            cluster_top_items_dict, overall_top_products, rfm_features,
+            top_n_cluster=top_n_cluster, top_n_overall=top_n_overall, interactions=interactions,
+            item_similarity=item_similarity, top_n_item=top_n_item
+        ))
+
+    export_df = pd.DataFrame(rows).drop(columns=['purchased_products'])
+    if output_path.endswith('.parquet'):
+        export_df.to_parquet(output_path, index=False)
     else:
-        try:
-            customer_rfm_scaled = scaler.transform(customer_rfm[rfm_features].values)
-            customer_latent_feature = encoder.predict(customer_rfm_scaled, verbose=0)
-            customer_cluster = int(kmeans_latent.predict(customer_latent_feature)[0])
-
-            # Get RFM scores and segment label for the current customer
-            customer_r_score = int(customer_rfm['R_Score'].iloc[0])
-            customer_f_score = int(customer_rfm['F_Score'].iloc[0])
-            customer_m_score = int(customer_rfm['M_Score'].iloc[0])
-            customer_rfm_segment_label = customer_rfm['RFM_Segment_Label'].iloc[0]
-
-            recommendations_pool = cluster_top_items_dict.get(customer_cluster, [])
-            
-            # Get products already purchased by the current customer
-            purchased_products_current_customer = df_orders_clustered_global[
-                df_orders_clustered_global['Customer ID'] == customer_id
-            ]['Product Name'].unique().tolist()
-            
-            # Filter cluster recommendations: remove already purchased items
-            filtered_recs_cluster = [rec for rec in recommendations_pool if rec not in purchased_products_current_customer]
-            cluster_recommendations = filtered_recs_cluster[:top_n_cluster]
-            
-            if cluster_recommendations:
-                recommendation_source = "Hybrid (Cluster-based with bought item filter)"
-            else:
-                recommendation_source = "Popularity-based (Cluster recommendations exhausted or none)"
-            
-            # Ensure overall popular recommendations do not duplicate cluster recommendations or purchased items
-            cluster_recs_set = set(cluster_recommendations)
-            purchased_recs_set = set(purchased_products_current_customer)
-            
-            filtered_overall_popular = [
-                rec for rec in overall_top_products_global 
-                if rec not in cluster_recs_set and rec not in purchased_recs_set
-            ]
-            final_overall_popular_recs = filtered_overall_popular[:top_n_overall]
-
-        except Exception as e:
-            print(f"Error during cluster-based recommendation for {customer_id}: {e}")
-            recommendation_source = "Error during cluster processing; falling back to popularity"
-            customer_cluster = "Error"
-            cluster_recommendations = [] # Clear cluster recs on error
-            final_overall_popular_recs = overall_top_products_global[:top_n_overall] # Fallback to unfiltered overall popular
-
-    return {
-        "customer_id": customer_id,
-        "cluster": customer_cluster,
-        "recommendation_source": recommendation_source,
-        "cluster_based_recommendations": cluster_recommendations,
-        "overall_popular_recommendations": final_overall_popular_recs,
-        "r_score": customer_r_score,
-        "f_score": customer_f_score,
-        "m_score": customer_m_score,
-        "rfm_segment_label": customer_rfm_segment_label,
-        "purchased_products": purchased_products_current_customer # Include purchased products
-    }
+        for column in ['cluster_based_recommendations', 'overall_popular_recommendations', 'item_based_recommendations']:
+            if column in export_df.columns:
+                export_df[column] = export_df[column].map(json.dumps)
+        export_df.to_csv(output_path, index=False)
+    print(f"[INFO] Recommendations for {len(export_df)} customers exported to {output_path}.")
+    return export_df
 
 # --- Main execution for pipeline.py (if run directly for training/saving) ---
 if __name__ == "__main__":
-    print("Running data processing and model training pipeline...")
-    df_orders_ca = load_and_preprocess_data()
-    rfm_df = calculate_rfm(df_orders_ca)
-    
-    n_clusters_optimal_for_pipeline = 3 
-    rfm_df, scaler, encoder, kmeans_latent, rfm_features_trained = score_rfm_and_cluster(rfm_df.copy(), n_clusters_optimal_for_pipeline)
-    
-    # Merge cluster IDs back to the original orders DataFrame
-    df_orders_ca_with_clusters = pd.merge(
-        df_orders_ca,
-        rfm_df[['Customer ID', 'Cluster_AE']],
-        on='Customer ID',
-        how='left'
+    parser = argparse.ArgumentParser(description="Smart Retail Engine training pipeline.")
+    parser.add_argument("--build-index", action="store_true",
+                        help="Only rebuild the top-items artifact, interaction matrix, item similarity, similar-customer index "
+                             "and recommendation index from the saved models and data.")
+    parser.add_argument("--item-neighbours", type=int, default=ITEM_NEIGHBOURS,
+                        help="Co-purchase neighbours kept per product by the item-based engine.")
+    parser.add_argument("--cluster-depth", type=int,
+                        help="Products kept per cluster in the top-items artifact (default 20, or the previously saved value).")
+    parser.add_argument("--overall-depth", type=int,
+                        help="Products kept in the overall top-items list (default 15, or the previously saved value).")
+    parser.add_argument("--top-items-weight", choices=sorted(TOP_ITEM_WEIGHTS),
+                        help="What ranks products: purchase count (default), summed sales or summed quantity.")
+    parser.add_argument("--top-items-half-life", type=float, metavar="DAYS",
+                        help="Decay each order's weight by half every DAYS days before the latest order.")
+    parser.add_argument("--export-recommendations", metavar="PATH",
+                        help="Only write all customers' recommendations to PATH (.parquet or .csv) using the saved models.")
+    parser.add_argument("--top-n-cluster", type=int, default=5, help="Cluster-based recommendations per customer in exports.")
+    parser.add_argument("--top-n-overall", type=int, default=5, help="Overall popular recommendations per customer in exports.")
+    parser.add_argument("--recommendation-source", choices=RECOMMENDATION_SOURCES, default="cluster",
+                        help="Engine for exports: cluster popularity only, or with item-based co-purchase recommendations.")
+    parser.add_argument("--top-n-item", type=int, default=5, help="Item-based recommendations per customer in exports.")
+    parser.add_argument("--rollback", metavar="VERSION",
+                        help="Only point the CURRENT serving release at an already published VERSION "
+                             "(running API workers switch to it on their next reload check).")
+    parser.add_argument("--export-numpy", action="store_true",
+                        help="Only export the saved models to the NumPy inference artifact.")
+    parser.add_argument("--convert-columnar", action="store_true",
+                        help="Only write memory-mappable columnar copies of the processed CSV tables.")
+    parser.add_argument("--stream-rfm", nargs="+", metavar="ORDER_FILE",
+                        help="Only compute scored RFM chunk by chunk from CSV/Parquet order files.")
+    parser.add_argument("--rfm-output", default=os.path.join(PROCESSED_DATA_DIR, "rfm_streamed.csv"),
+                        help="Output CSV for --stream-rfm.")
+    parser.add_argument("--chunksize", type=int, default=500000, help="Order rows per chunk for --stream-rfm.")
+    parser.add_argument("--incremental", metavar="ORDER_FILE",
+                        help="Only apply new order rows (CSV/Parquet, Orders sheet layout) to the saved RFM table, "
+                             "clusters and index; retrains fully when RFM drift exceeds the threshold.")
+    parser.add_argument("--input", default=RAW_DATA_PATH,
+                        help="Raw orders for training: the Superstore workbook or a CSV/Parquet Orders export.")
+    parser.add_argument("--returns", metavar="RETURNS_FILE",
+                        help="Returns rows (CSV/Parquet) for --input or --incremental; overrides the workbook's Returns sheet.")
+    parser.add_argument("--no-ingest-cache", action="store_true",
+                        help="Parse the workbook without reading or writing the ingestion cache.")
+    parser.add_argument("--compact-dtypes", action="store_true",
+                        help="Preprocess with categorical and downcast dtypes to reduce the pipeline's peak memory.")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="Only print bytes per column of the preprocessed --input with default and compact dtypes.")
+    parser.add_argument("--ingest", action="store_true",
+                        help="Only parse the --input workbook into the ingestion cache (no-op if it is up to date).")
+    parser.add_argument("--drift-threshold", type=float, default=DRIFT_THRESHOLD,
+                        help="Largest tolerated mean shift of the standardized RFM features for --incremental.")
+    parser.add_argument("--n-clusters", type=int, default=3, help="K-Means clusters in the latent space for training.")
+    parser.add_argument("--embedding", choices=EMBEDDING_BACKENDS, default=EMBEDDING_BACKEND,
+                        help="Latent embedding for clustering: the trained autoencoder or a training-free PCA projection.")
+    parser.add_argument("--clustering", choices=CLUSTERING_ALGORITHMS, default=CLUSTERING_ALGORITHM,
+                        help="Full K-Means on the latent matrix, or mini-batch K-Means fed by chunked encoder output.")
+    parser.add_argument("--partial-fit", action="store_true",
+                        help="With --incremental, update the centroids of a mini-batch K-Means model with the new customers.")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Train with the best latent size and cluster count from a parallel sweep instead of --n-clusters.")
+    parser.add_argument("--sweep-clusters", type=int, nargs=2, default=[2, 8], metavar=("MIN", "MAX"),
+                        help="Inclusive range of cluster counts for --sweep.")
+    parser.add_argument("--sweep-latent-dims", type=int, nargs="+", default=[2],
+                        help="Autoencoder latent sizes for --sweep (one autoencoder is trained per size).")
+    parser.add_argument("--sweep-workers", type=int,
+                        help="Worker processes for --sweep (default: CPU count / --threads-per-worker).")
+    parser.add_argument("--threads-per-worker", type=int, default=1,
+                        help="BLAS/OpenMP/TensorFlow threads per --sweep worker.")
+    args = parser.parse_args()
+    if args.sweep and args.embedding != "autoencoder":
+        parser.error("--sweep trains autoencoders; it cannot be combined with --embedding pca.")
+    top_items_params = dict(
+        cluster_depth=args.cluster_depth, overall_depth=args.overall_depth,
+        weight=args.top_items_weight, half_life_days=args.top_items_half_life,
     )
-    df_orders_ca_with_clusters.dropna(subset=['Cluster_AE'], inplace=True)
-    df_orders_ca_with_clusters['Cluster_AE'] = df_orders_ca_with_clusters['Cluster_AE'].astype(int)
 
-    save_models_and_data(rfm_df, df_orders_ca_with_clusters, scaler, encoder, kmeans_latent)
-    print("Pipeline execution complete. Models and data saved.")
\ No newline at end of file
+    if args.memory_report:
+        report_preprocessing_memory(args.input, args.returns)
+        sys.exit(0)
+    if args.ingest:
+        load_workbook_tables(args.input)
+        sys.exit(0)
+    if args.incremental:
+        refresh_from_new_orders(
+            read_new_orders(args.incremental, args.returns), drift_threshold=args.drift_threshold, partial_fit=args.partial_fit
+        )
+        sys.exit(0)
+    if args.stream_rfm:
+        stream_rfm(args.stream_rfm, args.rfm_output, args.chunksize)
+        sys.exit(0)
+    if args.convert_columnar:
+        convert_processed_tables_to_columnar()
+        sys.exit(0)
+    if args.rollback:
+        set_current_release(args.rollback)
+        print(f"[INFO] CURRENT release is now {args.rollback} (published: {', '.join(list_releases())}).")
+        sys.exit(0)
+    if args.export_numpy:
+        export_numpy_models()
+        sys.exit(0)
+    if args.build_index:
+        rebuild_recommendation_index(args.item_neighbours, **top_items_params)
+        sys.exit(0)
+    if args.export_recommendations:
+        export_recommendations(
+            args.export_recommendations, args.top_n_cluster, args.top_n_overall,
+            source=args.recommendation_source, top_n_item=args.top_n_item
+        )
+        sys.exit(0)
+
+    print("Running data processing and model training pipeline...")
+    # Wall time and peak memory of each step, printed at the end and saved next to the models
+    run_report = RunReport()
+    with run_report.step("load_and_preprocess_data"):
+        df_orders_ca = load_and_preprocess_data(
+            args.input, args.returns, use_cache=not args.no_ingest_cache, compact=args.compact_dtypes
+        )
+    with run_report.step("calculate_rfm"):
+        rfm_df = calculate_rfm(df_orders_ca)
+
+    if args.sweep:
+        with run_report.step("sweep_clusters"):
+            sweep_results, best_fit = sweep_clusters(
+                rfm_df.copy(), range(args.sweep_clusters[0], args.sweep_clusters[1] + 1), args.sweep_latent_dims,
+                workers=args.sweep_workers, threads_per_worker=args.threads_per_worker
+            )
+        os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
+        sweep_results.to_csv(os.path.join(PROCESSED_DATA_DIR, SWEEP_RESULTS_FILE), index=False)
+        print(sweep_results.to_string(index=False))
+        rfm_df, scaler, encoder, kmeans_latent, rfm_features_trained = best_fit
+        # Sweeps train autoencoders; recorded so `--incremental` retrains keep the embedding backend
+        training_report = {"embedding": "autoencoder", "sweep": True}
+    else:
+        training_report = {}
+        with run_report.step("score_rfm_and_cluster"):
+            rfm_df, scaler, encoder, kmeans_latent, rfm_features_trained = score_rfm_and_cluster(
+                rfm_df.copy(), args.n_clusters, training_report=training_report, embedding=args.embedding,
+                clustering=args.clustering
+            )
+    
+    # Add cluster IDs to the orders DataFrame as a new column (no merged copy of the table)
+    with run_report.step("attach_clusters"):
+        df_orders_ca_with_clusters = attach_clusters(df_orders_ca, rfm_df)
+
+    with run_report.step("save_models_and_data"):
+        save_models_and_data(rfm_df, df_orders_ca_with_clusters, scaler, encoder, kmeans_latent)
+        if training_report:
+            save_training_report(training_report)
+        # Aggregates and frozen score bins that `--incremental` refreshes from new orders
+        save_incremental_state(RFMAccumulator().update(df_orders_ca), compute_rfm_score_bins(rfm_df))
+
+    with run_report.step("refresh_top_items"):
+        cluster_top_items_dict, overall_top_products = refresh_top_items(df_orders_ca_with_clusters, **top_items_params)
+    with run_report.step("refresh_interaction_artifacts"):
+        interactions, _ = refresh_interaction_artifacts(df_orders_ca_with_clusters, args.item_neighbours)
+    with run_report.step("build_recommendation_index"):
+        recommendation_index = build_recommendation_index(
+            rfm_df, df_orders_ca_with_clusters, cluster_top_items_dict, overall_top_products, interactions
+        )
+        save_recommendation_index(recommendation_index)
+    with run_report.step("publish_release"):
+        publish_release()
+    run_report_path = run_report.save()
+    if run_report_path:
+        run_report.print_summary()
+        print(f"[INFO] Run report saved to {run_report_path}.")
+    print("Pipeline execution complete. Models and data saved.")
@@ -0,0 +1,62 @@
+# smart_retail_engine/scripts/projection.py
+"""
+Training-free latent projection: PCA of the standardized RFM features, in NumPy.
+
+The projection is the linear map x -> (x - mean) @ components.T, i.e. a single linear Dense layer, so
+it is returned as a `NumpyEncoder` and flows through the same artifacts (NumPy `.npz`, Keras `.h5`),
+K-Means step and serving code as the autoencoder's encoder. Components come from an exact SVD of the
+centred data when there are few features (RFM has three) and from a randomized SVD (Halko et al.)
+otherwise; either way signs are fixed so each component's largest loading is positive, which makes
+refits on the same data return the same projection.
+"""
+import numpy as np
+
+from scripts.numpy_inference import NumpyEncoder
+
+PROJECTION_METHODS = ("auto", "exact", "randomized")
+# Above this many features "auto" switches from the exact to the randomized SVD
+_EXACT_SVD_MAX_FEATURES = 100
+
+
+def randomized_svd(X, n_components, n_oversamples=10, n_iter=4, seed=42):
+    """Top `n_components` singular values and right singular vectors (rows) of `X` by randomized range finding."""
+    rng = np.random.default_rng(seed)
+    n_random = min(n_components + n_oversamples, min(X.shape))
+    Q = X @ rng.standard_normal((X.shape[1], n_random))
+    # Power iterations sharpen the spectrum; re-orthonormalize each time to keep them stable
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(X @ (X.T @ Q))
+    Q, _ = np.linalg.qr(Q)
+    _, singular_values, components = np.linalg.svd(Q.T @ X, full_matrices=False)
+    return singular_values[:n_components], components[:n_components]
+
+
+def fit_pca(X, n_components=2, method="auto", seed=42):
+    """
+    Fits PCA on `X` (rows are samples) and returns (mean, components, explained_variance_ratio);
+    `components` holds one principal axis per row.
+    """
+    if method not in PROJECTION_METHODS:
+        raise ValueError(f"Unknown projection method '{method}'; expected one of: {', '.join(PROJECTION_METHODS)}.")
+    X = np.asarray(X, dtype=np.float64)
+    mean = X.mean(axis=0)
+    centred = X - mean
+    if method == "exact" or (method == "auto" and X.shape[1] <= _EXACT_SVD_MAX_FEATURES):
+        _, singular_values, components = np.linalg.svd(centred, full_matrices=False)
+        singular_values, components = singular_values[:n_components], components[:n_components]
+    else:
+        singular_values, components = randomized_svd(centred, n_components, seed=seed)
+
+    # Deterministic signs: the largest-magnitude loading of every component is positive
+    signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+    components = components * np.where(signs == 0, 1, signs)[:, None]
+    total_variance = (centred ** 2).sum()
+    explained_variance_ratio = singular_values ** 2 / total_variance if total_variance > 0 else np.zeros(len(singular_values))
+    return mean, components, explained_variance_ratio
+
+
+def build_projection_encoder(mean, components):
+    """The PCA projection as a one-layer linear `NumpyEncoder` (float32, like the Keras encoder)."""
+    kernel = components.T.astype(np.float32)
+    bias = (-mean @ components.T).astype(np.float32)
+    return NumpyEncoder([(kernel, bias, "linear")])
@@ -0,0 +1,110 @@
+# smart_retail_engine/scripts/releases.py
+"""
+Published serving releases: immutable, versioned snapshots of everything the API loads.
+
+The pipeline keeps writing its working artifacts to `models/` and `data/processed/`.
+`publish_release` copies the serving subset into `models/releases/<model version>/` (under a staging
+name first, renamed into place once complete) and then points `models/releases/CURRENT` at it by
+writing the pointer to a temporary file and renaming it over the old one. A reader therefore sees
+either the previous release or the new one, never a half-written mix, and API workers can pick up a
+new release (or a rollback, by pointing CURRENT at an older one) while serving.
+"""
+import os
+import shutil
+
+from scripts.config import (
+    MODELS_DIR, PROCESSED_DATA_DIR, RELEASES_DIR, RELEASES_TO_KEEP, COLUMNAR_SUBDIR, TOP_ITEMS_FILE, INTERACTIONS_FILE,
+    ITEM_SIMILARITY_FILE, RECOMMENDATION_INDEX_FILE
+)
+from scripts.columnar_store import columnar_table_exists
+from scripts.model_version import UNVERSIONED, read_model_version, write_model_version
+
+CURRENT_RELEASE_FILE = "CURRENT"
+# Processed tables and artifacts the API reads (see `load_models_and_data` and the app's startup)
+SERVING_TABLES = ("rfm_df", "df_orders_ca_with_clusters")
+SERVING_PROCESSED_FILES = (TOP_ITEMS_FILE, INTERACTIONS_FILE, ITEM_SIMILARITY_FILE, RECOMMENDATION_INDEX_FILE)
+
+
+def release_dirs(version, releases_dir=RELEASES_DIR):
+    """(models_dir, processed_data_dir) of a published release."""
+    release_dir = os.path.join(releases_dir, version)
+    return os.path.join(release_dir, "models"), os.path.join(release_dir, "processed")
+
+
+def current_release(releases_dir=RELEASES_DIR):
+    """Version named by the CURRENT pointer, or None if nothing has been published (or it was removed)."""
+    try:
+        with open(os.path.join(releases_dir, CURRENT_RELEASE_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version if version and os.path.isdir(os.path.join(releases_dir, version)) else None
+
+
+def set_current_release(version, releases_dir=RELEASES_DIR):
+    """Atomically points CURRENT at an already published `version` (also used to roll back)."""
+    if not os.path.isdir(os.path.join(releases_dir, version)):
+        raise FileNotFoundError(f"Release '{version}' not found in {releases_dir}.")
+    pointer_path = os.path.join(releases_dir, CURRENT_RELEASE_FILE)
+    with open(pointer_path + ".tmp", "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_path + ".tmp", pointer_path)
+
+
+def list_releases(releases_dir=RELEASES_DIR):
+    """Published versions, oldest first."""
+    if not os.path.isdir(releases_dir):
+        return []
+    paths = [os.path.join(releases_dir, name) for name in os.listdir(releases_dir) if not name.startswith(".")]
+    # Versions only have one-second resolution, so releases published within a second are ordered by
+    # when their directory was written
+    return [os.path.basename(path) for path in sorted(
+        (path for path in paths if os.path.isdir(path)), key=lambda path: (os.stat(path).st_mtime_ns, path)
+    )]
+
+
+def _copy_serving_artifacts(models_dir, processed_data_dir, target_models_dir, target_processed_dir):
+    os.makedirs(target_models_dir)
+    os.makedirs(target_processed_dir)
+    for name in os.listdir(models_dir):
+        path = os.path.join(models_dir, name)
+        if os.path.isfile(path) and not name.endswith(".tmp"):
+            shutil.copy2(path, target_models_dir)
+    for table_name in SERVING_TABLES:
+        columnar_path = os.path.join(processed_data_dir, COLUMNAR_SUBDIR, table_name)
+        if columnar_table_exists(columnar_path):
+            shutil.copytree(columnar_path, os.path.join(target_processed_dir, COLUMNAR_SUBDIR, table_name))
+        else:
+            shutil.copy2(os.path.join(processed_data_dir, f"{table_name}.csv"), target_processed_dir)
+    for name in SERVING_PROCESSED_FILES:
+        path = os.path.join(processed_data_dir, name)
+        if os.path.exists(path):
+            shutil.copy2(path, target_processed_dir)
+
+
+def publish_release(models_dir=MODELS_DIR, processed_data_dir=PROCESSED_DATA_DIR, releases_dir=RELEASES_DIR, keep=RELEASES_TO_KEEP):
+    """
+    Snapshots the current working artifacts as the release named by their model version, makes it
+    CURRENT and deletes the oldest releases beyond `keep`. Returns the version.
+    """
+    version = read_model_version(models_dir)
+    if version == UNVERSIONED:
+        version = write_model_version(models_dir)
+    release_dir = os.path.join(releases_dir, version)
+    if not os.path.isdir(release_dir):
+        staging_dir = os.path.join(releases_dir, f".staging-{version}-{os.getpid()}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        try:
+            _copy_serving_artifacts(models_dir, processed_data_dir, *release_dirs(os.path.basename(staging_dir), releases_dir))
+            os.replace(staging_dir, release_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    set_current_release(version, releases_dir)
+
+    for old_version in list_releases(releases_dir)[:-max(keep, 1)]:
+        if old_version != version:
+            shutil.rmtree(os.path.join(releases_dir, old_version), ignore_errors=True)
+    print(f"[INFO] Published release {version}.")
+    return version
@@ -0,0 +1,206 @@
+# smart_retail_engine/scripts/response_cache.py
+"""
+In-process response cache for the recommendation API, with an optional shared second level.
+
+Entries are keyed by (model version, customer ID, request parameters), kept in LRU order up to
+`max_entries` and dropped `ttl_seconds` after they were stored. Switching the cache to a new model
+version (`set_model_version`) discards the local entries at once; entries in a shared backend are
+simply never read again under the new version's keys and expire by TTL.
+
+A shared backend is anything with `get(key) -> str | None` and `set(key, value, ttl_seconds)`:
+`InMemoryCacheBackend` is the local stand-in (tests, single-host setups) and `RedisCacheBackend`
+talks to Redis when the optional `redis` package is installed. Backend failures are counted and
+treated as misses, so the cache never breaks a request.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from scripts.model_version import UNVERSIONED
+
+
+class InMemoryCacheBackend:
+    """Dict-based shared-backend stand-in with per-key expiry."""
+
+    def __init__(self, clock=time.monotonic):
+        self._values = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def get(self, key):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl_seconds):
+        with self._lock:
+            self._values[key] = (self._clock() + ttl_seconds, value)
+
+
+class RedisCacheBackend:
+    """Shared backend on a Redis server (requires the optional `redis` package)."""
+
+    def __init__(self, url, key_prefix="sre:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.2)
+        self._key_prefix = key_prefix
+
+    def get(self, key):
+        value = self._client.get(self._key_prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value, ttl_seconds):
+        self._client.set(self._key_prefix + key, value, ex=max(1, int(ttl_seconds)))
+
+
+def make_shared_backend(url):
+    """Shared backend for a `RETAIL_RESPONSE_CACHE_URL` value: "" for none, "memory://" or "redis://...". """
+    if not url:
+        return None
+    if url == "memory://":
+        return InMemoryCacheBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported response cache URL '{url}'; expected 'memory://' or a redis:// URL.")
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache of JSON-serializable responses, with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries=10000, ttl_seconds=300.0, shared_backend=None, model_version=UNVERSIONED, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared_backend = shared_backend
+        self.model_version = model_version
+        self._entries = OrderedDict() # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.counters = dict.fromkeys(
+            ("hits", "misses", "shared_hits", "evictions", "expirations", "invalidations", "shared_errors"), 0
+        )
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or self.shared_backend is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key(self, customer_id, params, model_version=None):
+        return "|".join([model_version or self.model_version, str(customer_id), *map(str, params)])
+
+    def set_model_version(self, model_version):
+        """Switches keys to `model_version`; local entries of the previous version are discarded."""
+        with self._lock:
+            if model_version == self.model_version:
+                return
+            self.model_version = model_version
+            self.counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def get(self, customer_id, params=(), model_version=None):
+        """
+        The cached response for `customer_id` and `params` (a tuple of request parameters), or None.
+        `model_version` overrides the cache's version for callers that computed with a specific one.
+        """
+        if not self.enabled:
+            return None
+        key = self._key(customer_id, params, model_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+                self.counters["expirations"] += 1
+
+        value = self._get_shared(key)
+        with self._lock:
+            if value is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["shared_hits"] += 1
+            self._store(key, value)
+        return value
+
+    def set(self, customer_id, params, value, model_version=None):
+        """Caches `value` for `customer_id` and `params` locally and in the shared backend (None is not cached)."""
+        if not self.enabled or value is None:
+            return
+        key = self._key(customer_id, params, model_version)
+        with self._lock:
+            self._store(key, value)
+        if self.shared_backend is not None:
+            try:
+                self.shared_backend.set(key, json.dumps(value), self.ttl_seconds)
+            except Exception:
+                with self._lock:
+                    self.counters["shared_errors"] += 1
+
+    def get_or_compute(self, customer_id, params, compute, model_version=None):
+        """The cached response, or `compute()` stored under the key when there is none."""
+        value = self.get(customer_id, params, model_version)
+        if value is None:
+            value = compute()
+            self.set(customer_id, params, value, model_version)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counter values plus the current entry count and capacity."""
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries), "max_entries": self.max_entries}
+
+    def _get_shared(self, key):
+        if self.shared_backend is None:
+            return None
+        try:
+            value = self.shared_backend.get(key)
+        except Exception:
+            with self._lock:
+                self.counters["shared_errors"] += 1
+            return None
+        return json.loads(value) if value is not None else None
+
+    def _store(self, key, value):
+        # Caller holds the lock
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+
+def cache_metrics_text(stats, prefix="retail_response_cache"):
+    """Prometheus text exposition of `ResponseCache.stats()`."""
+    descriptions = {
+        "hits": "Responses served from the in-process cache.",
+        "shared_hits": "Responses served from the shared cache backend.",
+        "misses": "Responses that had to be computed.",
+        "evictions": "Entries dropped to stay within the capacity.",
+        "expirations": "Entries dropped because their TTL ran out.",
+        "invalidations": "Entries dropped because the model version changed.",
+        "shared_errors": "Failed shared cache backend calls.",
+    }
+    lines = []
+    for name, description in descriptions.items():
+        lines += [f"# HELP {prefix}_{name}_total {description}", f"# TYPE {prefix}_{name}_total counter",
+                  f"{prefix}_{name}_total {stats[name]}"]
+    for name, description in (("entries", "Entries currently cached."), ("max_entries", "Cache capacity.")):
+        lines += [f"# HELP {prefix}_{name} {description}", f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {stats[name]}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,153 @@
+# smart_retail_engine/scripts/response_shaping.py
+"""
+Shaping and encoding of recommendation API responses.
+
+Responses are computed (and cached) in full; `shape_response` then trims a copy to what the client
+asked for: a subset of fields (`fields=cluster,cluster_based_recommendations`), a page of the
+purchased products (`purchased_limit=10&purchased_offset=20`, with the total count added) and
+product IDs instead of product names (`products=id`). Without options the response is unchanged.
+
+`encode_body` serializes with orjson when it is installed (stdlib `json` otherwise) and compresses
+bodies of at least RESPONSE_COMPRESSION_MIN_BYTES with the best encoding the client accepts among
+RESPONSE_COMPRESSION (brotli needs the optional `brotli` package).
+"""
+import gzip
+import json
+
+from scripts.config import RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_MIN_BYTES
+from scripts.instrumentation import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Response fields holding product lists, and all selectable fields
+PRODUCT_LIST_FIELDS = (
+    "cluster_based_recommendations", "overall_popular_recommendations", "item_based_recommendations", "purchased_products"
+)
+RESPONSE_FIELDS = (
+    "customer_id", "cluster", "recommendation_source", "r_score", "f_score", "m_score", "rfm_segment_label", *PRODUCT_LIST_FIELDS
+)
+PRODUCT_MODES = ("name", "id")
+# Compression effort: fast settings, since bodies are compressed on every request
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+class ShapeOptions:
+    """Field selection, purchased-products page and product mode of a request."""
+
+    def __init__(self, fields=None, purchased_limit=None, purchased_offset=0, products="name"):
+        self.fields = fields
+        self.purchased_limit = purchased_limit
+        self.purchased_offset = purchased_offset
+        self.products = products
+
+    @property
+    def is_identity(self):
+        """True when shaping returns the response unchanged."""
+        return self.fields is None and self.purchased_limit is None and not self.purchased_offset and self.products == "name"
+
+
+def parse_shape_options(params):
+    """
+    Reads `fields`, `purchased_limit`, `purchased_offset` and `products` from query parameters or a
+    JSON body (where `fields` may also be a list). Raises ValueError with a client-facing message.
+    """
+    fields = params.get("fields")
+    if fields is not None:
+        fields = [field.strip() for field in fields.split(",")] if isinstance(fields, str) else fields
+        if not isinstance(fields, list) or not all(field in RESPONSE_FIELDS for field in fields):
+            raise ValueError(f"'fields' must be a comma-separated subset of: {', '.join(RESPONSE_FIELDS)}.")
+    try:
+        purchased_limit = params.get("purchased_limit")
+        purchased_limit = None if purchased_limit is None else int(purchased_limit)
+        purchased_offset = int(params.get("purchased_offset", 0))
+    except (TypeError, ValueError):
+        raise ValueError("'purchased_limit' and 'purchased_offset' must be integers.")
+    if (purchased_limit is not None and purchased_limit < 0) or purchased_offset < 0:
+        raise ValueError("'purchased_limit' and 'purchased_offset' must not be negative.")
+    products = params.get("products", "name")
+    if products not in PRODUCT_MODES:
+        raise ValueError(f"'products' must be one of: {', '.join(PRODUCT_MODES)}.")
+    return ShapeOptions(fields, purchased_limit, purchased_offset, products)
+
+
+def product_id_map(df_orders):
+    """
+    Product name -> product ID (the most frequent ID where a name has several, the smallest on ties)
+    from order rows. `observed=True` keeps categorical columns (as loaded from the columnar store) to the
+    pairs that occur instead of every name x ID combination.
+    """
+    pairs = df_orders.groupby(["Product Name", "Product ID"], observed=True).size().rename("count").reset_index()
+    pairs = pairs.astype({"Product Name": str, "Product ID": str})
+    pairs = pairs.sort_values(["count", "Product ID"], ascending=[False, True], kind="stable").drop_duplicates("Product Name")
+    return dict(zip(pairs["Product Name"], pairs["Product ID"]))
+
+
+def shape_response(response, options, product_ids=None):
+    """A copy of `response` trimmed according to `options` (`product_ids` maps names to IDs for products="id")."""
+    if options.is_identity:
+        return response
+    fields = response.keys() if options.fields is None else [field for field in options.fields if field in response]
+    shaped = {"customer_id": response["customer_id"]} if "customer_id" in response else {}
+    for field in fields:
+        value = response[field]
+        if field == "purchased_products" and (options.purchased_limit is not None or options.purchased_offset):
+            shaped["purchased_products_total"] = len(value)
+            end = None if options.purchased_limit is None else options.purchased_offset + options.purchased_limit
+            value = value[options.purchased_offset:end]
+        if options.products == "id" and field in PRODUCT_LIST_FIELDS:
+            value = [product_ids.get(name, name) for name in value]
+        shaped[field] = value
+    return shaped
+
+
+def dumps(payload):
+    """Compact JSON bytes of `payload`."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def negotiate_encoding(accept_encoding, allowed=None):
+    """
+    The preferred content coding among `allowed` (default RESPONSE_COMPRESSION; "br" before "gzip")
+    accepted by an Accept-Encoding header, or None.
+    """
+    allowed = RESPONSE_COMPRESSION if allowed is None else allowed
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if coding in allowed and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def encode_body(payload, accept_encoding="", min_size=RESPONSE_COMPRESSION_MIN_BYTES):
+    """(body bytes, content coding or None): `payload` as JSON, compressed when it is large enough and the client accepts it."""
+    with stage("serialize"):
+        body = dumps(payload)
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= min_size else None
+    if encoding is not None:
+        with stage("compress"):
+            if encoding == "br":
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body, encoding
@@ -0,0 +1,149 @@
+# smart_retail_engine/scripts/rfm_streaming.py
+"""
+Streaming RFM aggregation for order histories that do not fit in memory.
+
+`RFMAccumulator` folds chunks of order rows into per-customer partial aggregates (last order date,
+total sales and the set of distinct orders) and produces the same table as `calculate_rfm`. Orders are
+tracked as 64-bit hashes of (Customer ID, Order ID), so Frequency stays an exact distinct count while
+the state needs ~16 bytes per order instead of the full order rows.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+RFM_INPUT_COLUMNS = ['Customer ID', 'Order ID', 'Order Date', 'Sales']
+
+
+def _order_pair_hashes(orders):
+    """64-bit hash of each row's (Customer ID, Order ID) pair."""
+    return pd.util.hash_pandas_object(orders[['Customer ID', 'Order ID']].astype(str), index=False).to_numpy()
+
+
+class RFMAccumulator:
+    """Per-customer partial RFM aggregates that can be updated chunk by chunk."""
+
+    def __init__(self):
+        self.customer_ids = pd.Index([], dtype=object)
+        self.last_order_date = np.empty(0, dtype='datetime64[ns]')
+        self.monetary = np.empty(0, dtype=np.float64)
+        # One entry per distinct order: hash of (Customer ID, Order ID) and the customer's position
+        self.order_hashes = np.empty(0, dtype=np.uint64)
+        self.order_customers = np.empty(0, dtype=np.int64)
+        self._n_compacted_orders = 0
+
+    def __len__(self):
+        return len(self.customer_ids)
+
+    def _customer_positions(self, customer_ids):
+        """Positions of `customer_ids` in the registry, registering customers seen for the first time."""
+        positions = self.customer_ids.get_indexer(customer_ids)
+        if (positions < 0).any():
+            new_customers = pd.Index(customer_ids[positions < 0]).unique()
+            self.customer_ids = self.customer_ids.append(new_customers.astype(object))
+            self.last_order_date = np.concatenate([
+                self.last_order_date, np.full(len(new_customers), np.datetime64('NaT'), dtype='datetime64[ns]')
+            ])
+            self.monetary = np.concatenate([self.monetary, np.zeros(len(new_customers))])
+            positions = self.customer_ids.get_indexer(customer_ids)
+        return positions
+
+    def update(self, orders):
+        """Folds a chunk of order rows (at least `RFM_INPUT_COLUMNS`) into the aggregates."""
+        if orders.empty:
+            return self
+        customer_ids = orders['Customer ID'].astype(object).to_numpy()
+        positions = self._customer_positions(customer_ids)
+
+        order_dates = pd.to_datetime(orders['Order Date']).to_numpy(dtype='datetime64[ns]')
+        last_dates = self.last_order_date.view(np.int64)
+        # NaT is the smallest int64, so it never wins the maximum
+        np.maximum.at(last_dates, positions, order_dates.view(np.int64))
+        self.monetary += np.bincount(positions, weights=orders['Sales'].to_numpy(dtype=np.float64), minlength=len(self.monetary))
+
+        pair_hashes, first_rows = np.unique(_order_pair_hashes(orders), return_index=True)
+        self.order_hashes = np.concatenate([self.order_hashes, pair_hashes])
+        self.order_customers = np.concatenate([self.order_customers, positions[first_rows]])
+        # Orders can span chunks; drop repeats once the uncompacted tail outgrows the compacted part
+        if len(self.order_hashes) > 2 * max(self._n_compacted_orders, 1_000_000):
+            self._compact_orders()
+        return self
+
+    def known_orders(self, orders):
+        """Boolean mask of the rows in `orders` whose (Customer ID, Order ID) was already folded in."""
+        return np.isin(_order_pair_hashes(orders), self.order_hashes)
+
+    def _compact_orders(self):
+        self.order_hashes, first_rows = np.unique(self.order_hashes, return_index=True)
+        self.order_customers = self.order_customers[first_rows]
+        self._n_compacted_orders = len(self.order_hashes)
+
+    def result(self, analysis_date=None):
+        """
+        Returns the RFM table (Customer ID, Recency, Frequency, Monetary) sorted by Customer ID.
+
+        `analysis_date` defaults to one day after the latest order seen, as in `calculate_rfm`.
+        """
+        self._compact_orders()
+        last_order_date = pd.to_datetime(self.last_order_date)
+        if analysis_date is None:
+            analysis_date = last_order_date.max() + pd.Timedelta(days=1)
+        rfm_df = pd.DataFrame({
+            'Customer ID': self.customer_ids.to_numpy(),
+            'Recency': (pd.Timestamp(analysis_date) - last_order_date).days.to_numpy(),
+            'Frequency': np.bincount(self.order_customers, minlength=len(self.customer_ids)),
+            'Monetary': self.monetary,
+        })
+        return rfm_df.sort_values('Customer ID', kind='stable').reset_index(drop=True)
+
+    def save(self, path):
+        """Persists the aggregates to a `.npz` file."""
+        self._compact_orders()
+        np.savez(
+            path,
+            customer_ids=self.customer_ids.to_numpy(dtype=str),
+            last_order_date=self.last_order_date,
+            monetary=self.monetary,
+            order_hashes=self.order_hashes,
+            order_customers=self.order_customers,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads aggregates written by `save`."""
+        accumulator = cls()
+        with np.load(path) as state:
+            accumulator.customer_ids = pd.Index(state['customer_ids'].astype(object))
+            accumulator.last_order_date = state['last_order_date']
+            accumulator.monetary = state['monetary']
+            accumulator.order_hashes = state['order_hashes']
+            accumulator.order_customers = state['order_customers']
+        accumulator._n_compacted_orders = len(accumulator.order_hashes)
+        return accumulator
+
+
+def iter_order_chunks(file_paths, chunksize=500_000, columns=RFM_INPUT_COLUMNS):
+    """Yields DataFrame chunks of `columns` from CSV and/or Parquet order files."""
+    for file_path in file_paths:
+        if os.path.splitext(file_path)[1].lower() == '.parquet':
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(
+                file_path, usecols=columns, parse_dates=['Order Date'], chunksize=chunksize,
+                dtype={'Customer ID': str, 'Order ID': str, 'Sales': np.float64},
+            )
+
+
+def calculate_rfm_streaming(file_paths, chunksize=500_000, accumulator=None):
+    """
+    Streaming counterpart of `calculate_rfm`: folds order files chunk by chunk into an `RFMAccumulator`.
+
+    Returns (rfm_df, accumulator); pass an existing `accumulator` to continue from earlier aggregates.
+    """
+    accumulator = accumulator if accumulator is not None else RFMAccumulator()
+    for chunk in iter_order_chunks(file_paths, chunksize=chunksize):
+        accumulator.update(chunk)
+    return accumulator.result(), accumulator
@@ -0,0 +1,661 @@
+# smart_retail_engine/scripts/serving.py
+"""
+Real-time serving helpers: loading saved artifacts and answering recommendation requests.
+
+Only NumPy, pandas and joblib are imported at module level. TensorFlow (and scikit-learn, through
+unpickling) is loaded on first use and only by the "keras" inference backend.
+"""
+import pandas as pd
+import numpy as np
+import os
+import time
+import joblib
+
+from scripts.config import (
+    PROCESSED_DATA_DIR, MODELS_DIR, RECOMMENDATION_INDEX_FILE, TOP_ITEMS_FILE, INTERACTIONS_FILE, ITEM_SIMILARITY_FILE,
+    ITEM_NEIGHBOURS, INFERENCE_BACKEND, COLUMNAR_SUBDIR
+)
+from scripts.numpy_inference import NUMPY_ARTIFACT_FILE, load_numpy_models
+from scripts.columnar_store import columnar_table_exists, load_columnar_table
+from scripts.interactions import InteractionMatrix
+from scripts.item_similarity import ItemSimilarity
+from scripts.latent_index import LATENT_INDEX_FILE, LatentNeighbourIndex
+from scripts.model_version import write_model_version
+from scripts.instrumentation import stage
+
+
+# --- Model and Data Loading ---
+
+# Per-row weights for the popularity tables: plain purchase counts, or summed Sales / Quantity
+TOP_ITEM_WEIGHTS = {"count": None, "sales": "Sales", "quantity": "Quantity"}
+
+
+def compute_top_items(df_orders_clustered, cluster_depth=20, overall_depth=15, weight="count", half_life_days=None):
+    """
+    Computes the per-cluster and overall product popularity lists from one grouped count.
+
+    Rows are counted per (cluster, product) pair in a single pass; the overall list is summed from
+    the same pair totals. `weight` ("count", "sales" or "quantity") selects what is summed per row,
+    and `half_life_days` optionally decays each row by its age relative to the latest order date.
+    Ties are kept in order of first appearance (within the cluster, or overall), which matches
+    ranking each slice with `value_counts` on plain string columns.
+    """
+    if weight not in TOP_ITEM_WEIGHTS:
+        raise ValueError(f"Unknown top-items weight '{weight}'; expected one of {sorted(TOP_ITEM_WEIGHTS)}.")
+    product_codes, product_names = pd.factorize(df_orders_clustered['Product Name'])
+    cluster_codes, cluster_ids = pd.factorize(df_orders_clustered['Cluster_AE'], sort=True)
+    valid_rows = (product_codes >= 0) & (cluster_codes >= 0)
+    n_products = len(product_names)
+
+    row_weights = None
+    if TOP_ITEM_WEIGHTS[weight] is not None:
+        row_weights = df_orders_clustered[TOP_ITEM_WEIGHTS[weight]].to_numpy(dtype=np.float64)
+    if half_life_days:
+        order_dates = pd.to_datetime(df_orders_clustered['Order Date'])
+        age_days = (order_dates.max() - order_dates).dt.days.to_numpy(dtype=np.float64)
+        decay = 0.5 ** (age_days / half_life_days)
+        row_weights = decay if row_weights is None else row_weights * decay
+    if row_weights is not None:
+        row_weights = row_weights[valid_rows]
+
+    # (cluster, product) pairs numbered in order of first appearance, with their summed weights
+    pair_codes, pair_keys = pd.factorize(cluster_codes[valid_rows].astype(np.int64) * n_products + product_codes[valid_rows])
+    pair_totals = np.bincount(pair_codes, weights=row_weights, minlength=len(pair_keys))
+    pair_clusters, pair_products = np.divmod(pair_keys, n_products)
+
+    # Sort by cluster, then total descending, then first appearance
+    order = np.lexsort((np.arange(len(pair_keys)), -pair_totals, pair_clusters))
+    cluster_starts = np.searchsorted(pair_clusters[order], np.arange(len(cluster_ids) + 1))
+    cluster_top_items_dict = {
+        int(cluster_id): product_names.take(pair_products[order[cluster_starts[i]:cluster_starts[i + 1]][:cluster_depth]]).tolist()
+        for i, cluster_id in enumerate(cluster_ids)
+    }
+
+    product_totals = np.bincount(pair_products, weights=pair_totals, minlength=n_products)
+    overall_order = np.argsort(-product_totals, kind='stable')[:overall_depth] # factorize order = first appearance
+    overall_top_products = product_names.take(overall_order).tolist()
+    return cluster_top_items_dict, overall_top_products
+
+
+def save_top_items(cluster_top_items_dict, overall_top_products, params=None, processed_data_dir=PROCESSED_DATA_DIR):
+    """Persists the popularity tables (and the `compute_top_items` parameters that produced them)."""
+    os.makedirs(processed_data_dir, exist_ok=True)
+    artifact = {"cluster_top_items": cluster_top_items_dict, "overall_top_products": overall_top_products, "params": params or {}}
+    joblib.dump(artifact, os.path.join(processed_data_dir, TOP_ITEMS_FILE))
+    print(f"[INFO] Top items saved for {len(cluster_top_items_dict)} clusters.")
+
+
+def load_top_items(processed_data_dir=PROCESSED_DATA_DIR):
+    """Returns the artifact dict saved by `save_top_items`, or None if it does not exist."""
+    artifact_path = os.path.join(processed_data_dir, TOP_ITEMS_FILE)
+    if not os.path.exists(artifact_path):
+        return None
+    return joblib.load(artifact_path)
+
+
+def refresh_top_items(df_orders_clustered, processed_data_dir=PROCESSED_DATA_DIR, **params):
+    """
+    Recomputes and saves the popularity tables.
+
+    Parameters not given are taken from the previously saved artifact, so refreshes keep the
+    configured depth and weighting.
+    """
+    previous = load_top_items(processed_data_dir)
+    params = {**(previous["params"] if previous else {}), **{k: v for k, v in params.items() if v is not None}}
+    cluster_top_items_dict, overall_top_products = compute_top_items(df_orders_clustered, **params)
+    save_top_items(cluster_top_items_dict, overall_top_products, params, processed_data_dir)
+    return cluster_top_items_dict, overall_top_products
+
+
+def read_processed_table(table_name, processed_data_dir=PROCESSED_DATA_DIR):
+    """Memory-maps a processed table from the columnar store, falling back to parsing its CSV."""
+    columnar_path = os.path.join(processed_data_dir, COLUMNAR_SUBDIR, table_name)
+    if columnar_table_exists(columnar_path):
+        return load_columnar_table(columnar_path)
+    return pd.read_csv(os.path.join(processed_data_dir, f"{table_name}.csv"))
+
+
+def load_keras_models(models_dir=MODELS_DIR):
+    """Loads the saved scikit-learn scaler, Keras encoder and latent KMeans."""
+    from tensorflow.keras.models import load_model
+
+    # Added compile=False for safety when loading H5 models in newer TF versions
+    scaler = joblib.load(os.path.join(models_dir, "rfm_scaler.joblib"))
+    encoder = load_model(os.path.join(models_dir, "autoencoder_encoder_model.h5"), compile=False) 
+    kmeans_latent = joblib.load(os.path.join(models_dir, "kmeans_latent_model.joblib"))
+    return scaler, encoder, kmeans_latent
+
+
+def resolve_inference_backend(backend=INFERENCE_BACKEND, models_dir=MODELS_DIR):
+    """Resolves "auto" to "numpy" when the NumPy artifact exists and to "keras" otherwise."""
+    if backend == "auto":
+        return "numpy" if os.path.exists(os.path.join(models_dir, NUMPY_ARTIFACT_FILE)) else "keras"
+    return backend
+
+
+def load_inference_models(backend=INFERENCE_BACKEND, models_dir=MODELS_DIR):
+    """Loads (scaler, encoder, kmeans_latent) from the NumPy artifact or the saved Keras/scikit-learn models."""
+    backend = resolve_inference_backend(backend, models_dir)
+    if backend == "numpy":
+        return load_numpy_models(os.path.join(models_dir, NUMPY_ARTIFACT_FILE))
+    if backend == "keras":
+        return load_keras_models(models_dir)
+    raise ValueError(f"Unknown inference backend '{backend}'; expected 'auto', 'numpy' or 'keras'.")
+
+
+def load_models_and_data(backend=INFERENCE_BACKEND, timings=None, models_dir=MODELS_DIR, processed_data_dir=PROCESSED_DATA_DIR):
+    """
+    Loads saved models and pre-calculated data for real-time inference.
+
+    With backend="numpy" (or "auto" when the .npz artifact exists) the scaler, encoder and KMeans are
+    NumPy objects with the same transform/predict methods, and TensorFlow is never imported.
+    If a `timings` list is given, (step, seconds) pairs are appended to it for startup profiling.
+    `models_dir`/`processed_data_dir` select another artifact set, such as a published release.
+    """
+    step_start = time.perf_counter()
+
+    def record(step):
+        nonlocal step_start
+        if timings is not None:
+            now = time.perf_counter()
+            timings.append((step, now - step_start))
+            step_start = now
+
+    backend = resolve_inference_backend(backend, models_dir)
+    scaler, encoder, kmeans_latent = load_inference_models(backend, models_dir)
+    record(f"load models ({backend} backend)")
+    
+    rfm_df_global = read_processed_table("rfm_df", processed_data_dir)
+    record("read rfm_df")
+    df_orders_clustered_global = read_processed_table("df_orders_ca_with_clusters", processed_data_dir)
+    record("read df_orders_ca_with_clusters")
+
+    top_items = load_top_items(processed_data_dir)
+    if top_items is not None:
+        cluster_top_items_dict, overall_top_products_global = top_items["cluster_top_items"], top_items["overall_top_products"]
+        record("load top items")
+    else:
+        # Artifacts saved before the top-items file existed: count from the orders table once
+        print("[WARN] Top items artifact not found; computing it from the orders table. Run `pipeline.py --build-index` to persist it.")
+        cluster_top_items_dict, overall_top_products_global = compute_top_items(df_orders_clustered_global)
+        record("compute top items")
+
+    rfm_features = ['Recency', 'Frequency', 'Monetary']
+
+    return scaler, encoder, kmeans_latent, rfm_df_global, df_orders_clustered_global, cluster_top_items_dict, overall_top_products_global, rfm_features
+
+
+# --- Recommendations ---
+
+def get_recommendations_for_customer(customer_id, rfm_df_global, df_orders_clustered_global, scaler, encoder, kmeans_latent, cluster_top_items_dict, overall_top_products_global, rfm_features, top_n_cluster=5, top_n_overall=5, interactions=None):
+    """
+    Provides both cluster-based and overall popularity-based recommendations for a given customer ID,
+    prioritizing unique cluster recommendations, and includes RFM details and purchased products.
+    With an `interactions` matrix, purchased items come from it instead of scanning the orders table.
+    Each stage is timed into the `/metrics` stage histogram (see scripts/instrumentation.py).
+    """
+    with stage("customer_lookup"):
+        # Use .copy() to prevent SettingWithCopyWarning later
+        customer_rfm = rfm_df_global[rfm_df_global['Customer ID'] == customer_id].copy()
+    
+    cluster_recommendations = []
+    customer_cluster = "Unknown"
+    recommendation_source = ""
+    purchased_products_current_customer = []
+    
+    # Default RFM info if customer not found
+    customer_r_score = "N/A"
+    customer_f_score = "N/A"
+    customer_m_score = "N/A"
+    customer_rfm_segment_label = "N/A"
+
+    if customer_rfm.empty:
+        recommendation_source = "Popularity-based (Customer not found)"
+        final_overall_popular_recs = overall_top_products_global[:top_n_overall]
+    else:
+        try:
+            with stage("scale"):
+                customer_rfm_scaled = scaler.transform(customer_rfm[rfm_features].values)
+            with stage("encode"):
+                customer_latent_feature = encoder.predict(customer_rfm_scaled, verbose=0)
+            with stage("cluster"):
+                customer_cluster = int(kmeans_latent.predict(customer_latent_feature)[0])
+
+            # Get RFM scores and segment label for the current customer
+            customer_r_score = int(customer_rfm['R_Score'].iloc[0])
+            customer_f_score = int(customer_rfm['F_Score'].iloc[0])
+            customer_m_score = int(customer_rfm['M_Score'].iloc[0])
+            customer_rfm_segment_label = customer_rfm['RFM_Segment_Label'].iloc[0]
+
+            with stage("purchased_filter"):
+                if interactions is not None:
+                    purchased_products_current_customer = interactions.purchased_products(customer_id)
+                    (cluster_recommendations,), (final_overall_popular_recs,) = filter_recommendation_pools(
+                        interactions, [customer_id], [customer_cluster], cluster_top_items_dict, overall_top_products_global,
+                        top_n_cluster=top_n_cluster, top_n_overall=top_n_overall
+                    )
+                else:
+                    recommendations_pool = cluster_top_items_dict.get(customer_cluster, [])
+
+                    # Get products already purchased by the current customer
+                    purchased_products_current_customer = df_orders_clustered_global[
+                        df_orders_clustered_global['Customer ID'] == customer_id
+                    ]['Product Name'].unique().tolist()
+
+                    # Filter cluster recommendations: remove already purchased items
+                    filtered_recs_cluster = [rec for rec in recommendations_pool if rec not in purchased_products_current_customer]
+                    cluster_recommendations = filtered_recs_cluster[:top_n_cluster]
+
+                    # Ensure overall popular recommendations do not duplicate cluster recommendations or purchased items
+                    cluster_recs_set = set(cluster_recommendations)
+                    purchased_recs_set = set(purchased_products_current_customer)
+
+                    filtered_overall_popular = [
+                        rec for rec in overall_top_products_global 
+                        if rec not in cluster_recs_set and rec not in purchased_recs_set
+                    ]
+                    final_overall_popular_recs = filtered_overall_popular[:top_n_overall]
+
+            if cluster_recommendations:
+                recommendation_source = "Hybrid (Cluster-based with bought item filter)"
+            else:
+                recommendation_source = "Popularity-based (Cluster recommendations exhausted or none)"
+
+        except Exception as e:
+            print(f"Error during cluster-based recommendation for {customer_id}: {e}")
+            recommendation_source = "Error during cluster processing; falling back to popularity"
+            customer_cluster = "Error"
+            cluster_recommendations = [] # Clear cluster recs on error
+            final_overall_popular_recs = overall_top_products_global[:top_n_overall] # Fallback to unfiltered overall popular
+
+    return {
+        "customer_id": customer_id,
+        "cluster": customer_cluster,
+        "recommendation_source": recommendation_source,
+        "cluster_based_recommendations": cluster_recommendations,
+        "overall_popular_recommendations": final_overall_popular_recs,
+        "r_score": customer_r_score,
+        "f_score": customer_f_score,
+        "m_score": customer_m_score,
+        "rfm_segment_label": customer_rfm_segment_label,
+        "purchased_products": purchased_products_current_customer # Include purchased products
+    }
+
+# --- Purchased-Item Exclusion ---
+
+def load_interaction_matrix(processed_data_dir=PROCESSED_DATA_DIR):
+    """Loads the customer x product matrix saved at pipeline time, or returns None if it does not exist."""
+    matrix_path = os.path.join(processed_data_dir, INTERACTIONS_FILE)
+    if not os.path.exists(matrix_path):
+        return None
+    return InteractionMatrix.load(matrix_path)
+
+
+def save_interaction_matrix(interactions, processed_data_dir=PROCESSED_DATA_DIR):
+    """Saves the customer x product matrix next to the processed tables."""
+    os.makedirs(processed_data_dir, exist_ok=True)
+    interactions.save(os.path.join(processed_data_dir, INTERACTIONS_FILE))
+    print(f"[INFO] Interaction matrix saved ({interactions.shape[0]} customers x {interactions.shape[1]} products).")
+
+
+# --- Item-Item Co-Purchase Model ---
+
+def load_item_similarity(processed_data_dir=PROCESSED_DATA_DIR):
+    """Loads the co-purchase neighbour table saved at pipeline time, or returns None if it does not exist."""
+    similarity_path = os.path.join(processed_data_dir, ITEM_SIMILARITY_FILE)
+    if not os.path.exists(similarity_path):
+        return None
+    return ItemSimilarity.load(similarity_path)
+
+
+def save_item_similarity(item_similarity, processed_data_dir=PROCESSED_DATA_DIR):
+    """Saves the co-purchase neighbour table next to the processed tables."""
+    os.makedirs(processed_data_dir, exist_ok=True)
+    item_similarity.save(os.path.join(processed_data_dir, ITEM_SIMILARITY_FILE))
+    print(f"[INFO] Item similarity saved ({len(item_similarity.product_index)} products x {item_similarity.n_neighbours} neighbours).")
+
+
+def refresh_interaction_artifacts(df_orders_clustered, n_neighbours=ITEM_NEIGHBOURS, processed_data_dir=PROCESSED_DATA_DIR):
+    """Builds and saves the interaction matrix and the co-purchase neighbour table; returns both."""
+    interactions = InteractionMatrix.from_orders(df_orders_clustered)
+    save_interaction_matrix(interactions, processed_data_dir)
+    item_similarity = ItemSimilarity.from_interactions(interactions, n_neighbours)
+    save_item_similarity(item_similarity, processed_data_dir)
+    return interactions, item_similarity
+
+
+def filter_recommendation_pools(interactions, customer_ids, clusters, cluster_top_items_dict, overall_top_products, top_n_cluster=None, top_n_overall=None):
+    """
+    Removes purchased products from the cluster and overall pools of many customers at once.
+
+    Pools are laid out as 2-D arrays of product codes (one row per customer) and purchases are
+    masked out with `InteractionMatrix.contains`. When `top_n_cluster` is given, only the first
+    `top_n_cluster` remaining cluster items are kept and those are also removed from the overall
+    pool. Returns (cluster_recommendations, overall_recommendations), one list per customer.
+    """
+    cluster_keys = list(cluster_top_items_dict)
+    pools = [cluster_top_items_dict[cluster_id] for cluster_id in cluster_keys]
+    # Products in the pools but not in the matrix get codes past its vocabulary: never purchased
+    pool_names = pd.Index(pd.unique(np.array([name for pool in pools for name in pool] + list(overall_top_products), dtype=object)))
+    vocabulary = interactions.product_index.append(pool_names.difference(interactions.product_index, sort=False))
+    names = vocabulary.to_numpy()
+
+    width = max((len(pool) for pool in pools), default=0)
+    pool_table = np.full((len(pools) + 1, width), -1, dtype=np.int64) # last row: empty pool for unknown clusters
+    for i, pool in enumerate(pools):
+        pool_table[i, :len(pool)] = vocabulary.get_indexer(pool)
+    cluster_rows = pd.Index(cluster_keys).get_indexer(clusters)
+    cluster_codes = pool_table[np.where(cluster_rows >= 0, cluster_rows, len(pools))]
+
+    positions = interactions.customer_positions(customer_ids)
+    cluster_keep = (cluster_codes >= 0) & ~interactions.contains(positions, cluster_codes)
+    overall_codes = np.broadcast_to(vocabulary.get_indexer(overall_top_products), (len(positions), len(overall_top_products)))
+    overall_keep = ~interactions.contains(positions, overall_codes)
+    if top_n_cluster is not None:
+        cluster_keep &= np.cumsum(cluster_keep, axis=1) <= top_n_cluster
+        chosen_codes = np.where(cluster_keep, cluster_codes, -1)
+        overall_keep &= ~(overall_codes[:, :, None] == chosen_codes[:, None, :]).any(axis=2)
+    if top_n_overall is not None:
+        overall_keep &= np.cumsum(overall_keep, axis=1) <= top_n_overall
+
+    def split_rows(codes, keep):
+        kept_names = names[codes[keep]].tolist() # row-major, so rows stay contiguous
+        bounds = np.concatenate([[0], np.cumsum(keep.sum(axis=1))])
+        return [kept_names[bounds[i]:bounds[i + 1]] for i in range(len(keep))]
+
+    return split_rows(cluster_codes, cluster_keep), split_rows(overall_codes, overall_keep)
+
+
+# --- Precomputed Recommendation Index ---
+
+def build_recommendation_index(rfm_df, df_orders_clustered, cluster_top_items_dict, overall_top_products, interactions=None):
+    """
+    Precomputes a customer-keyed index so that serving a recommendation is a single dict lookup.
+
+    Each entry holds the customer's stored cluster, RFM scores, segment label, purchased products and
+    the cluster/overall recommendation pools with purchased items already removed. Purchases come
+    from `interactions` (built from `df_orders_clustered` if not given).
+    """
+    if interactions is None:
+        interactions = InteractionMatrix.from_orders(df_orders_clustered)
+    columns = ['Customer ID', 'Cluster_AE', 'R_Score', 'F_Score', 'M_Score', 'RFM_Segment_Label']
+    rfm_rows = rfm_df[columns]
+    customer_ids = rfm_rows['Customer ID'].tolist()
+    cluster_pools, overall_pools = filter_recommendation_pools(
+        interactions, customer_ids, rfm_rows['Cluster_AE'].astype(int).tolist(), cluster_top_items_dict, overall_top_products
+    )
+    positions = interactions.customer_positions(customer_ids)
+    product_names = interactions.product_index.to_numpy()
+
+    recommendation_index = {}
+    for (customer_id, cluster, r_score, f_score, m_score, segment_label), position, cluster_pool, overall_pool in zip(
+        rfm_rows.itertuples(index=False), positions, cluster_pools, overall_pools
+    ):
+        recommendation_index[customer_id] = {
+            "cluster": int(cluster),
+            "r_score": int(r_score),
+            "f_score": int(f_score),
+            "m_score": int(m_score),
+            "rfm_segment_label": segment_label,
+            "purchased_products": product_names[interactions.row(position)].tolist(),
+            "cluster_pool": cluster_pool,
+            "overall_pool": overall_pool,
+        }
+    return recommendation_index
+
+
+def save_recommendation_index(recommendation_index, processed_data_dir=PROCESSED_DATA_DIR):
+    """Saves the precomputed recommendation index next to the processed data."""
+    os.makedirs(processed_data_dir, exist_ok=True)
+    joblib.dump(recommendation_index, os.path.join(processed_data_dir, RECOMMENDATION_INDEX_FILE))
+    # Every refresh (full run, --incremental, --build-index) ends here; stamp the artifacts as a new version
+    write_model_version()
+    print(f"[INFO] Recommendation index saved for {len(recommendation_index)} customers.")
+
+
+def load_recommendation_index(processed_data_dir=PROCESSED_DATA_DIR):
+    """Loads the precomputed recommendation index, or returns None if it has not been built yet."""
+    index_path = os.path.join(processed_data_dir, RECOMMENDATION_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+    return joblib.load(index_path)
+
+
+def get_recommendations_from_index(customer_id, recommendation_index, overall_top_products_global, top_n_cluster=5, top_n_overall=5):
+    """
+    Same response as `get_recommendations_for_customer`, answered from the precomputed index
+    without scanning DataFrames or running the encoder.
+    """
+    entry = recommendation_index.get(customer_id)
+    if entry is None:
+        return {
+            "customer_id": customer_id,
+            "cluster": "Unknown",
+            "recommendation_source": "Popularity-based (Customer not found)",
+            "cluster_based_recommendations": [],
+            "overall_popular_recommendations": overall_top_products_global[:top_n_overall],
+            "r_score": "N/A",
+            "f_score": "N/A",
+            "m_score": "N/A",
+            "rfm_segment_label": "N/A",
+            "purchased_products": []
+        }
+
+    cluster_recommendations = entry["cluster_pool"][:top_n_cluster]
+    if cluster_recommendations:
+        recommendation_source = "Hybrid (Cluster-based with bought item filter)"
+    else:
+        recommendation_source = "Popularity-based (Cluster recommendations exhausted or none)"
+
+    # The overall pool already excludes purchased items; only the chosen cluster recs remain to be removed
+    cluster_recs_set = set(cluster_recommendations)
+    final_overall_popular_recs = [rec for rec in entry["overall_pool"] if rec not in cluster_recs_set][:top_n_overall]
+
+    return {
+        "customer_id": customer_id,
+        "cluster": entry["cluster"],
+        "recommendation_source": recommendation_source,
+        "cluster_based_recommendations": cluster_recommendations,
+        "overall_popular_recommendations": final_overall_popular_recs,
+        "r_score": entry["r_score"],
+        "f_score": entry["f_score"],
+        "m_score": entry["m_score"],
+        "rfm_segment_label": entry["rfm_segment_label"],
+        "purchased_products": entry["purchased_products"]
+    }
+
+# Engines selectable per request: the cluster popularity lists, or item-item co-purchase similarity
+RECOMMENDATION_SOURCES = ("cluster", "item")
+ITEM_BASED_SOURCE = "Item-based (Co-purchase similarity with bought item filter)"
+
+
+def get_item_recommendations_from_index(customer_id, recommendation_index, overall_top_products_global, interactions, item_similarity, top_n_item=5, top_n_cluster=5, top_n_overall=5):
+    """
+    Index response extended with "item_based_recommendations" from the co-purchase model.
+
+    Item-based recommendations become the recommendation source whenever the customer has any;
+    the overall popular list then excludes them as well as the cluster recommendations.
+    """
+    response = get_recommendations_from_index(
+        customer_id, recommendation_index, overall_top_products_global, top_n_cluster, top_n_overall
+    )
+    entry = recommendation_index.get(customer_id)
+    position = interactions.customer_position(customer_id) if entry is not None else -1
+    (item_recommendations,) = item_similarity.recommend(interactions, [position], top_n_item)
+    response["item_based_recommendations"] = item_recommendations
+    if item_recommendations:
+        excluded = set(response["cluster_based_recommendations"]).union(item_recommendations)
+        response["recommendation_source"] = ITEM_BASED_SOURCE
+        response["overall_popular_recommendations"] = [rec for rec in entry["overall_pool"] if rec not in excluded][:top_n_overall]
+    return response
+
+# --- Similar Customers ---
+
+def load_latent_index(models_dir=MODELS_DIR):
+    """Loads the latent-space neighbour index saved with the models, or returns None if it does not exist."""
+    index_path = os.path.join(models_dir, LATENT_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+    return LatentNeighbourIndex.load(index_path)
+
+
+def get_similar_customers(customer_id, latent_index, recommendation_index, k=10):
+    """
+    The `k` customers nearest to `customer_id` in the encoder's latent space, with their stored
+    cluster and segment from the recommendation index. Returns None for customers not in the index.
+    """
+    neighbours = latent_index.similar_customers(customer_id, k)
+    if neighbours is None:
+        return None
+    similar_customers = []
+    for neighbour_id, distance in neighbours:
+        entry = recommendation_index.get(neighbour_id, {})
+        similar_customers.append({
+            "customer_id": neighbour_id,
+            "distance": distance,
+            "cluster": entry.get("cluster", "Unknown"),
+            "rfm_segment_label": entry.get("rfm_segment_label", "N/A"),
+        })
+    entry = recommendation_index.get(customer_id, {})
+    return {
+        "customer_id": customer_id,
+        "cluster": entry.get("cluster", "Unknown"),
+        "similar_customers": similar_customers,
+    }
+
+# --- Batch Recommendations ---
+
+def parse_batch_request(payload, max_customers):
+    """
+    Validates a batch request body like {"customer_ids": [...], "top_n_cluster": 5, "top_n_overall": 5,
+    "source": "item", "top_n_item": 5} and returns (customer_ids, source, top_n_cluster, top_n_overall,
+    top_n_item). Raises ValueError with a client-facing message when it is invalid.
+    """
+    payload = payload if isinstance(payload, dict) else {}
+    customer_ids = payload.get("customer_ids")
+    if not isinstance(customer_ids, list) or not all(isinstance(customer_id, str) for customer_id in customer_ids):
+        raise ValueError("Request body must contain 'customer_ids' as a list of strings.")
+    if len(customer_ids) > max_customers:
+        raise ValueError(f"At most {max_customers} customer IDs are allowed per batch request.")
+    top_n_error = "'top_n_cluster', 'top_n_overall' and 'top_n_item' must be non-negative integers."
+    try:
+        top_n_cluster = int(payload.get("top_n_cluster", 5))
+        top_n_overall = int(payload.get("top_n_overall", 5))
+        top_n_item = int(payload.get("top_n_item", 5))
+    except (TypeError, ValueError):
+        raise ValueError(top_n_error)
+    if min(top_n_cluster, top_n_overall, top_n_item) < 0:
+        raise ValueError(top_n_error)
+    source = payload.get("source", "cluster")
+    if source not in RECOMMENDATION_SOURCES:
+        raise ValueError(f"'source' must be one of: {', '.join(RECOMMENDATION_SOURCES)}.")
+    return customer_ids, source, top_n_cluster, top_n_overall, top_n_item
+
+
+def get_recommendations_for_customers(customer_ids, rfm_df_global, df_orders_clustered_global, scaler, encoder, kmeans_latent, cluster_top_items_dict, overall_top_products_global, rfm_features, top_n_cluster=5, top_n_overall=5, interactions=None, item_similarity=None, top_n_item=5):
+    """
+    Vectorized counterpart of `get_recommendations_for_customer` for many customers at once.
+
+    The RFM rows of all known customers are scaled, encoded and clustered with a single
+    `scaler.transform`, `encoder.predict` and `kmeans_latent.predict` call. Purchased items come from
+    the customer x product matrix `interactions` (built from the requested customers' orders if not
+    given) and are excluded with `filter_recommendation_pools`. With an `item_similarity` model every
+    response also carries "item_based_recommendations", as in `get_item_recommendations_from_index`;
+    it must have been built over the product vocabulary of `interactions` (ValueError otherwise), so
+    pass the full interaction matrix along with it. Returns one response dict per requested ID, in
+    request order. Stages are timed as in `get_recommendations_for_customer`.
+    """
+    customer_ids = list(customer_ids)
+    with stage("customer_lookup"):
+        customer_rfm = rfm_df_global[rfm_df_global['Customer ID'].isin(customer_ids)].drop_duplicates('Customer ID')
+        if interactions is None:
+            interactions = InteractionMatrix.from_orders(
+                df_orders_clustered_global[df_orders_clustered_global['Customer ID'].isin(customer_rfm['Customer ID'])]
+            )
+    if item_similarity is not None and not item_similarity.matches(interactions):
+        raise ValueError(
+            "item_similarity was built over a different product vocabulary than the interaction matrix; "
+            "pass the interaction matrix it was built from."
+        )
+
+    recommendations = {}
+    model_error = None
+    if not customer_rfm.empty:
+        try:
+            with stage("scale"):
+                customer_rfm_scaled = scaler.transform(customer_rfm[rfm_features].values)
+            with stage("encode"):
+                customer_latent_features = encoder.predict(customer_rfm_scaled, batch_size=4096, verbose=0)
+            with stage("cluster"):
+                clusters = kmeans_latent.predict(customer_latent_features).astype(int).tolist()
+            known_ids = customer_rfm['Customer ID'].tolist()
+            with stage("purchased_filter"):
+                cluster_recommendations, overall_recommendations = filter_recommendation_pools(
+                    interactions, known_ids, clusters, cluster_top_items_dict, overall_top_products_global,
+                    top_n_cluster=top_n_cluster, top_n_overall=None if item_similarity is not None else top_n_overall
+                )
+            if item_similarity is not None:
+                with stage("item_similarity"):
+                    item_recommendations = item_similarity.recommend(interactions, interactions.customer_positions(known_ids), top_n_item)
+                    overall_recommendations = [
+                        [rec for rec in overall_pool if rec not in item_recs][:top_n_overall]
+                        for overall_pool, item_recs in zip(overall_recommendations, map(set, item_recommendations))
+                    ]
+            else:
+                item_recommendations = [None] * len(known_ids)
+            recommendations = dict(zip(known_ids, zip(clusters, cluster_recommendations, overall_recommendations, item_recommendations)))
+        except Exception as e:
+            print(f"Error during batch cluster-based recommendation for {len(customer_rfm)} customers: {e}")
+            model_error = e
+
+    columns = ['Customer ID', 'R_Score', 'F_Score', 'M_Score', 'RFM_Segment_Label']
+    rfm_details = {row[0]: row[1:] for row in customer_rfm[columns].itertuples(index=False)}
+    product_names = interactions.product_index.to_numpy()
+    positions = interactions.customer_positions(customer_ids)
+
+    results = []
+    for customer_id, position in zip(customer_ids, positions):
+        details = rfm_details.get(customer_id)
+        if details is None or model_error is not None:
+            not_found = details is None
+            results.append({
+                "customer_id": customer_id,
+                "cluster": "Unknown" if not_found else "Error",
+                "recommendation_source": "Popularity-based (Customer not found)" if not_found
+                                         else "Error during cluster processing; falling back to popularity",
+                "cluster_based_recommendations": [],
+                "overall_popular_recommendations": overall_top_products_global[:top_n_overall],
+                "r_score": "N/A",
+                "f_score": "N/A",
+                "m_score": "N/A",
+                "rfm_segment_label": "N/A",
+                "purchased_products": []
+            })
+            if item_similarity is not None:
+                results[-1]["item_based_recommendations"] = []
+            continue
+
+        customer_cluster, cluster_recommendations, final_overall_popular_recs, item_recommendations = recommendations[customer_id]
+        if item_recommendations:
+            recommendation_source = ITEM_BASED_SOURCE
+        elif cluster_recommendations:
+            recommendation_source = "Hybrid (Cluster-based with bought item filter)"
+        else:
+            recommendation_source = "Popularity-based (Cluster recommendations exhausted or none)"
+
+        r_score, f_score, m_score, segment_label = details
+        results.append({
+            "customer_id": customer_id,
+            "cluster": customer_cluster,
+            "recommendation_source": recommendation_source,
+            "cluster_based_recommendations": cluster_recommendations,
+            "overall_popular_recommendations": final_overall_popular_recs,
+            "r_score": int(r_score),
+            "f_score": int(f_score),
+            "m_score": int(m_score),
+            "rfm_segment_label": segment_label,
+            "purchased_products": product_names[interactions.row(position)].tolist()
+        })
+        if item_recommendations is not None:
+            results[-1]["item_based_recommendations"] = item_recommendations
+    return results
@@ -0,0 +1,192 @@
+# smart_retail_engine/scripts/serving_state.py
+"""
+Loaded serving data of one model version, and the background watcher that hot-swaps it.
+
+A `ServingState` bundles everything an API worker needs to answer requests for one version and is
+never mutated after loading. Workers keep a single module-level reference to the current state and
+request handlers read that reference once, so replacing it is atomic: in-flight requests finish on the
+state they started with and later requests see the new one. `ModelWatcher` polls the releases'
+CURRENT pointer off the request path, loads a new release completely before handing it over, and on
+a failed load keeps the old state serving.
+"""
+import threading
+import time
+
+from scripts.config import MODELS_DIR, PROCESSED_DATA_DIR, RELEASES_DIR, MODEL_RELOAD_INTERVAL
+from scripts.model_version import read_model_version
+from scripts.releases import current_release, release_dirs
+from scripts.serving import (
+    load_models_and_data, load_interaction_matrix, load_item_similarity, load_latent_index, load_recommendation_index,
+    build_recommendation_index
+)
+from scripts.interactions import InteractionMatrix
+from scripts.item_similarity import ItemSimilarity
+from scripts.latent_index import build_latent_index
+from scripts.response_shaping import product_id_map
+
+
+class ServingState:
+    """Models, tables and indexes of one model version (read-only once loaded)."""
+
+    def __init__(self, version, scaler, encoder, kmeans_latent, rfm_df, df_orders_clustered, cluster_top_items_dict,
+                 overall_top_products, rfm_features, interactions, item_similarity, latent_index, recommendation_index,
+                 product_ids=None):
+        self.version = version
+        self.scaler = scaler
+        self.encoder = encoder
+        self.kmeans_latent = kmeans_latent
+        self.rfm_df = rfm_df
+        self.df_orders_clustered = df_orders_clustered
+        self.cluster_top_items_dict = cluster_top_items_dict
+        self.overall_top_products = overall_top_products
+        self.rfm_features = rfm_features
+        self.interactions = interactions
+        self.item_similarity = item_similarity
+        self.latent_index = latent_index
+        self.recommendation_index = recommendation_index
+        # Product name -> product ID for responses with products=id; built at load time, off the request path
+        self.product_ids = product_id_map(df_orders_clustered) if product_ids is None else product_ids
+        self.loaded_at = time.time()
+
+
+def load_serving_state(models_dir=MODELS_DIR, processed_data_dir=PROCESSED_DATA_DIR, version=None, timings=None):
+    """
+    Loads a `ServingState` from an artifact set, building in memory whatever derived artifact is
+    missing or out of date. `version` defaults to the set's model version stamp; if a `timings`
+    list is given, (stage, seconds) pairs are appended to it.
+    """
+    stage_start = time.perf_counter()
+
+    def record(stage):
+        nonlocal stage_start
+        if timings is not None:
+            now = time.perf_counter()
+            timings.append((stage, now - stage_start))
+            stage_start = now
+
+    if version is None:
+        version = read_model_version(models_dir)
+    scaler, encoder, kmeans_latent, rfm_df, df_orders_clustered, cluster_top_items_dict, overall_top_products, rfm_features = \
+        load_models_and_data(timings=timings, models_dir=models_dir, processed_data_dir=processed_data_dir)
+    stage_start = time.perf_counter()
+
+    interactions = load_interaction_matrix(processed_data_dir)
+    record("load interaction matrix")
+    if interactions is None:
+        print("[WARN] Interaction matrix not found; building it in memory. Run `pipeline.py --build-index` to persist it.")
+        interactions = InteractionMatrix.from_orders(df_orders_clustered)
+        record("build interaction matrix")
+
+    item_similarity = load_item_similarity(processed_data_dir)
+    record("load item similarity")
+    if item_similarity is None or not item_similarity.matches(interactions):
+        print("[WARN] Item similarity missing or out of date; building it in memory. Run `pipeline.py --build-index` to persist it.")
+        item_similarity = ItemSimilarity.from_interactions(interactions)
+        record("build item similarity")
+
+    latent_index = load_latent_index(models_dir)
+    record("load similar-customer index")
+    if latent_index is None:
+        print("[WARN] Similar-customer index not found; building it in memory. Run `pipeline.py --build-index` to persist it.")
+        latent_index = build_latent_index(rfm_df, scaler, encoder, rfm_features)
+        record("build similar-customer index")
+
+    recommendation_index = load_recommendation_index(processed_data_dir)
+    record("load recommendation index")
+    if recommendation_index is None:
+        # No index on disk yet (e.g. models trained before the index existed): build it in memory once
+        print("[WARN] Recommendation index not found; building it in memory. Run `pipeline.py --build-index` to persist it.")
+        recommendation_index = build_recommendation_index(
+            rfm_df, df_orders_clustered, cluster_top_items_dict, overall_top_products, interactions
+        )
+        record("build recommendation index")
+
+    product_ids = product_id_map(df_orders_clustered)
+    record("build product ID map")
+
+    return ServingState(
+        version, scaler, encoder, kmeans_latent, rfm_df, df_orders_clustered, cluster_top_items_dict, overall_top_products,
+        rfm_features, interactions, item_similarity, latent_index, recommendation_index, product_ids
+    )
+
+
+def load_current_state(releases_dir=RELEASES_DIR, timings=None):
+    """Loads the CURRENT published release, or the working artifacts when nothing has been published yet."""
+    version = current_release(releases_dir)
+    if version is None:
+        return load_serving_state(timings=timings)
+    models_dir, processed_data_dir = release_dirs(version, releases_dir)
+    return load_serving_state(models_dir, processed_data_dir, version, timings)
+
+
+def load_release_state(version, releases_dir=RELEASES_DIR):
+    """Loads a published release."""
+    models_dir, processed_data_dir = release_dirs(version, releases_dir)
+    return load_serving_state(models_dir, processed_data_dir, version)
+
+
+class ModelWatcher(threading.Thread):
+    """
+    Daemon thread that polls the CURRENT release every `interval` seconds and, when it names another
+    version than the one served, loads it with `load` and passes the new state to `on_swap`.
+
+    A release that fails to load is logged and not retried until CURRENT changes again, while the
+    previous state keeps serving.
+    """
+
+    def __init__(self, current_version, on_swap, interval=MODEL_RELOAD_INTERVAL, releases_dir=RELEASES_DIR, load=load_release_state):
+        super().__init__(name="model-watcher", daemon=True)
+        self.current_version = current_version
+        self.on_swap = on_swap
+        self.interval = interval
+        self.releases_dir = releases_dir
+        self.load = load
+        self.failed_version = None
+        self.reloads = 0
+        self.reload_failures = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
+
+    def check(self):
+        """Loads and swaps in the CURRENT release if it changed; returns True if a new state was swapped in."""
+        version = current_release(self.releases_dir)
+        if version is None or version in (self.current_version, self.failed_version):
+            return False
+        print(f"[INFO] Loading model version {version} (serving {self.current_version}).")
+        start = time.perf_counter()
+        try:
+            state = self.load(version, self.releases_dir)
+        except Exception as e:
+            self.failed_version = version
+            self.reload_failures += 1
+            print(f"[ERROR] Loading model version {version} failed; still serving {self.current_version}: {e}")
+            return False
+        self.on_swap(state)
+        self.current_version, self.failed_version = version, None
+        self.reloads += 1
+        print(f"[INFO] Now serving model version {version} (loaded in {time.perf_counter() - start:.1f}s).")
+        return True
+
+
+def model_metrics_text(state, watcher=None):
+    """Prometheus text exposition of the served model version and, with a watcher, the reload counters."""
+    lines = [
+        "# HELP retail_model_info Model version currently served.", "# TYPE retail_model_info gauge",
+        f'retail_model_info{{version="{state.version}"}} 1',
+        "# HELP retail_model_loaded_timestamp_seconds When the served model version was loaded.",
+        "# TYPE retail_model_loaded_timestamp_seconds gauge", f"retail_model_loaded_timestamp_seconds {state.loaded_at:.3f}",
+    ]
+    if watcher is not None:
+        lines += [
+            "# HELP retail_model_reloads_total Model versions hot-swapped in since startup.",
+            "# TYPE retail_model_reloads_total counter", f"retail_model_reloads_total {watcher.reloads}",
+            "# HELP retail_model_reload_failures_total Model versions that failed to load.",
+            "# TYPE retail_model_reload_failures_total counter", f"retail_model_reload_failures_total {watcher.reload_failures}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,138 @@
+# smart_retail_engine/scripts/sweep.py
+"""
+Parallel hyper-parameter sweep over the autoencoder latent size and the K-Means cluster count.
+
+`sweep_clusters` trains the autoencoder once per latent size and fits K-Means for every cluster count
+on that encoder's latent vectors, scoring each fit with silhouette, Davies-Bouldin and inertia. Both
+stages run in a process pool (spawn context, so no worker inherits a half-initialized TensorFlow or
+BLAS runtime); every worker is capped at `threads_per_worker` BLAS/OpenMP/TensorFlow threads so
+`workers x threads_per_worker` matches the machine instead of oversubscribing it. K-Means tasks for
+a latent size are queued as soon as its encoder finishes.
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from scripts.config import TRAINING_MAX_EPOCHS, TRAINING_BATCH_SIZE
+from scripts.training import (
+    RFM_FEATURES, score_rfm, build_autoencoder, train_encoder, load_previous_cluster_model, align_cluster_ids
+)
+
+SWEEP_RESULTS_FILE = "cluster_sweep.csv"
+# Thread pools read these when the library is first loaded in a worker
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS")
+_worker_threads = 1
+_worker_thread_limits = None
+
+
+# --- Worker Tasks ---
+
+def _init_worker(threads):
+    """Caps the worker's native thread pools at `threads`."""
+    global _worker_threads, _worker_thread_limits
+    _worker_threads = threads
+    for variable in _THREAD_ENV_VARS:
+        os.environ[variable] = str(threads)
+    try:
+        # NumPy is already loaded by the time the initializer runs, so limit its BLAS pool directly
+        from threadpoolctl import threadpool_limits
+        _worker_thread_limits = threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+
+
+def _train_latent_config(X_scaled, latent_dim, max_epochs, batch_size):
+    """Trains one autoencoder; returns the encoder weights, the latent vectors of `X_scaled` and the training report."""
+    import tensorflow as tf
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(_worker_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(_worker_threads)
+    except RuntimeError:
+        pass # TensorFlow already initialized in this worker by an earlier task
+    report = {}
+    encoder = train_encoder(X_scaled, latent_dim, max_epochs=max_epochs, batch_size=batch_size, report=report)
+    return encoder.get_weights(), encoder.predict(X_scaled, batch_size=4096, verbose=0), report
+
+
+def _evaluate_kmeans(X_latent, n_clusters, silhouette_sample_size):
+    """Fits K-Means on `X_latent`; returns (metrics dict, fitted model)."""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score, davies_bouldin_score
+
+    kmeans_latent = KMeans(n_clusters=n_clusters, random_state=42, n_init=10).fit(X_latent)
+    metrics = {"inertia": float(kmeans_latent.inertia_), "silhouette": np.nan, "davies_bouldin": np.nan}
+    # Both scores need at least two distinct clusters (a collapsed latent space yields fewer)
+    if 2 <= len(np.unique(kmeans_latent.labels_)) < len(X_latent):
+        sample_size = silhouette_sample_size if len(X_latent) > silhouette_sample_size else None
+        metrics["silhouette"] = float(silhouette_score(X_latent, kmeans_latent.labels_, sample_size=sample_size, random_state=42))
+        metrics["davies_bouldin"] = float(davies_bouldin_score(X_latent, kmeans_latent.labels_))
+    return metrics, kmeans_latent
+
+
+# --- Sweep ---
+
+def rank_sweep_results(results):
+    """Sorts sweep rows best first: highest silhouette, then lowest Davies-Bouldin; unscored fits last."""
+    ranked = results.sort_values(['silhouette', 'davies_bouldin'], ascending=[False, True], na_position='last', kind='stable')
+    ranked = ranked.reset_index(drop=True)
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def sweep_clusters(rfm_df, n_clusters_values=range(2, 9), latent_dims=(2,), max_epochs=TRAINING_MAX_EPOCHS,
+                   batch_size=TRAINING_BATCH_SIZE, workers=None, threads_per_worker=1, silhouette_sample_size=10000,
+                   align_ids=True):
+    """
+    Sweeps latent sizes x cluster counts on raw RFM and returns (ranked results, winner).
+
+    The winner is the best-ranked fit as the same (rfm_df, scaler, encoder, kmeans_latent, rfm_features)
+    tuple `score_rfm_and_cluster` returns (cluster IDs aligned with the last saved models when
+    `align_ids`), so it can be saved with `save_models_and_data`. `workers` defaults to the CPU count
+    divided by `threads_per_worker`.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    rfm_df = score_rfm(rfm_df)
+    rfm_features = list(RFM_FEATURES)
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(rfm_df[rfm_features])
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+    print(f"[INFO] Sweeping latent sizes {list(latent_dims)} x cluster counts {list(n_clusters_values)} "
+          f"on {workers} workers x {threads_per_worker} threads.")
+
+    encoders, reports, rows, fitted = {}, {}, [], {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        training = {pool.submit(_train_latent_config, X_scaled, latent_dim, max_epochs, batch_size): latent_dim for latent_dim in latent_dims}
+        evaluations = {}
+        for future in as_completed(training):
+            latent_dim = training[future]
+            encoders[latent_dim], X_latent, reports[latent_dim] = future.result()
+            print(f"[INFO] Autoencoder with latent size {latent_dim} trained ({reports[latent_dim]['epochs_run']} epochs).")
+            for n_clusters in n_clusters_values:
+                evaluations[pool.submit(_evaluate_kmeans, X_latent, n_clusters, silhouette_sample_size)] = (latent_dim, n_clusters)
+        for future in as_completed(evaluations):
+            latent_dim, n_clusters = evaluations[future]
+            metrics, fitted[latent_dim, n_clusters] = future.result()
+            rows.append({
+                "latent_dim": latent_dim, "n_clusters": n_clusters, **metrics,
+                "epochs_run": reports[latent_dim]['epochs_run'], "train_seconds": reports[latent_dim]['wall_time_seconds'],
+            })
+
+    results = rank_sweep_results(pd.DataFrame(rows, columns=[
+        'latent_dim', 'n_clusters', 'silhouette', 'davies_bouldin', 'inertia', 'epochs_run', 'train_seconds'
+    ]))
+    best = results.iloc[0]
+    latent_dim, n_clusters = int(best['latent_dim']), int(best['n_clusters'])
+    _, encoder = build_autoencoder(X_scaled.shape[1], latent_dim)
+    encoder.set_weights(encoders[latent_dim])
+    kmeans_latent = fitted[latent_dim, n_clusters]
+    previous_models = load_previous_cluster_model() if align_ids else None
+    rfm_df['Cluster_AE'] = align_cluster_ids(kmeans_latent, rfm_df[rfm_features].to_numpy(dtype=np.float64), previous_models)
+    print(f"[INFO] Best configuration: latent size {latent_dim}, {n_clusters} clusters.")
+    return results, (rfm_df, scaler, encoder, kmeans_latent, rfm_features)
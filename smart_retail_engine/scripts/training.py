@@ -0,0 +1,544 @@
+# smart_retail_engine/scripts/training.py
+"""
+Offline training steps: preprocessing, RFM scoring, embedding (autoencoder or PCA) + K-Means clustering
+and saving artifacts.
+
+TensorFlow and scikit-learn are imported inside the functions that need them, so importing this
+module (e.g. through `scripts.pipeline`) stays cheap for the serving processes.
+"""
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+import joblib
+
+from scripts.config import (
+    PROCESSED_DATA_DIR, MODELS_DIR, RAW_DATA_PATH, COLUMNAR_DATA_DIR, TRAINING_SEED, TRAINING_MAX_EPOCHS,
+    TRAINING_BATCH_SIZE, EARLY_STOPPING_PATIENCE, VALIDATION_FRACTION, TRAINING_REPORT_FILE, EMBEDDING_BACKEND,
+    CLUSTERING_ALGORITHM, MINIBATCH_SIZE, MINIBATCH_PASSES, LATENT_CHUNK_SIZE
+)
+from scripts.numpy_inference import NUMPY_ARTIFACT_FILE, NumpyEncoder, export_numpy_artifact, load_numpy_models
+from scripts.projection import fit_pca, build_projection_encoder
+from scripts.latent_index import LATENT_INDEX_FILE, build_latent_index
+from scripts.model_version import write_model_version
+from scripts.columnar_store import save_columnar_table
+from scripts.ingestion import load_raw_tables
+
+
+# --- Main Pipeline Functions ---
+
+def load_and_preprocess_data(file_path=RAW_DATA_PATH, returns_path=None, use_cache=True, compact=False):
+    """
+    Loads raw data and performs initial preprocessing.
+
+    `file_path` is the Superstore workbook (parsed once, then read from the ingestion cache) or a
+    CSV/Parquet Orders export; see `scripts.ingestion.load_raw_tables`. `compact` selects the
+    memory-optimized dtypes of `preprocess_orders`.
+    """
+    df_orders, df_returns = load_raw_tables(file_path, returns_path, use_cache=use_cache, categorical=compact)
+    return preprocess_orders(df_orders, df_returns, compact=compact)
+
+
+def preprocess_orders(df_orders, df_returns=None, compact=False):
+    """
+    Merges return flags into raw order rows and derives the feature columns used downstream.
+
+    With `compact=True` string columns become categoricals and integer/derived float columns are
+    downcast (see `compact_dtypes`); `df_orders` is then converted in place before the merge.
+    """
+    if compact:
+        df_orders = compact_dtypes(df_orders)
+    if df_returns is None:
+        df_returns = pd.DataFrame(columns=["Order ID", "Returned"])
+    # The merge already produces a new frame, so later columns are added to it without further copies
+    df_orders = df_orders.merge(df_returns[["Order ID", "Returned"]], on="Order ID", how="left")
+    if 'Postal Code' in df_orders.columns:
+        del df_orders['Postal Code']
+    df_orders["Returned"] = df_orders["Returned"].fillna("No").astype("category")
+
+    for date_column in ["Order Date", "Ship Date"]:
+        df_orders[date_column] = pd.to_datetime(df_orders[date_column])
+    df_orders["Shipping Duration"] = (df_orders["Ship Date"] - df_orders["Order Date"]).dt.days
+    df_orders["Order Year"] = df_orders["Order Date"].dt.year
+    df_orders["Order Month"] = df_orders["Order Date"].dt.month
+    df_orders['Discount Rate'] = df_orders['Discount'] / (1 - df_orders['Discount'])
+    df_orders['Sales Category'] = pd.cut(df_orders['Sales'], bins=[0, 100, 500, 1000, 100000], labels=['Low', 'Medium', 'High', 'Very High'])
+
+    profit = df_orders['Profit'].to_numpy()
+    df_orders['Profit_log'] = np.where(profit > 0, np.log1p(np.maximum(profit, 0)), profit)
+    epsilon = np.finfo(float).eps
+    df_orders['Sales_log'] = np.log1p(df_orders['Sales'].replace(0, epsilon))
+    quantity = df_orders['Quantity'].to_numpy()
+    df_orders['Quantity_log'] = np.log1p(np.where(quantity == 0, epsilon, quantity))
+
+    if compact:
+        df_orders = compact_dtypes(df_orders)
+    return df_orders
+
+
+# Derived float columns that do not need float64; money columns (Sales, Profit, ...) keep full
+# precision so RFM Monetary sums are unchanged
+_FLOAT32_COLUMNS = ['Postal Code', 'Discount Rate', 'Profit_log', 'Sales_log', 'Quantity_log']
+
+
+def compact_dtypes(df):
+    """
+    Converts string columns to categoricals and downcasts integer and derived float columns, in place.
+
+    Unordered categoricals get sorted categories, so grouping and sorting by them gives the same
+    order as the plain string columns.
+    """
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            if not dtype.ordered and not dtype.categories.is_monotonic_increasing:
+                df[column] = df[column].cat.reorder_categories(dtype.categories.sort_values())
+            continue
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+            continue
+        if pd.api.types.is_integer_dtype(dtype):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+        elif pd.api.types.is_float_dtype(dtype):
+            if column in _FLOAT32_COLUMNS:
+                df[column] = df[column].astype(np.float32)
+        else:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def dtype_memory_report(reference_df, compact_df):
+    """Per-column dtypes and bytes (deep memory usage) of two versions of a frame, with a total row."""
+    report = pd.DataFrame({
+        'dtype_before': reference_df.dtypes.astype(str),
+        'bytes_before': reference_df.memory_usage(index=False, deep=True),
+        'dtype_after': compact_df.dtypes.astype(str),
+        'bytes_after': compact_df.memory_usage(index=False, deep=True),
+    })
+    report.loc['total'] = ['', report['bytes_before'].sum(), '', report['bytes_after'].sum()]
+    report['ratio'] = (report['bytes_after'] / report['bytes_before']).round(3)
+    return report
+
+
+def attach_clusters(df_orders, rfm_df):
+    """
+    Adds each order row's customer cluster from `rfm_df` as an int `Cluster_AE` column.
+
+    The column is added in place; orders of customers without a cluster are dropped. Categorical
+    customer IDs are looked up once per category rather than once per row.
+    """
+    customer_clusters = pd.Series(rfm_df['Cluster_AE'].to_numpy(), index=pd.Index(rfm_df['Customer ID']).astype(object))
+    customer_ids = df_orders['Customer ID']
+    if isinstance(customer_ids.dtype, pd.CategoricalDtype):
+        category_clusters = customer_clusters.reindex(customer_ids.cat.categories.astype(object)).to_numpy(dtype=np.float64)
+        codes = customer_ids.cat.codes.to_numpy()
+        clusters = np.where(codes >= 0, category_clusters[codes], np.nan)
+    else:
+        clusters = customer_ids.map(customer_clusters).to_numpy(dtype=np.float64)
+
+    clustered = ~np.isnan(clusters)
+    if not clustered.all():
+        df_orders = df_orders[clustered].copy()
+        clusters = clusters[clustered]
+    df_orders['Cluster_AE'] = clusters.astype(int)
+    return df_orders
+
+
+def calculate_rfm(df_orders_ca):
+    """Calculates Recency, Frequency, Monetary metrics in a single grouped pass."""
+    df_orders_ca['Order Date'] = pd.to_datetime(df_orders_ca['Order Date'])
+    analysis_date = df_orders_ca['Order Date'].max() + pd.Timedelta(days=1)
+
+    rfm_df = df_orders_ca.groupby('Customer ID', observed=True).agg(
+        Last_Order_Date=('Order Date', 'max'),
+        Frequency=('Order ID', 'nunique'),
+        Monetary=('Sales', 'sum'),
+    ).reset_index()
+    rfm_df.insert(1, 'Recency', (analysis_date - rfm_df.pop('Last_Order_Date')).dt.days)
+    return rfm_df
+
+
+# RFM segment names, indexed by the integer label code produced in `score_rfm`
+RFM_FEATURES = ['Recency', 'Frequency', 'Monetary']
+RFM_SEGMENT_LABELS = ['Champions', 'Loyal Customers', 'Potential Loyalists', 'Big Spenders', 'At Risk', 'Needs Attention', 'Other']
+
+# "RFM_Segment" strings (e.g. "534") looked up by the integer code R*100 + F*10 + M
+_RFM_SEGMENT_STRINGS = np.array([str(code) for code in range(1000)], dtype=object)
+
+
+def compute_rfm_score_bins(rfm_df, segment_count=5):
+    """
+    Returns the quantile bin edges `score_rfm` uses for Recency, Frequency and Monetary.
+
+    The outer edges are open (-inf/inf), so values outside the fitted range still land in the
+    lowest/highest bin when the edges are reused to score new customers.
+    """
+    score_bins = {}
+    for column in ['Recency', 'Frequency', 'Monetary']:
+        _, edges = pd.qcut(rfm_df[column], q=segment_count, retbins=True, duplicates='drop')
+        edges[0], edges[-1] = -np.inf, np.inf
+        score_bins[column] = edges.tolist()
+    return score_bins
+
+
+def score_rfm(rfm_df, segment_count=5, score_bins=None):
+    """
+    Adds R/F/M quantile scores, the RFM segment and its label, and the total RFM score.
+
+    Quantiles are computed from `rfm_df` itself unless frozen `score_bins` (from `compute_rfm_score_bins`)
+    are given, which lets a subset of customers be scored against the original population.
+    """
+    if score_bins is None:
+        score_bins = compute_rfm_score_bins(rfm_df, segment_count)
+    rfm_df['R_Score'] = pd.cut(rfm_df['Recency'], bins=score_bins['Recency'], labels=range(segment_count, 0, -1)).astype(int)
+    rfm_df['F_Score'] = pd.cut(rfm_df['Frequency'], bins=score_bins['Frequency'], labels=range(1, segment_count + 1)).astype(int)
+    rfm_df['M_Score'] = pd.cut(rfm_df['Monetary'], bins=score_bins['Monetary'], labels=range(1, segment_count + 1)).astype(int)
+    r_score, f_score, m_score = (rfm_df[column].to_numpy() for column in ['R_Score', 'F_Score', 'M_Score'])
+
+    # Map RFM Score to a more descriptive segment name
+    # Example RFM segmentation logic (you can customize this); the first matching condition wins,
+    # and any unhandled combination falls through to 'Other'
+    conditions = [
+        (r_score >= 4) & (f_score >= 4) & (m_score >= 4), # Champions
+        (r_score >= 4) & (f_score >= 3),                  # Loyal Customers
+        (r_score >= 3) & (m_score >= 3),                  # Potential Loyalists
+        (r_score <= 2) & (m_score >= 3),                  # Big Spenders
+        (r_score <= 2) & (f_score <= 2),                  # At Risk
+        (r_score >= 3) & (f_score <= 2),                  # Needs Attention
+    ]
+    label_codes = np.select(conditions, np.arange(len(conditions)), default=len(conditions))
+    rfm_df['RFM_Segment_Label'] = pd.Categorical.from_codes(label_codes, categories=RFM_SEGMENT_LABELS)
+
+    rfm_df['RFM_Segment'] = _RFM_SEGMENT_STRINGS[r_score * 100 + f_score * 10 + m_score]
+    rfm_df['RFM_Score'] = r_score + f_score + m_score
+    return rfm_df
+
+
+EMBEDDING_BACKENDS = ("autoencoder", "pca")
+CLUSTERING_ALGORITHMS = ("kmeans", "minibatch")
+
+
+def build_autoencoder(input_dim, latent_dim=2):
+    """Returns an untrained (autoencoder, encoder) pair; the encoder shares the autoencoder's first layers."""
+    from tensorflow.keras.models import Model
+    from tensorflow.keras.layers import Input, Dense
+
+    input_layer = Input(shape=(input_dim,))
+    encoder_layer = Dense(8, activation='relu')(input_layer)
+    encoder_layer = Dense(4, activation='relu')(encoder_layer)
+    latent_space = Dense(latent_dim, activation='relu', name='latent_space')(encoder_layer)
+    decoder_layer = Dense(4, activation='relu')(latent_space)
+    decoder_layer = Dense(8, activation='relu')(decoder_layer)
+    output_layer = Dense(input_dim, activation='linear')(decoder_layer)
+    autoencoder = Model(inputs=input_layer, outputs=output_layer)
+    autoencoder.compile(optimizer='adam', loss='mse')
+    encoder = Model(inputs=input_layer, outputs=latent_space)
+    return autoencoder, encoder
+
+
+def train_encoder(X_scaled, latent_dim=2, max_epochs=TRAINING_MAX_EPOCHS, batch_size=TRAINING_BATCH_SIZE,
+                  patience=EARLY_STOPPING_PATIENCE, validation_fraction=VALIDATION_FRACTION, seed=TRAINING_SEED,
+                  report=None):
+    """
+    Trains the autoencoder on standardized RFM features and returns its encoder.
+
+    Training is seeded (weights, shuffling, the validation split and TensorFlow ops), feeds batches
+    through `tf.data`, and stops once the reconstruction loss on a held-out `validation_fraction` of
+    customers has not improved for `patience` epochs, restoring the best weights. If a `report` dict
+    is given, it is filled with the seed, epochs run, best epoch, wall time and loss curves.
+    """
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(seed)
+    tf.config.experimental.enable_op_determinism()
+    X_scaled = np.asarray(X_scaled, dtype=np.float32)
+    shuffled = np.random.default_rng(seed).permutation(len(X_scaled))
+    n_validation = int(round(len(X_scaled) * validation_fraction))
+    if n_validation == 0 or n_validation == len(X_scaled):
+        n_validation = 0 # Too few customers to hold any out: train on all of them for max_epochs
+    X_train, X_validation = X_scaled[shuffled[n_validation:]], X_scaled[shuffled[:n_validation]]
+
+    train_data = (tf.data.Dataset.from_tensor_slices((X_train, X_train))
+                  .shuffle(len(X_train), seed=seed, reshuffle_each_iteration=True)
+                  .batch(batch_size)
+                  .prefetch(tf.data.AUTOTUNE))
+    validation_data, callbacks = None, []
+    if n_validation:
+        validation_data = tf.data.Dataset.from_tensor_slices((X_validation, X_validation)).batch(batch_size).prefetch(tf.data.AUTOTUNE)
+        callbacks.append(tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True))
+
+    autoencoder, encoder = build_autoencoder(X_scaled.shape[1], latent_dim)
+    start = time.perf_counter()
+    history = autoencoder.fit(train_data, validation_data=validation_data, epochs=max_epochs, callbacks=callbacks, verbose=0)
+    wall_time = time.perf_counter() - start
+
+    if report is not None:
+        loss, validation_loss = history.history['loss'], history.history.get('val_loss', [])
+        report.update({
+            "embedding": "autoencoder",
+            "seed": seed,
+            "latent_dim": latent_dim,
+            "batch_size": batch_size,
+            "max_epochs": max_epochs,
+            "epochs_run": len(loss),
+            "best_epoch": int(np.argmin(validation_loss)) + 1 if validation_loss else len(loss),
+            "train_customers": len(X_train),
+            "validation_customers": n_validation,
+            "wall_time_seconds": round(wall_time, 3),
+            "loss": [float(value) for value in loss],
+            "val_loss": [float(value) for value in validation_loss],
+        })
+    print(f"[INFO] Autoencoder trained for {len(history.history['loss'])} epochs in {wall_time:.1f}s.")
+    return encoder
+
+
+def fit_pca_encoder(X_scaled, latent_dim=2, method="auto", seed=TRAINING_SEED, report=None):
+    """
+    Fits the PCA projection of standardized RFM features and returns it as a linear `NumpyEncoder`.
+    If a `report` dict is given, it is filled with the explained variance ratios and the fit time.
+    """
+    start = time.perf_counter()
+    mean, components, explained_variance_ratio = fit_pca(X_scaled, latent_dim, method, seed)
+    wall_time = time.perf_counter() - start
+    if report is not None:
+        report.update({
+            "embedding": "pca",
+            "method": method,
+            "seed": seed,
+            "latent_dim": latent_dim,
+            "train_customers": len(X_scaled),
+            "explained_variance_ratio": [float(value) for value in explained_variance_ratio],
+            "wall_time_seconds": round(wall_time, 6),
+        })
+    print(f"[INFO] PCA projection fitted in {wall_time * 1000:.1f} ms "
+          f"({explained_variance_ratio.sum():.1%} of the variance kept in {latent_dim} dimensions).")
+    return build_projection_encoder(mean, components)
+
+
+def fit_embedding(X_scaled, backend=EMBEDDING_BACKEND, latent_dim=2, report=None):
+    """Returns the encoder of the chosen embedding backend fitted on standardized RFM features."""
+    if backend == "autoencoder":
+        return train_encoder(X_scaled, latent_dim, report=report)
+    if backend == "pca":
+        return fit_pca_encoder(X_scaled, latent_dim, report=report)
+    raise ValueError(f"Unknown embedding backend '{backend}'; expected one of: {', '.join(EMBEDDING_BACKENDS)}.")
+
+
+def save_keras_encoder(encoder, path):
+    """
+    Saves the encoder as a Keras `.h5` model for the "keras" inference backend. A `NumpyEncoder` (the
+    PCA projection) is rebuilt as the equivalent Dense model first; without TensorFlow installed the
+    `.h5` is skipped (and a stale one removed), leaving the NumPy artifact to serve it.
+    """
+    if isinstance(encoder, NumpyEncoder):
+        try:
+            from tensorflow.keras.models import Sequential
+            from tensorflow.keras.layers import Input, Dense
+        except ImportError:
+            if os.path.exists(path):
+                os.remove(path)
+            print("[WARN] TensorFlow is not installed; the encoder is only saved in the NumPy artifact.")
+            return
+        dense_layers = encoder.dense_layers
+        encoder = Sequential([Input(shape=(dense_layers[0][0].shape[0],))] + [
+            Dense(weights.shape[1], activation=activation) for weights, _, activation in dense_layers
+        ])
+        encoder.set_weights([array for weights, bias, _ in dense_layers for array in (weights, bias)])
+    encoder.save(path)
+
+
+# --- Latent Clustering ---
+
+def iter_latent_chunks(encoder, X_scaled, rows=None, chunk_size=LATENT_CHUNK_SIZE):
+    """Yields the encoder's latent vectors of `X_scaled` (or of its `rows`, in that order) `chunk_size` customers at a time."""
+    n_rows = len(X_scaled) if rows is None else len(rows)
+    for start in range(0, n_rows, chunk_size):
+        chunk = X_scaled[start:start + chunk_size] if rows is None else X_scaled[rows[start:start + chunk_size]]
+        yield encoder.predict(chunk, batch_size=4096, verbose=0)
+
+
+def partial_fit_clusters(kmeans_latent, encoder, X_scaled, batch_size=MINIBATCH_SIZE, n_passes=1,
+                         chunk_size=LATENT_CHUNK_SIZE, seed=42):
+    """
+    Updates a fitted `MiniBatchKMeans` in place with the latent vectors of `X_scaled`, streamed from the
+    encoder in chunks and fed to `partial_fit` in shuffled mini-batches of `batch_size`; returns it.
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(n_passes):
+        for X_latent in iter_latent_chunks(encoder, X_scaled, rng.permutation(len(X_scaled)), chunk_size):
+            for start in range(0, len(X_latent), batch_size):
+                kmeans_latent.partial_fit(X_latent[start:start + batch_size])
+    return kmeans_latent
+
+
+def assign_latent_clusters(kmeans_latent, encoder, X_scaled, chunk_size=LATENT_CHUNK_SIZE):
+    """Returns (labels, inertia) of all customers in `X_scaled`, encoding them chunk by chunk."""
+    labels = np.empty(len(X_scaled), dtype=np.int32)
+    inertia, start = 0.0, 0
+    for X_latent in iter_latent_chunks(encoder, X_scaled, chunk_size=chunk_size):
+        labels[start:start + len(X_latent)] = kmeans_latent.predict(X_latent)
+        inertia -= kmeans_latent.score(X_latent)
+        start += len(X_latent)
+    return labels, inertia
+
+
+def fit_minibatch_kmeans(encoder, X_scaled, n_clusters, batch_size=MINIBATCH_SIZE, n_passes=MINIBATCH_PASSES,
+                         chunk_size=LATENT_CHUNK_SIZE, seed=42):
+    """
+    Fits `MiniBatchKMeans` without materializing the full latent matrix.
+
+    Centroids are seeded with k-means++ on a random sample of customers, then refined by `n_passes`
+    shuffled passes of `partial_fit_clusters`; a last chunked pass sets `labels_` and `inertia_` for
+    every customer, as full `KMeans.fit` would.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(X_scaled), max(3 * batch_size, 10 * n_clusters))
+    sample_rows = np.sort(rng.choice(len(X_scaled), size=sample_size, replace=False))
+    kmeans_latent = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=seed, n_init=3)
+    kmeans_latent.fit(encoder.predict(X_scaled[sample_rows], batch_size=4096, verbose=0))
+    partial_fit_clusters(kmeans_latent, encoder, X_scaled, batch_size, n_passes, chunk_size, seed)
+    kmeans_latent.labels_, kmeans_latent.inertia_ = assign_latent_clusters(kmeans_latent, encoder, X_scaled, chunk_size)
+    return kmeans_latent
+
+
+def fit_clusters(encoder, X_scaled, n_clusters, algorithm=CLUSTERING_ALGORITHM):
+    """Fits the latent clustering of `algorithm` ("kmeans" or "minibatch") to the encoded `X_scaled`."""
+    if algorithm == "minibatch":
+        return fit_minibatch_kmeans(encoder, X_scaled, n_clusters)
+    if algorithm == "kmeans":
+        from sklearn.cluster import KMeans
+
+        X_latent = encoder.predict(X_scaled, batch_size=4096, verbose=0)
+        return KMeans(n_clusters=n_clusters, random_state=42, n_init=10).fit(X_latent)
+    raise ValueError(f"Unknown clustering algorithm '{algorithm}'; expected one of: {', '.join(CLUSTERING_ALGORITHMS)}.")
+
+
+# --- Stable Cluster IDs ---
+
+def load_previous_cluster_model(models_dir=MODELS_DIR):
+    """Returns the (scaler, encoder, kmeans) of the previous training run from its NumPy artifact, or None."""
+    artifact_path = os.path.join(models_dir, NUMPY_ARTIFACT_FILE)
+    return load_numpy_models(artifact_path) if os.path.exists(artifact_path) else None
+
+
+def match_cluster_ids(new_labels, previous_labels, n_clusters):
+    """
+    Maps new cluster IDs to the previous run's IDs: `mapping[new_id]` is the stable ID.
+
+    Both label arrays cover the same customers, so new clusters are matched to previous ones with the
+    Hungarian algorithm to keep as many customers as possible under their previous ID (encoders
+    trained separately do not share a latent coordinate system, so centers cannot be compared).
+    Previous IDs of `n_clusters` or more are never reused; unmatched clusters take the remaining IDs in order.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    n_previous = max(int(previous_labels.max()) + 1, n_clusters) if len(previous_labels) else n_clusters
+    shared = np.zeros((n_clusters, n_previous), dtype=np.int64)
+    np.add.at(shared, (new_labels, previous_labels), 1)
+    new_ids, previous_ids = linear_sum_assignment(shared[:, :n_clusters], maximize=True)
+
+    mapping = np.full(n_clusters, -1, dtype=np.int64)
+    matched = shared[new_ids, previous_ids] > 0
+    mapping[new_ids[matched]] = previous_ids[matched]
+    free_ids = iter(np.setdiff1d(np.arange(n_clusters), mapping))
+    for new_id in range(n_clusters):
+        if mapping[new_id] < 0:
+            mapping[new_id] = next(free_ids)
+    return mapping
+
+
+def align_cluster_ids(kmeans_latent, X_raw, previous_models):
+    """
+    Renumbers a fitted K-Means in place so its clusters keep the IDs the previous run's models
+    (`previous_models` = (scaler, encoder, kmeans), or None to keep IDs as fitted) give the same
+    customers, and returns the aligned labels. `X_raw` holds the customers' raw RFM features.
+    """
+    labels = kmeans_latent.labels_
+    if previous_models is None:
+        return labels
+    previous_scaler, previous_encoder, previous_kmeans = previous_models
+    previous_labels = previous_kmeans.predict(previous_encoder.predict(previous_scaler.transform(X_raw), verbose=0))
+    mapping = match_cluster_ids(labels, previous_labels, kmeans_latent.n_clusters)
+
+    # Center `i` moves to row `mapping[i]`, so `predict` returns the stable IDs from now on
+    centers = np.empty_like(kmeans_latent.cluster_centers_)
+    centers[mapping] = kmeans_latent.cluster_centers_
+    kmeans_latent.cluster_centers_ = centers
+    kmeans_latent.labels_ = mapping[labels]
+    # MiniBatchKMeans keeps per-center sample counts for later `partial_fit` calls; they move with the centers
+    if getattr(kmeans_latent, "_counts", None) is not None:
+        counts = np.empty_like(kmeans_latent._counts)
+        counts[mapping] = kmeans_latent._counts
+        kmeans_latent._counts = counts
+    return kmeans_latent.labels_
+
+
+def save_training_report(report, models_dir=MODELS_DIR):
+    """Writes the training report (embedding backend, epochs, wall time, loss curves) next to the models."""
+    os.makedirs(models_dir, exist_ok=True)
+    with open(os.path.join(models_dir, TRAINING_REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_training_report(models_dir=MODELS_DIR):
+    """The report saved by `save_training_report`, or an empty dict for models trained without one."""
+    try:
+        with open(os.path.join(models_dir, TRAINING_REPORT_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def score_rfm_and_cluster(rfm_df, n_clusters_optimal=3, training_report=None, align_ids=True, embedding=EMBEDDING_BACKEND,
+                          clustering=CLUSTERING_ALGORITHM):
+    """
+    Scores RFM and clusters customers with K-Means in the latent space of the `embedding` backend
+    ("autoencoder" or "pca"; see `fit_embedding`), fitted in full or in mini-batches per `clustering`.
+
+    With `align_ids`, cluster IDs are matched to those of the last saved models (if any) so a retrain
+    does not renumber segments. If a `training_report` dict is given, it is filled by the backend's fit.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    rfm_df = score_rfm(rfm_df)
+
+    rfm_features = list(RFM_FEATURES)
+    X = rfm_df[rfm_features]
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    encoder = fit_embedding(X_scaled, embedding, report=training_report)
+    kmeans_latent = fit_clusters(encoder, X_scaled, n_clusters_optimal, clustering)
+    previous_models = load_previous_cluster_model() if align_ids else None
+    rfm_df['Cluster_AE'] = align_cluster_ids(kmeans_latent, X.to_numpy(dtype=np.float64), previous_models)
+
+    return rfm_df, scaler, encoder, kmeans_latent, rfm_features
+
+
+def save_processed_data(rfm_df, df_orders_ca_with_clusters):
+    """Saves the scored RFM table and the clustered orders as CSV plus columnar copies."""
+    os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
+    rfm_df.to_csv(os.path.join(PROCESSED_DATA_DIR, "rfm_df.csv"), index=False)
+    df_orders_ca_with_clusters.to_csv(os.path.join(PROCESSED_DATA_DIR, "df_orders_ca_with_clusters.csv"), index=False)
+    # Columnar copies that serving processes memory-map instead of parsing the CSVs
+    save_columnar_table(rfm_df, os.path.join(COLUMNAR_DATA_DIR, "rfm_df"))
+    save_columnar_table(df_orders_ca_with_clusters, os.path.join(COLUMNAR_DATA_DIR, "df_orders_ca_with_clusters"))
+
+
+def save_models_and_data(rfm_df, df_orders_ca_with_clusters, scaler, encoder, kmeans_latent):
+    """Saves processed data and trained models."""
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    save_processed_data(rfm_df, df_orders_ca_with_clusters)
+
+    joblib.dump(scaler, os.path.join(MODELS_DIR, "rfm_scaler.joblib"))
+    joblib.dump(kmeans_latent, os.path.join(MODELS_DIR, "kmeans_latent_model.joblib"))
+    save_keras_encoder(encoder, os.path.join(MODELS_DIR, "autoencoder_encoder_model.h5"))
+    export_numpy_artifact(scaler, encoder, kmeans_latent, os.path.join(MODELS_DIR, NUMPY_ARTIFACT_FILE))
+    # Similar-customer index over the latent vectors the encoder just produced
+    build_latent_index(rfm_df, scaler, encoder, RFM_FEATURES).save(os.path.join(MODELS_DIR, LATENT_INDEX_FILE))
+    # New version stamp: serving caches keyed on the previous one stop matching
+    write_model_version(MODELS_DIR)
+    print("[INFO] Models and processed data saved.")
@@ -0,0 +1,90 @@
+# smart_retail_engine/tests/conftest.py
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the project root directory to the Python path to allow imports from 'scripts'
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from scripts.numpy_inference import NumpyEncoder, NumpyKMeans, NumpyScaler
+from scripts.training import RFM_FEATURES, score_rfm
+
+# Purchases per customer of the tiny serving fixture; customers C00-C02, C03-C05 and C06-C08 fall in
+# three clusters. C04 and C05 bought everything their cluster buys (exhausted cluster pool), and C00
+# bought P0, the most popular product overall.
+FIXTURE_PURCHASES = {
+    "C00": ["P0", "P1"], "C01": ["P0", "P2"], "C02": ["P1"],
+    "C03": ["P3"], "C04": ["P3", "P4"], "C05": ["P4", "P3"],
+    "C06": ["P5", "P6", "P7", "P0"], "C07": ["P5", "P0"], "C08": ["P6", "P0"],
+}
+
+
+@pytest.fixture
+def serving_state():
+    """
+    A tiny but complete `ServingState`: NumPy models, RFM table, clustered orders, top items and the
+    derived indexes, built with the same functions as the pipeline.
+    """
+    from scripts.serving import compute_top_items, build_recommendation_index
+    from scripts.serving_state import ServingState
+    from scripts.interactions import InteractionMatrix
+    from scripts.item_similarity import ItemSimilarity
+    from scripts.latent_index import build_latent_index
+
+    customer_ids = list(FIXTURE_PURCHASES)
+    rfm_df = pd.DataFrame({
+        'Customer ID': customer_ids,
+        'Recency': [400, 380, 420, 90, 110, 100, 5, 8, 3],
+        'Frequency': [1, 1, 2, 4, 5, 4, 12, 10, 11],
+        'Monetary': [50.0, 70.0, 60.0, 900.0, 1100.0, 1000.0, 5000.0, 4500.0, 5200.0],
+    })
+    rfm_df = score_rfm(rfm_df)
+
+    X = rfm_df[RFM_FEATURES].to_numpy(dtype=np.float64)
+    scaler = NumpyScaler(X.mean(axis=0), X.std(axis=0))
+    encoder = NumpyEncoder([(np.array([[1.0, 0.5], [-0.5, 1.0], [-0.5, 1.0]], dtype=np.float32), np.zeros(2, dtype=np.float32), "tanh")])
+    # One centroid at each group's first customer
+    kmeans_latent = NumpyKMeans(encoder.predict(scaler.transform(X[[0, 3, 6]])).astype(np.float64))
+    rfm_df['Cluster_AE'] = kmeans_latent.predict(encoder.predict(scaler.transform(X)))
+    assert rfm_df['Cluster_AE'].tolist() == [0, 0, 0, 1, 1, 1, 2, 2, 2]
+
+    clusters = dict(zip(rfm_df['Customer ID'], rfm_df['Cluster_AE']))
+    rows = [(customer_id, product) for customer_id, products in FIXTURE_PURCHASES.items() for product in products]
+    df_orders = pd.DataFrame({
+        'Customer ID': [customer_id for customer_id, _ in rows],
+        'Product Name': [product for _, product in rows],
+        'Product ID': [f"ID-{product}" for _, product in rows],
+        'Order Date': pd.Timestamp('2014-06-01'),
+        'Sales': 100.0,
+        'Quantity': 1,
+    })
+    df_orders['Cluster_AE'] = df_orders['Customer ID'].map(clusters)
+
+    cluster_top_items_dict, overall_top_products = compute_top_items(df_orders)
+    interactions = InteractionMatrix.from_orders(df_orders)
+    return ServingState(
+        "test-version", scaler, encoder, kmeans_latent, rfm_df, df_orders, cluster_top_items_dict, overall_top_products,
+        list(RFM_FEATURES), interactions, ItemSimilarity.from_interactions(interactions),
+        build_latent_index(rfm_df, scaler, encoder, RFM_FEATURES),
+        build_recommendation_index(rfm_df, df_orders, cluster_top_items_dict, overall_top_products, interactions)
+    )
+
+
+@pytest.fixture
+def flask_client(serving_state, monkeypatch):
+    """Test client of the Flask API serving the `serving_state` fixture, without response caching."""
+    from scripts import config, serving_state as serving_state_module
+    from scripts.response_cache import ResponseCache
+
+    # The Flask app loads its state at import time; hand it the fixture instead of the saved models
+    monkeypatch.setattr(serving_state_module, "load_current_state", lambda **kwargs: serving_state)
+    monkeypatch.setattr(config, "MODEL_RELOAD_INTERVAL", 0)
+    app_flask = importlib.import_module("scripts.app_flask")
+    monkeypatch.setattr(app_flask, "serving_state", serving_state)
+    monkeypatch.setattr(app_flask, "response_cache", ResponseCache(0))
+    return app_flask.app.test_client()
@@ -0,0 +1,108 @@
+# smart_retail_engine/tests/test_api_client.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from scripts.api_client import RecommendationClient
+
+
+class FakeAPI(BaseHTTPRequestHandler):
+    """Answers like the recommendation API; the first `failures` requests get a 503."""
+    failures = 0
+    requests_seen = []
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        type(self).requests_seen.append(self.path)
+        if type(self).failures > 0:
+            type(self).failures -= 1
+            return self._send(503, {"error": "Server busy; retry shortly."})
+        customer_id = self.path.rsplit("/", 1)[-1]
+        if customer_id == "slow":
+            time.sleep(0.5)
+            return # the client gave up by now
+        if customer_id == "bad":
+            return self._send(400, {"error": "bad request"})
+        self._send(200, {"customer_id": customer_id, "cluster": 1})
+
+    def do_POST(self):
+        type(self).requests_seen.append(self.path)
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        # IDs starting with "ERR" get the model-error fallback
+        self._send(200, {"results": [
+            {"customer_id": customer_id, "cluster": "Error" if customer_id.startswith("ERR") else 2}
+            for customer_id in payload["customer_ids"]
+        ]})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_url():
+    FakeAPI.failures = 0
+    FakeAPI.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_recent_customers_are_served_from_the_cache(api_url):
+    client = RecommendationClient(api_url, retry_backoff=0)
+    assert client.get_recommendations("AA-1") == {"customer_id": "AA-1", "cluster": 1}
+    assert client.get_recommendations("AA-1") == {"customer_id": "AA-1", "cluster": 1}
+    assert FakeAPI.requests_seen == ["/recommendations/AA-1"]
+
+
+def test_busy_responses_are_retried_a_bounded_number_of_times(api_url):
+    FakeAPI.failures = 2
+    client = RecommendationClient(api_url, retries=2, retry_backoff=0)
+    assert client.get_recommendations("AA-1")["cluster"] == 1
+    assert len(FakeAPI.requests_seen) == 3
+
+    FakeAPI.failures = 5
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_recommendations("AA-2")
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_recommendations("bad") # client errors are raised, not retried or cached
+
+
+def test_prefetch_fetches_uncached_customers_in_batches(api_url):
+    client = RecommendationClient(api_url, retry_backoff=0)
+    client.get_recommendations("AA-1")
+    results = client.prefetch(["AA-1", "AA-2", "AA-3", "AA-2", "AA-4"], batch_size=2)
+
+    assert {customer_id: result["cluster"] for customer_id, result in results.items()} == {"AA-1": 1, "AA-2": 2, "AA-3": 2, "AA-4": 2}
+    assert FakeAPI.requests_seen == ["/recommendations/AA-1", "/recommendations/batch", "/recommendations/batch"]
+    assert client.get_recommendations("AA-4")["cluster"] == 2
+    assert len(FakeAPI.requests_seen) == 3
+
+
+def test_prefetch_does_not_cache_model_error_fallbacks(api_url):
+    client = RecommendationClient(api_url, retry_backoff=0)
+    results = client.prefetch(["AA-1", "ERR-1"])
+    assert {customer_id: result["cluster"] for customer_id, result in results.items()} == {"AA-1": 2, "ERR-1": "Error"}
+
+    assert client.get_recommendations("AA-1")["cluster"] == 2
+    assert client.get_recommendations("ERR-1")["cluster"] == 1 # fetched again instead of replaying the fallback
+    assert FakeAPI.requests_seen == ["/recommendations/batch", "/recommendations/ERR-1"]
+
+
+def test_read_timeouts_are_not_retried(api_url):
+    client = RecommendationClient(api_url, read_timeout=0.1, retries=3, retry_backoff=0)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.get_recommendations("slow")
+    assert FakeAPI.requests_seen == ["/recommendations/slow"]
@@ -0,0 +1,86 @@
+# smart_retail_engine/tests/test_app_asgi.py
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+from starlette.testclient import TestClient
+
+from scripts import app_asgi
+from scripts.async_inference import InferenceExecutor
+from scripts.response_cache import ResponseCache
+
+CUSTOMERS = ["C00", "C04", "C05", "C07", "UNKNOWN"]
+
+
+@pytest.fixture
+def asgi_client(serving_state, monkeypatch):
+    def client(scoring="index"):
+        monkeypatch.setattr(app_asgi, "load_current_state", lambda: serving_state)
+        monkeypatch.setattr(app_asgi, "MODEL_RELOAD_INTERVAL", 0)
+        monkeypatch.setattr(app_asgi, "ASGI_SCORING", scoring)
+        return TestClient(app_asgi.app)
+    return client
+
+
+@pytest.mark.parametrize("scoring", ["index", "live"])
+@pytest.mark.parametrize("source", ["cluster", "item"])
+def test_responses_match_the_flask_app(asgi_client, flask_client, scoring, source):
+    with asgi_client(scoring) as client:
+        for customer_id in CUSTOMERS:
+            path = f"/recommendations/{customer_id}?source={source}"
+            response = client.get(path)
+            assert response.status_code == 200
+            assert response.json() == flask_client.get(path).get_json()
+
+        batch = {"customer_ids": CUSTOMERS + ["C00"], "source": source}
+        assert client.post("/recommendations/batch", json=batch).json() == \
+            flask_client.post("/recommendations/batch", json=batch).get_json()
+
+
+def test_full_executor_returns_503_with_retry_after(asgi_client, monkeypatch):
+    with asgi_client() as client:
+        monkeypatch.setattr(app_asgi, "executor", InferenceExecutor(max_workers=1, max_pending=0))
+        response = client.post("/recommendations/batch", json={"customer_ids": ["C00"]})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert "error" in response.json()
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("get", "/recommendations/C00?source=nope", None),
+    ("get", "/recommendations/C00?purchased_limit=-1", None),
+    ("get", "/customers/C00/similar?k=0", None),
+    ("get", "/customers/C00/similar?k=abc", None),
+    ("post", "/recommendations/batch", {"customer_ids": "C00"}),
+    ("post", "/recommendations/batch", {"customer_ids": ["C00"], "top_n_cluster": "many"}),
+])
+def test_bad_input_returns_400(asgi_client, method, path, body):
+    with asgi_client() as client:
+        response = client.get(path) if method == "get" else client.post(path, json=body)
+        assert response.status_code == 400
+        assert "error" in response.json()
+
+
+class FailingEncoder:
+    def predict(self, X, **kwargs):
+        raise RuntimeError("encoder unavailable")
+
+
+def test_model_error_fallbacks_are_not_cached(serving_state, asgi_client, flask_client, monkeypatch):
+    from scripts import app_flask
+
+    working_encoder = serving_state.encoder
+    monkeypatch.setattr(app_flask, "response_cache", ResponseCache(100))
+    batch = {"customer_ids": ["C00", "C07"]}
+    with asgi_client("live") as client:
+        serving_state.encoder = FailingEncoder()
+        assert client.get("/recommendations/C00").json()["cluster"] == "Error"
+        assert [result["cluster"] for result in client.post("/recommendations/batch", json=batch).json()["results"]] == ["Error"] * 2
+        assert [result["cluster"] for result in flask_client.post("/recommendations/batch", json=batch).get_json()["results"]] == ["Error"] * 2
+        assert len(app_asgi.response_cache) == len(app_flask.response_cache) == 0
+
+        # Once the model works again, the next requests score the customers instead of replaying the fallback
+        serving_state.encoder = working_encoder
+        assert client.get("/recommendations/C00").json()["cluster"] == 0
+        assert [result["cluster"] for result in client.post("/recommendations/batch", json=batch).json()["results"]] == [0, 2]
+        assert [result["cluster"] for result in flask_client.post("/recommendations/batch", json=batch).get_json()["results"]] == [0, 2]
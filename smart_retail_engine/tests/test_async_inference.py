@@ -0,0 +1,98 @@
+# smart_retail_engine/tests/test_async_inference.py
+import asyncio
+import threading
+
+import pytest
+
+from scripts.async_inference import ExecutorBusy, InferenceExecutor, MicroBatcher
+
+
+def test_concurrent_submits_are_scored_in_one_call_per_group():
+    calls = []
+
+    def batch_fn(group, items):
+        calls.append((group, items))
+        return [f"{group}:{item}" for item in items]
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, InferenceExecutor(max_workers=1), max_wait=0.01)
+        results = await asyncio.gather(*(batcher.submit(item, group) for group, item in
+                                         [("a", 1), ("b", 1), ("a", 2), ("a", 1)]))
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == ["a:1", "b:1", "a:2", "a:1"]
+    assert sorted(calls) == [("a", [1, 2]), ("b", [1])]
+    assert stats == {"batches": 2, "items": 4, "rejected": 0, "pending": 0, "max_pending": 1024}
+
+
+def test_items_keep_collecting_while_the_executor_is_busy():
+    release = threading.Event()
+    calls = []
+
+    def batch_fn(group, items):
+        calls.append(items)
+        if len(calls) == 1:
+            release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, InferenceExecutor(max_workers=1), max_wait=0.001, max_batch_size=3)
+        first = asyncio.ensure_future(batcher.submit(0))
+        await asyncio.sleep(0.05) # first batch is now running
+        rest = [asyncio.ensure_future(batcher.submit(item)) for item in range(1, 6)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(first, *rest)
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4, 5]
+    assert calls == [[0], [1, 2, 3], [4, 5]]
+
+
+def test_full_queue_rejects_and_batch_errors_reach_every_caller():
+    release = threading.Event()
+
+    def failing_batch(group, items):
+        raise RuntimeError("model error")
+
+    async def main():
+        executor = InferenceExecutor(max_workers=1, max_pending=1)
+        blocked = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorBusy):
+            await executor.run(sum, [1, 2])
+        release.set()
+        await blocked
+
+        batcher = MicroBatcher(failing_batch, executor)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        return results, executor.stats()
+
+    results, stats = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert (stats["calls"], stats["rejected"], stats["pending"]) == (2, 1, 0)
+
+
+def test_items_beyond_the_pending_cap_are_rejected():
+    release = threading.Event()
+
+    def batch_fn(group, items):
+        release.wait(5)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(batch_fn, InferenceExecutor(max_workers=1), max_wait=0.001, max_pending=2)
+        running = asyncio.ensure_future(batcher.submit(0))
+        await asyncio.sleep(0.05) # the only executor thread is now blocked
+        waiting = [asyncio.ensure_future(batcher.submit(item)) for item in (1, 2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorBusy):
+            await batcher.submit(3)
+        release.set()
+        results = await asyncio.gather(running, *waiting)
+        # Once the waiting items went out in a batch, there is room again
+        return results, await batcher.submit(4), batcher.stats()
+
+    results, late_result, stats = asyncio.run(main())
+    assert results == [0, 1, 2] and late_result == 4
+    assert (stats["rejected"], stats["pending"]) == (1, 0)
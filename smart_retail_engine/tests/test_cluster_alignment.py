@@ -0,0 +1,49 @@
+# smart_retail_engine/tests/test_cluster_alignment.py
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("scipy")
+
+from sklearn.cluster import KMeans
+
+from scripts.training import match_cluster_ids, align_cluster_ids
+
+
+class _Identity:
+    def transform(self, X):
+        return X
+
+    def predict(self, X, verbose=0):
+        return X
+
+
+def _three_blobs():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    return np.concatenate([center + rng.normal(scale=0.5, size=(30, 2)) for center in centers])
+
+
+def test_relabelled_clusters_map_back_to_previous_ids():
+    previous_labels = np.repeat([0, 1, 2], 30)
+    new_labels = np.repeat([2, 0, 1], 30)
+    assert match_cluster_ids(new_labels, previous_labels, 3).tolist() == [1, 2, 0]
+
+
+def test_extra_clusters_take_the_unused_ids():
+    previous_labels = np.repeat([1, 1, 0], 30)
+    new_labels = np.repeat([2, 0, 1], 30)
+    mapping = match_cluster_ids(new_labels, previous_labels, 3)
+    assert sorted(mapping.tolist()) == [0, 1, 2]
+    assert mapping[1] == 0
+
+
+def test_aligned_kmeans_predicts_previous_ids():
+    X = _three_blobs()
+    previous_kmeans = KMeans(n_clusters=3, random_state=0, n_init=10).fit(X)
+    kmeans_latent = KMeans(n_clusters=3, random_state=7, n_init=1, init=X[[60, 0, 30]]).fit(X)
+
+    labels = align_cluster_ids(kmeans_latent, X, (_Identity(), _Identity(), previous_kmeans))
+    assert np.array_equal(labels, previous_kmeans.labels_)
+    assert np.array_equal(kmeans_latent.predict(X), previous_kmeans.labels_)
+    assert align_cluster_ids(kmeans_latent, X, None) is kmeans_latent.labels_
@@ -0,0 +1,77 @@
+# smart_retail_engine/tests/test_columnar_store.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.columnar_store import columnar_table_exists, load_columnar_table, save_columnar_table
+
+
+@pytest.fixture
+def table():
+    return pd.DataFrame({
+        'int8': np.array([1, -2, 3, 127], dtype=np.int8),
+        'int64': np.array([10, 20, 30, 2 ** 40], dtype=np.int64),
+        'float32': np.array([0.5, 1.5, np.nan, -2.0], dtype=np.float32),
+        'float64': [1.25, np.nan, 3.0, 1e300],
+        'bool': [True, False, True, False],
+        'datetime': pd.to_datetime(['2014-01-01T00:00:00', None, '2011-06-30T12:30:00', '2014-12-31T00:00:00']),
+        'strings': pd.Series(['a', None, 'b', 'a'], dtype=object),
+        'mixed_objects': pd.Series(['x', 1, None, 'x'], dtype=object),
+        'category': pd.Categorical(['Low', 'High', None, 'Low'], categories=['Low', 'Medium', 'High']),
+        'ordered': pd.Categorical(['b', 'a', 'c', 'a'], categories=['c', 'b', 'a'], ordered=True),
+        'int_category': pd.Categorical([3, 1, 3, 2]),
+    })
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(table, tmp_path, mmap):
+    save_columnar_table(table, tmp_path / "table")
+    loaded = load_columnar_table(tmp_path / "table", mmap=mmap)
+
+    assert loaded.columns.tolist() == table.columns.tolist()
+    for column in ['int8', 'int64', 'float32', 'float64', 'bool']:
+        assert loaded[column].dtype == table[column].dtype
+        np.testing.assert_array_equal(loaded[column].to_numpy(), table[column].to_numpy())
+    pd.testing.assert_series_equal(loaded['datetime'], table['datetime'].astype('datetime64[ns]'))
+    # Object columns come back dictionary-encoded, with missing values as NaN
+    for column in ['strings', 'mixed_objects']:
+        assert isinstance(loaded[column].dtype, pd.CategoricalDtype)
+        assert loaded[column].astype(object).where(loaded[column].notna(), None).tolist() == \
+            table[column].where(table[column].notna(), None).tolist()
+    for column in ['category', 'ordered', 'int_category']:
+        assert loaded[column].dtype == table[column].dtype
+        np.testing.assert_array_equal(loaded[column].cat.codes.to_numpy(), table[column].cat.codes.to_numpy())
+    # With mmap the columns stay backed by the mapped files
+    assert isinstance(loaded['category'].array.codes, np.memmap) is mmap
+
+
+def test_column_subset_and_replacement(table, tmp_path):
+    save_columnar_table(table, tmp_path / "table")
+    assert load_columnar_table(tmp_path / "table", columns=['bool', 'category']).columns.tolist() == ['bool', 'category']
+
+    save_columnar_table(table[['int64']].iloc[:2], tmp_path / "table")
+    assert load_columnar_table(tmp_path / "table")['int64'].tolist() == [10, 20]
+    assert os.listdir(tmp_path) == ["table"]
+
+
+@pytest.mark.parametrize("values", [
+    pd.to_timedelta([1, 2], unit='D'),
+    pd.to_datetime(['2014-01-01', '2014-01-02']).tz_localize('UTC'),
+    pd.period_range('2014-01', periods=2, freq='M'),
+    pd.interval_range(0, 2),
+    pd.Categorical(pd.to_datetime(['2014-01-01', '2014-01-02'])),
+])
+def test_unsupported_dtypes_are_rejected_before_writing(table, tmp_path, values):
+    save_columnar_table(table, tmp_path / "table")
+    bad_table = pd.DataFrame({'ok': [1, 2], 'bad': values})
+    with pytest.raises(ValueError, match="'bad'"):
+        save_columnar_table(bad_table, tmp_path / "table")
+    with pytest.raises(ValueError, match="'bad'"):
+        save_columnar_table(bad_table, tmp_path / "new_table")
+
+    # Nothing was written, and the previous table is untouched
+    assert os.listdir(tmp_path) == ["table"]
+    assert not columnar_table_exists(tmp_path / "new_table")
+    assert load_columnar_table(tmp_path / "table").columns.tolist() == table.columns.tolist()
@@ -0,0 +1,159 @@
+# smart_retail_engine/tests/test_incremental.py
+import ast
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.numpy_inference import load_numpy_models, NUMPY_ARTIFACT_FILE
+from scripts.training import RFM_FEATURES, score_rfm
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCORE_COLUMNS = ['R_Score', 'F_Score', 'M_Score', 'RFM_Segment', 'RFM_Score', 'RFM_Segment_Label']
+
+
+def order_rows(customer_ids, order_ids, order_dates, product_ids, sales):
+    """Order rows in the Orders sheet layout, one per element of the (equally long) arguments."""
+    order_dates = pd.to_datetime(pd.Series(order_dates))
+    return pd.DataFrame({
+        'Row ID': np.arange(len(customer_ids)) + 1, 'Order ID': order_ids,
+        'Order Date': order_dates, 'Ship Date': order_dates + pd.Timedelta(days=3), 'Ship Mode': 'Standard Class',
+        'Customer ID': customer_ids, 'Customer Name': customer_ids, 'Segment': 'Consumer',
+        'City': 'City', 'State': 'State', 'Country': 'Country', 'Postal Code': np.nan, 'Market': 'Market',
+        'Region': 'Region', 'Product ID': product_ids, 'Category': 'Technology', 'Sub-Category': 'Sub',
+        'Product Name': product_ids, 'Sales': sales, 'Quantity': 1, 'Discount': 0.0,
+        'Profit': np.round(np.asarray(sales) * 0.1, 3), 'Shipping Cost': 1.0, 'Order Priority': 'Medium',
+    })
+
+
+def new_orders(customer_ids, date='2015-01-10', sales=250.0):
+    """One new order per customer on `date`."""
+    return order_rows(customer_ids, [f"N-{customer_id}" for customer_id in customer_ids], [date] * len(customer_ids),
+                      ["P-001"] * len(customer_ids), [sales] * len(customer_ids))
+
+
+@pytest.fixture(scope="module")
+def trained_workspace(tmp_path_factory):
+    """Processed data and models of a full minibatch/PCA training run on 80 synthetic customers."""
+    rng = np.random.default_rng(0)
+    n_rows = 800
+    customers = rng.integers(0, 80, n_rows)
+    orders = order_rows(
+        [f"C-{i:03d}" for i in customers], [f"O-{i:04d}" for i in rng.integers(0, 400, n_rows)],
+        pd.Timestamp('2013-01-01') + pd.to_timedelta(rng.integers(0, 700, n_rows), unit='D'),
+        [f"P-{i:03d}" for i in rng.integers(0, 30, n_rows)], np.round(rng.lognormal(4.0, 1.0, n_rows), 3)
+    )
+    # Lines of one order share its customer and date
+    first_line = orders.groupby('Order ID').head(1).set_index('Order ID')
+    orders['Customer ID'] = orders['Customer Name'] = orders['Order ID'].map(first_line['Customer ID'])
+    orders['Order Date'] = orders['Order ID'].map(first_line['Order Date'])
+    orders['Ship Date'] = orders['Order Date'] + pd.Timedelta(days=3)
+
+    workspace = tmp_path_factory.mktemp("incremental")
+    orders.to_csv(workspace / "orders.csv", index=False)
+    run_pipeline(workspace, "--input", str(workspace / "orders.csv"), "--embedding", "pca", "--clustering", "minibatch")
+    return workspace
+
+
+@pytest.fixture
+def workspace(trained_workspace, tmp_path):
+    """A private copy of the trained workspace, so each refresh starts from the same saved state."""
+    shutil.copytree(trained_workspace, tmp_path, dirs_exist_ok=True)
+    return tmp_path
+
+
+def run_pipeline(workspace, *args):
+    env = dict(os.environ, RETAIL_PROCESSED_DATA_DIR=str(workspace / "processed"), RETAIL_MODELS_DIR=str(workspace / "models"),
+               RETAIL_INFERENCE_BACKEND="numpy", RETAIL_EMBEDDING_BACKEND="autoencoder", TF_CPP_MIN_LOG_LEVEL="3")
+    completed = subprocess.run([sys.executable, os.path.join(project_root, "scripts", "pipeline.py"), *args],
+                               env=env, cwd=project_root, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    return completed.stdout
+
+
+def run_incremental(workspace, orders, *args):
+    """Runs `--incremental` on `orders`; returns (summary dict, stdout)."""
+    orders_path = workspace / "new_orders.csv"
+    orders.to_csv(orders_path, index=False)
+    stdout = run_pipeline(workspace, "--incremental", str(orders_path), *args)
+    summary_line = next(line for line in stdout.splitlines() if "Incremental refresh complete:" in line)
+    return ast.literal_eval(summary_line.split(":", 1)[1].strip()), stdout
+
+
+def read_rfm(workspace):
+    return pd.read_csv(workspace / "processed" / "rfm_df.csv").set_index('Customer ID')
+
+
+def test_already_ingested_rows_are_skipped(workspace):
+    trained_orders = pd.read_csv(workspace / "orders.csv", parse_dates=["Order Date", "Ship Date"])
+    orders = pd.concat([trained_orders.head(5), new_orders(["C-001", "C-002"])], ignore_index=True)
+
+    summary, stdout = run_incremental(workspace, orders)
+    assert "Skipping 5 order rows" in stdout
+    assert summary["new_order_rows"] == 2
+    assert summary["affected_customers"] == 2
+
+    summary, _ = run_incremental(workspace, orders)
+    assert summary["new_order_rows"] == 0
+    assert summary["affected_customers"] == 0
+
+
+def test_only_affected_customers_are_reassigned(workspace):
+    before = read_rfm(workspace)
+    with open(workspace / "processed" / "rfm_score_bins.json") as f:
+        score_bins = json.load(f)
+    affected = ["C-003", "C-004", "C-005"]
+
+    summary, _ = run_incremental(workspace, new_orders(affected, sales=5000.0), "--drift-threshold", "100")
+    after = read_rfm(workspace)
+    untouched = before.index.difference(affected)
+    assert summary["affected_customers"] == 3 and summary["new_customers"] == 0 and not summary["retrained"]
+
+    # The analysis date moved: everyone's Recency changes, only the affected customers' F and M do
+    assert (after.loc[untouched, 'Recency'] > before.loc[untouched, 'Recency']).all()
+    assert after.loc[untouched, 'Frequency'].equals(before.loc[untouched, 'Frequency'])
+    np.testing.assert_allclose(after.loc[untouched, 'Monetary'], before.loc[untouched, 'Monetary'], rtol=1e-9)
+    assert (after.loc[affected, 'Frequency'] == before.loc[affected, 'Frequency'] + 1).all()
+    # Scores of every customer follow the refreshed R/F/M through the frozen bins
+    expected = score_rfm(after[RFM_FEATURES].reset_index(), score_bins=score_bins).set_index('Customer ID')
+    for column in SCORE_COLUMNS:
+        assert after[column].astype(str).tolist() == expected[column].astype(str).tolist(), column
+
+    # Untouched customers keep their cluster; affected ones are assigned by the frozen models
+    assert after.loc[untouched, 'Cluster_AE'].equals(before.loc[untouched, 'Cluster_AE'])
+    scaler, encoder, kmeans_latent = load_numpy_models(str(workspace / "models" / NUMPY_ARTIFACT_FILE))
+    latent = encoder.predict(scaler.transform(after.loc[affected, RFM_FEATURES].to_numpy(dtype=np.float64)))
+    assert after.loc[affected, 'Cluster_AE'].tolist() == kmeans_latent.predict(latent).tolist()
+
+
+def test_drift_above_the_threshold_triggers_a_full_retrain(workspace):
+    summary, stdout = run_incremental(workspace, new_orders(["C-006"]), "--drift-threshold", "0")
+    assert summary["drift"] > 0
+    assert summary["retrained"] and not summary["centroids_updated"]
+    assert "running a full retrain" in stdout
+    # The workspace was trained with PCA, not the configured autoencoder default, and the retrain keeps it
+    with open(workspace / "models" / "training_report.json") as f:
+        assert json.load(f)["embedding"] == "pca"
+
+
+def test_partial_fit_moves_centroids_and_reassigns_everyone(workspace):
+    centers_before = joblib.load(workspace / "models" / "kmeans_latent_model.joblib").cluster_centers_.copy()
+    affected = [f"C-{i:03d}" for i in range(10)]
+
+    summary, _ = run_incremental(workspace, new_orders(affected, sales=8000.0), "--partial-fit", "--drift-threshold", "100")
+    assert summary["centroids_updated"] and not summary["retrained"]
+    kmeans = joblib.load(workspace / "models" / "kmeans_latent_model.joblib")
+    assert not np.allclose(kmeans.cluster_centers_, centers_before)
+
+    # Every customer, touched or not, is assigned by the updated centroids
+    after = read_rfm(workspace)
+    scaler, encoder, kmeans_latent = load_numpy_models(str(workspace / "models" / NUMPY_ARTIFACT_FILE))
+    np.testing.assert_allclose(kmeans_latent.cluster_centers_, kmeans.cluster_centers_, rtol=1e-6)
+    latent = encoder.predict(scaler.transform(after[RFM_FEATURES].to_numpy(dtype=np.float64)))
+    assert after['Cluster_AE'].tolist() == kmeans_latent.predict(latent).tolist()
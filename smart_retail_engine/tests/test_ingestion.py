@@ -0,0 +1,59 @@
+# smart_retail_engine/tests/test_ingestion.py
+import pandas as pd
+import pytest
+
+pytest.importorskip("openpyxl")
+
+from scripts import ingestion
+from scripts.ingestion import load_workbook_tables
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    orders = pd.DataFrame({
+        'Row ID': [1, 2, 3],
+        'Order ID': ['O-1', 'O-1', 'O-2'],
+        'Order Date': pd.to_datetime(['2014-01-03', '2014-01-03', '2014-02-10']),
+        'Ship Date': pd.to_datetime(['2014-01-05', '2014-01-05', '2014-02-11']),
+        'Customer ID': ['C-1', 'C-1', 'C-2'],
+        'Product Name': ['Chair', 'Phone', None],
+        'Sales': [10.5, 20.0, 7.25],
+        'Quantity': [1, 2, 3],
+    })
+    returns = pd.DataFrame({'Returned': ['Yes'], 'Order ID': ['O-2'], 'Market': ['US']})
+    path = tmp_path / "superstore.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        orders.to_excel(writer, sheet_name="Orders", index=False)
+        returns.to_excel(writer, sheet_name="Returns", index=False)
+    return path
+
+
+def test_second_load_reads_cache_without_parsing(workbook, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    parsed_orders, parsed_returns = load_workbook_tables(str(workbook), cache_dir=str(cache_dir))
+
+    def fail_read_excel(*args, **kwargs):
+        raise AssertionError("workbook parsed despite a valid cache entry")
+
+    monkeypatch.setattr(ingestion.pd, "read_excel", fail_read_excel)
+    cached_orders, cached_returns = load_workbook_tables(str(workbook), cache_dir=str(cache_dir))
+    pd.testing.assert_frame_equal(cached_orders, parsed_orders, check_dtype=False)
+    pd.testing.assert_frame_equal(cached_returns, parsed_returns, check_dtype=False)
+    assert cached_orders['Product Name'].isna().tolist() == [False, False, True]
+
+
+def test_changed_workbook_replaces_cache_entry(workbook, tmp_path):
+    cache_dir = tmp_path / "cache"
+    load_workbook_tables(str(workbook), cache_dir=str(cache_dir))
+    first_entries = sorted(p.name for p in cache_dir.iterdir())
+
+    orders = pd.read_excel(workbook, sheet_name="Orders")
+    orders.loc[0, 'Sales'] = 99.0
+    with pd.ExcelWriter(workbook) as writer:
+        orders.to_excel(writer, sheet_name="Orders", index=False)
+        pd.DataFrame({'Returned': [], 'Order ID': [], 'Market': []}).to_excel(writer, sheet_name="Returns", index=False)
+
+    reloaded_orders, _ = load_workbook_tables(str(workbook), cache_dir=str(cache_dir))
+    assert reloaded_orders.loc[0, 'Sales'] == 99.0
+    entries = sorted(p.name for p in cache_dir.iterdir())
+    assert len(entries) == 1 and entries != first_entries
@@ -0,0 +1,56 @@
+# smart_retail_engine/tests/test_instrumentation.py
+import json
+
+from scripts import instrumentation
+from scripts.instrumentation import Histogram, RunReport, histogram_metrics_text, stage
+
+
+def test_histogram_buckets_are_cumulative_in_the_exposition():
+    histogram = Histogram("test_seconds", "Test latencies.", "stage", buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        histogram.observe("encode", value)
+    histogram.observe("scale", 0.01) # upper bounds are inclusive
+
+    text = histogram_metrics_text(histogram)
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="encode",le="0.01"} 1' in text
+    assert 'test_seconds_bucket{stage="encode",le="0.1"} 3' in text
+    assert 'test_seconds_bucket{stage="encode",le="+Inf"} 4' in text
+    assert 'test_seconds_sum{stage="encode"} 3.105000' in text
+    assert 'test_seconds_count{stage="encode"} 4' in text
+    assert 'test_seconds_bucket{stage="scale",le="0.01"} 1' in text
+
+
+def test_disabled_instrumentation_records_nothing(monkeypatch, tmp_path):
+    histogram = Histogram("test_seconds", "Test latencies.", "stage")
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    with stage("encode", histogram):
+        pass
+    report = RunReport()
+    with report.step("calculate_rfm"):
+        pass
+    assert histogram.snapshot() == {}
+    assert report.save(str(tmp_path)) is None
+
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    with stage("encode", histogram):
+        pass
+    assert histogram.snapshot()["encode"][2] == 1
+
+
+def test_run_report_records_each_step(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    report = RunReport()
+    with report.step("load_and_preprocess_data"):
+        data = bytearray(8 * 1024 * 1024)
+    with report.step("calculate_rfm"):
+        del data
+
+    path = report.save(str(tmp_path))
+    with open(path) as f:
+        saved = json.load(f)
+    assert [step["step"] for step in saved["steps"]] == ["load_and_preprocess_data", "calculate_rfm"]
+    assert all(step["seconds"] >= 0 for step in saved["steps"])
+    assert saved["total_seconds"] >= sum(step["seconds"] for step in saved["steps"])
+    if saved["peak_rss_mb"] is not None:
+        assert saved["peak_rss_mb"] == max(step["peak_rss_mb"] for step in saved["steps"])
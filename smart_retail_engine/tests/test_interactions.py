@@ -0,0 +1,46 @@
+# smart_retail_engine/tests/test_interactions.py
+import numpy as np
+import pandas as pd
+
+from scripts.interactions import InteractionMatrix
+from scripts.serving import filter_recommendation_pools
+
+
+def make_orders(n_rows=3000, seed=5):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Customer ID': rng.choice([f"C-{i:03d}" for i in range(200)], n_rows),
+        'Product Name': rng.choice([f"Product {i}" for i in range(60)], n_rows),
+    })
+
+
+def test_matrix_rows_match_unique_purchases(tmp_path):
+    orders = make_orders()
+    interactions = InteractionMatrix.from_orders(orders)
+    for customer_id, products in orders.groupby('Customer ID', sort=False)['Product Name']:
+        assert interactions.purchased_products(customer_id) == products.unique().tolist()
+    assert interactions.data.sum() == len(orders)
+
+    interactions.save(tmp_path / "interactions.npz")
+    loaded = InteractionMatrix.load(tmp_path / "interactions.npz")
+    assert loaded.purchased_products('C-007') == interactions.purchased_products('C-007')
+
+
+def test_filter_pools_matches_set_filter():
+    orders = make_orders()
+    interactions = InteractionMatrix.from_orders(orders)
+    purchased = orders.groupby('Customer ID')['Product Name'].agg(set).to_dict()
+    cluster_top_items = {0: [f"Product {i}" for i in range(20)], 1: [f"Product {i}" for i in range(40, 60)] + ["New Product"]}
+    overall_top = [f"Product {i}" for i in range(10, 30)]
+    customer_ids = ['C-001', 'C-002', 'C-003', 'Unknown']
+    clusters = [0, 1, 7, 0]
+
+    cluster_recs, overall_recs = filter_recommendation_pools(
+        interactions, customer_ids, clusters, cluster_top_items, overall_top, top_n_cluster=3, top_n_overall=4
+    )
+    for customer_id, cluster, cluster_rec, overall_rec in zip(customer_ids, clusters, cluster_recs, overall_recs):
+        bought = purchased.get(customer_id, set())
+        expected_cluster = [p for p in cluster_top_items.get(cluster, []) if p not in bought][:3]
+        expected_overall = [p for p in overall_top if p not in bought and p not in expected_cluster][:4]
+        assert cluster_rec == expected_cluster
+        assert overall_rec == expected_overall
@@ -0,0 +1,44 @@
+# smart_retail_engine/tests/test_item_similarity.py
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("scipy")
+
+from scripts.interactions import InteractionMatrix
+from scripts.item_similarity import ItemSimilarity
+
+
+def make_interactions(n_rows=4000, seed=11):
+    rng = np.random.default_rng(seed)
+    return InteractionMatrix.from_orders(pd.DataFrame({
+        'Customer ID': rng.choice([f"C-{i:03d}" for i in range(300)], n_rows),
+        'Product Name': rng.choice([f"Product {i}" for i in range(50)], n_rows, p=np.linspace(2, 1, 50) / 75),
+    }))
+
+
+def test_neighbours_and_recommendations_match_dense_cosine():
+    interactions = make_interactions()
+    model = ItemSimilarity.from_interactions(interactions, n_neighbours=8)
+
+    bought = interactions.to_scipy(binary=True).toarray().astype(np.float64)
+    co_purchases = bought.T @ bought
+    buyers = np.diag(co_purchases).copy()
+    cosine = co_purchases / np.sqrt(np.outer(buyers, buyers))
+    np.fill_diagonal(cosine, 0)
+    codes = np.arange(cosine.shape[0])
+    truncated = np.zeros_like(cosine)
+    for product in codes:
+        expected = [c for c in np.lexsort((codes, -cosine[product])) if cosine[product, c] > 0][:8]
+        assert model.neighbours[product, :len(expected)].tolist() == expected
+        np.testing.assert_allclose(model.scores[product, :len(expected)], cosine[product, expected], rtol=1e-6)
+        truncated[product, expected] = model.scores[product, :len(expected)]
+
+    positions = np.append(np.arange(interactions.shape[0]), -1)
+    recommendations = model.recommend(interactions, positions, top_n=4)
+    assert recommendations[-1] == []
+    for position in positions[:-1]:
+        scores = bought[position] @ truncated
+        scores[bought[position] > 0] = 0
+        expected = [c for c in np.lexsort((codes, -scores)) if scores[c] > 0][:4]
+        assert recommendations[position] == interactions.product_index.take(expected).tolist()
@@ -0,0 +1,29 @@
+# smart_retail_engine/tests/test_latent_index.py
+import numpy as np
+import pytest
+
+from scripts.latent_index import LatentNeighbourIndex
+
+
+@pytest.mark.parametrize("points", [
+    np.random.default_rng(1).normal(size=(3000, 2)),
+    # ReLU latent spaces put many customers on exactly the same coordinates
+    np.maximum(np.random.default_rng(2).normal(size=(3000, 2)) * [3, 0.5], 0),
+])
+def test_similar_customers_match_brute_force(points, tmp_path):
+    customer_ids = [f"C-{i}" for i in range(len(points))]
+    index = LatentNeighbourIndex.from_points(points, customer_ids, points_per_cell=4)
+    index.save(tmp_path / "latent.npz")
+    index = LatentNeighbourIndex.load(tmp_path / "latent.npz")
+
+    for position in np.random.default_rng(3).integers(0, len(points), 50):
+        distances = np.sqrt(((points - points[position]) ** 2).sum(axis=1))
+        distances[position] = np.inf
+        neighbours = index.similar_customers(customer_ids[position], k=7)
+        assert len(neighbours) == 7 and customer_ids[position] not in [customer_id for customer_id, _ in neighbours]
+        np.testing.assert_allclose([distance for _, distance in neighbours], np.sort(distances)[:7])
+
+    far_away = np.full(2, 25.0)
+    _, distances = index.query(far_away, k=3)
+    np.testing.assert_allclose(distances, np.sort(np.sqrt(((points - far_away) ** 2).sum(axis=1)))[:3])
+    assert index.similar_customers("unknown", k=3) is None
@@ -0,0 +1,56 @@
+# smart_retail_engine/tests/test_minibatch_clustering.py
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.cluster import KMeans
+
+from scripts.numpy_inference import NumpyEncoder, NumpyScaler, NumpyKMeans
+from scripts.training import fit_minibatch_kmeans, partial_fit_clusters, match_cluster_ids, align_cluster_ids
+
+# Keeps the first two standardized features as the "latent" vector
+ENCODER = NumpyEncoder([(np.eye(3, 2, dtype=np.float32), np.zeros(2, dtype=np.float32), "linear")])
+
+
+def _blobs(n_per_blob=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.normal(center, 0.5, size=(n_per_blob, 3)) for center in (0.0, 4.0, 8.0)])
+
+
+def test_chunked_minibatch_fit_matches_full_kmeans():
+    X = _blobs()
+    kmeans_latent = fit_minibatch_kmeans(ENCODER, X, 3, batch_size=256, chunk_size=1000)
+    full = KMeans(n_clusters=3, random_state=42, n_init=10).fit(ENCODER.predict(X))
+
+    assert kmeans_latent.labels_.shape == (len(X),)
+    mapping = match_cluster_ids(kmeans_latent.labels_, full.labels_, 3)
+    assert (mapping[kmeans_latent.labels_] == full.labels_).mean() > 0.999
+    assert kmeans_latent.inertia_ == pytest.approx(full.inertia_, rel=0.01)
+    np.testing.assert_array_equal(kmeans_latent.predict(ENCODER.predict(X)), kmeans_latent.labels_)
+
+
+def test_partial_fit_moves_centroids_towards_new_customers():
+    X = _blobs()
+    kmeans_latent = fit_minibatch_kmeans(ENCODER, X, 3, batch_size=256, chunk_size=1000)
+    counts_before = kmeans_latent._counts.copy()
+    shifted = X[kmeans_latent.labels_ == 0] + 1.0
+    center_before = kmeans_latent.cluster_centers_[0].copy()
+
+    partial_fit_clusters(kmeans_latent, ENCODER, shifted, batch_size=256, chunk_size=1000)
+    assert kmeans_latent._counts[0] > counts_before[0]
+    assert (kmeans_latent.cluster_centers_[0] > center_before).all()
+
+
+def test_alignment_keeps_minibatch_counts_with_their_centers():
+    X = _blobs()
+    kmeans_latent = fit_minibatch_kmeans(ENCODER, X, 3, batch_size=256, chunk_size=1000)
+    pairs_before = {tuple(np.round(center, 6)): count for center, count in zip(kmeans_latent.cluster_centers_, kmeans_latent._counts)}
+    # Previous model numbering the blobs in reverse order
+    previous_centers = kmeans_latent.cluster_centers_[[2, 1, 0]]
+    previous_models = (NumpyScaler(np.zeros(3), np.ones(3)), ENCODER, NumpyKMeans(previous_centers))
+
+    labels = align_cluster_ids(kmeans_latent, X, previous_models)
+    np.testing.assert_array_equal(labels, previous_models[2].predict(ENCODER.predict(X)))
+    pairs_after = {tuple(np.round(center, 6)): count for center, count in zip(kmeans_latent.cluster_centers_, kmeans_latent._counts)}
+    assert pairs_after == pairs_before
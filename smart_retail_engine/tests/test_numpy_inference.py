@@ -0,0 +1,69 @@
+# smart_retail_engine/tests/test_numpy_inference.py
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.numpy_inference import NUMPY_ARTIFACT_FILE, export_numpy_artifact, load_numpy_models
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MODELS_DIR = os.path.join(PROJECT_ROOT, 'models')
+RFM_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'rfm_df.csv')
+RFM_FEATURES = ['Recency', 'Frequency', 'Monetary']
+
+
+@pytest.fixture(scope="module")
+def keras_models():
+    pytest.importorskip("tensorflow")
+    joblib = pytest.importorskip("joblib")
+    from tensorflow.keras.models import load_model
+
+    scaler = joblib.load(os.path.join(MODELS_DIR, "rfm_scaler.joblib"))
+    encoder = load_model(os.path.join(MODELS_DIR, "autoencoder_encoder_model.h5"), compile=False)
+    kmeans_latent = joblib.load(os.path.join(MODELS_DIR, "kmeans_latent_model.joblib"))
+    return scaler, encoder, kmeans_latent
+
+
+@pytest.fixture(scope="module")
+def rfm_values():
+    return pd.read_csv(RFM_PATH)[RFM_FEATURES].values
+
+
+def test_exported_artifact_matches_keras_outputs(keras_models, rfm_values, tmp_path):
+    scaler, encoder, kmeans_latent = keras_models
+    artifact_path = tmp_path / NUMPY_ARTIFACT_FILE
+    export_numpy_artifact(scaler, encoder, kmeans_latent, artifact_path)
+    np_scaler, np_encoder, np_kmeans = load_numpy_models(artifact_path)
+
+    scaled = scaler.transform(rfm_values)
+    np.testing.assert_allclose(np_scaler.transform(rfm_values), scaled, rtol=1e-12)
+
+    latent = encoder.predict(scaled, verbose=0)
+    np_latent = np_encoder.predict(np_scaler.transform(rfm_values))
+    np.testing.assert_allclose(np_latent, latent, rtol=1e-5, atol=1e-6)
+
+    np.testing.assert_array_equal(np_kmeans.predict(np_latent), kmeans_latent.predict(latent))
+
+
+def test_committed_artifact_matches_committed_models(keras_models, rfm_values):
+    scaler, encoder, kmeans_latent = keras_models
+    np_scaler, np_encoder, np_kmeans = load_numpy_models(os.path.join(MODELS_DIR, NUMPY_ARTIFACT_FILE))
+
+    expected = kmeans_latent.predict(encoder.predict(scaler.transform(rfm_values), verbose=0))
+    actual = np_kmeans.predict(np_encoder.predict(np_scaler.transform(rfm_values)))
+    np.testing.assert_array_equal(actual, expected)
+    # The committed clusters in rfm_df.csv were produced by the same models
+    np.testing.assert_array_equal(actual, pd.read_csv(RFM_PATH)['Cluster_AE'].values)
+
+
+def test_numpy_inference_does_not_import_tensorflow():
+    code = (
+        "import sys\n"
+        "from scripts.numpy_inference import load_numpy_models\n"
+        f"load_numpy_models({os.path.join(MODELS_DIR, NUMPY_ARTIFACT_FILE)!r})\n"
+        "assert 'tensorflow' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
@@ -0,0 +1,53 @@
+# smart_retail_engine/tests/test_preprocessing.py
+import numpy as np
+import pandas as pd
+
+from scripts.training import preprocess_orders, calculate_rfm, dtype_memory_report, attach_clusters
+
+
+def make_raw_orders(n_rows=5000, seed=3):
+    rng = np.random.default_rng(seed)
+    order_dates = pd.Timestamp('2013-01-01') + pd.to_timedelta(rng.integers(0, 1000, n_rows), unit='D')
+    return pd.DataFrame({
+        'Row ID': np.arange(1, n_rows + 1),
+        'Order ID': [f"O-{i:05d}" for i in rng.integers(0, 1500, n_rows)],
+        'Order Date': order_dates,
+        'Ship Date': order_dates + pd.to_timedelta(rng.integers(0, 6, n_rows), unit='D'),
+        # Customers appear out of lexical order, as they do in categoricals built from the data
+        'Customer ID': rng.choice([f"C-{i:03d}" for i in range(300, 0, -1)], n_rows),
+        'Product Name': rng.choice([f"Product {i}" for i in range(80)], n_rows),
+        'Region': rng.choice(['East', 'West', 'Central'], n_rows),
+        'Postal Code': np.nan,
+        'Sales': rng.lognormal(4, 1, n_rows).round(3),
+        'Quantity': rng.integers(0, 10, n_rows),
+        'Discount': rng.choice([0, 0.1, 0.2], n_rows),
+        'Profit': rng.normal(10, 40, n_rows).round(3),
+    })
+
+
+def test_compact_preprocessing_keeps_values_and_rfm():
+    raw = make_raw_orders()
+    returns = pd.DataFrame({'Returned': ['Yes', 'Yes'], 'Order ID': ['O-00001', 'O-00002']})
+    reference = preprocess_orders(raw.copy(), returns)
+    compact_raw = raw.copy()
+    # Categories in order of appearance, as loaded from the columnar ingestion cache
+    compact_raw['Customer ID'] = pd.Categorical(raw['Customer ID'], categories=raw['Customer ID'].unique())
+    compact = preprocess_orders(compact_raw, returns, compact=True)
+
+    pd.testing.assert_frame_equal(reference, compact, check_dtype=False, check_categorical=False, rtol=1e-6)
+    pd.testing.assert_frame_equal(calculate_rfm(reference), calculate_rfm(compact), check_dtype=False, check_categorical=False)
+    report = dtype_memory_report(reference, compact)
+    assert report.loc['total', 'bytes_after'] < report.loc['total', 'bytes_before']
+
+
+def test_attach_clusters_matches_merge():
+    orders = preprocess_orders(make_raw_orders())
+    rfm_df = calculate_rfm(orders.copy()).iloc[10:] # some customers without a cluster
+    rfm_df['Cluster_AE'] = np.arange(len(rfm_df)) % 3
+
+    merged = pd.merge(orders, rfm_df[['Customer ID', 'Cluster_AE']], on='Customer ID', how='left').dropna(subset=['Cluster_AE'])
+    merged['Cluster_AE'] = merged['Cluster_AE'].astype(int)
+    for frame in (orders.copy(), orders.astype({'Customer ID': 'category'})):
+        attached = attach_clusters(frame, rfm_df)
+        assert attached['Cluster_AE'].tolist() == merged['Cluster_AE'].tolist()
+        assert attached['Row ID'].tolist() == merged['Row ID'].tolist()
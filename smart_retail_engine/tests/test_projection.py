@@ -0,0 +1,47 @@
+# smart_retail_engine/tests/test_projection.py
+import numpy as np
+import pytest
+
+from scripts.numpy_inference import export_numpy_artifact, load_numpy_models, NumpyScaler, NumpyKMeans
+from scripts.projection import fit_pca, build_projection_encoder
+
+
+def _correlated_rfm(n_samples=500, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(n_samples, 2))
+    X = np.column_stack([base[:, 0], 0.8 * base[:, 0] + 0.2 * base[:, 1], base[:, 1] + 0.1 * rng.normal(size=n_samples)])
+    return (X - X.mean(axis=0)) / X.std(axis=0)
+
+
+def test_pca_matches_scikit_learn_up_to_sign():
+    decomposition = pytest.importorskip("sklearn.decomposition")
+    X = _correlated_rfm()
+    mean, components, explained_variance_ratio = fit_pca(X, 2)
+    reference = decomposition.PCA(n_components=2).fit(X)
+
+    signs = np.sign((components * reference.components_).sum(axis=1))
+    np.testing.assert_allclose(components, reference.components_ * signs[:, None], atol=1e-10)
+    np.testing.assert_allclose(explained_variance_ratio, reference.explained_variance_ratio_, rtol=1e-10)
+    assert (components[np.arange(2), np.abs(components).argmax(axis=1)] > 0).all()
+
+
+def test_randomized_svd_recovers_the_exact_components():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 3)) @ rng.normal(size=(3, 150)) + 0.01 * rng.normal(size=(300, 150))
+    _, exact, exact_ratio = fit_pca(X, 2, method="exact")
+    _, randomized, randomized_ratio = fit_pca(X, 2, method="randomized")
+    np.testing.assert_allclose(np.abs((exact * randomized).sum(axis=1)), 1, atol=1e-6)
+    np.testing.assert_allclose(randomized_ratio, exact_ratio, rtol=1e-6)
+
+
+def test_projection_encoder_round_trips_through_the_numpy_artifact(tmp_path):
+    X = _correlated_rfm()
+    mean, components, _ = fit_pca(X, 2)
+    encoder = build_projection_encoder(mean, components)
+    np.testing.assert_allclose(encoder.predict(X), (X - mean) @ components.T, atol=1e-5)
+
+    scaler = NumpyScaler(np.zeros(3), np.ones(3))
+    kmeans_latent = NumpyKMeans(np.array([[-1.0, 0.0], [1.0, 0.0]]))
+    export_numpy_artifact(scaler, encoder, kmeans_latent, tmp_path / "artifact.npz")
+    _, loaded_encoder, _ = load_numpy_models(tmp_path / "artifact.npz")
+    np.testing.assert_array_equal(loaded_encoder.predict(X), encoder.predict(X))
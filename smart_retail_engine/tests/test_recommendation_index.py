@@ -0,0 +1,41 @@
+# smart_retail_engine/tests/test_recommendation_index.py
+import pytest
+
+from scripts.serving import get_recommendations_for_customer, get_recommendations_from_index
+
+
+def live_recommendations(state, customer_id, **kwargs):
+    return get_recommendations_for_customer(
+        customer_id, state.rfm_df, state.df_orders_clustered, state.scaler, state.encoder, state.kmeans_latent,
+        state.cluster_top_items_dict, state.overall_top_products, state.rfm_features, **kwargs
+    )
+
+
+@pytest.mark.parametrize("customer_id", [
+    "C01",      # known customer
+    "UNKNOWN",  # not in the RFM table
+    "C04",      # bought everything their cluster buys
+    "C00",      # bought P0, the most popular product overall
+])
+@pytest.mark.parametrize("top_n_cluster, top_n_overall", [(5, 5), (1, 2)])
+@pytest.mark.parametrize("use_interactions", [True, False])
+def test_index_answers_match_live_scoring(serving_state, customer_id, top_n_cluster, top_n_overall, use_interactions):
+    indexed = get_recommendations_from_index(
+        customer_id, serving_state.recommendation_index, serving_state.overall_top_products,
+        top_n_cluster=top_n_cluster, top_n_overall=top_n_overall
+    )
+    live = live_recommendations(
+        serving_state, customer_id, top_n_cluster=top_n_cluster, top_n_overall=top_n_overall,
+        interactions=serving_state.interactions if use_interactions else None
+    )
+    assert indexed == live
+
+
+def test_fixture_covers_the_edge_cases(serving_state):
+    exhausted = live_recommendations(serving_state, "C04")
+    assert exhausted["cluster_based_recommendations"] == []
+    assert exhausted["recommendation_source"].startswith("Popularity-based (Cluster recommendations exhausted")
+
+    overlap = live_recommendations(serving_state, "C00")
+    assert serving_state.overall_top_products[0] == "P0" and "P0" in overlap["purchased_products"]
+    assert "P0" not in overlap["overall_popular_recommendations"] + overlap["cluster_based_recommendations"]
@@ -0,0 +1,107 @@
+# smart_retail_engine/tests/test_recommendations.py
+import json
+
+import pandas as pd
+import pytest
+
+from scripts import pipeline
+from scripts.serving import get_recommendations_for_customer, get_recommendations_for_customers, parse_batch_request
+
+# Known customers of every cluster (C04/C05 exhaust their cluster pool), an unknown ID and a duplicate
+CUSTOMER_IDS = ["C00", "C01", "C04", "C05", "C07", "UNKNOWN", "C04"]
+
+
+def model_arguments(state):
+    return (state.rfm_df, state.df_orders_clustered, state.scaler, state.encoder, state.kmeans_latent,
+            state.cluster_top_items_dict, state.overall_top_products, state.rfm_features)
+
+
+@pytest.mark.parametrize("use_interactions", [True, False])
+@pytest.mark.parametrize("top_n_cluster, top_n_overall", [(5, 5), (1, 2), (0, 0)])
+def test_batch_matches_single_customer_lookups(serving_state, use_interactions, top_n_cluster, top_n_overall):
+    interactions = serving_state.interactions if use_interactions else None
+    batch = get_recommendations_for_customers(
+        CUSTOMER_IDS, *model_arguments(serving_state), top_n_cluster=top_n_cluster, top_n_overall=top_n_overall,
+        interactions=interactions
+    )
+    assert [result["customer_id"] for result in batch] == CUSTOMER_IDS
+    for customer_id, result in zip(CUSTOMER_IDS, batch):
+        single = get_recommendations_for_customer(
+            customer_id, *model_arguments(serving_state), top_n_cluster=top_n_cluster, top_n_overall=top_n_overall,
+            interactions=interactions
+        )
+        assert result == single
+
+
+def test_item_similarity_requires_a_matching_interaction_matrix(serving_state):
+    # Built from only the requested customers' orders, the matrix misses products the model knows
+    with pytest.raises(ValueError, match="product vocabulary"):
+        get_recommendations_for_customers(
+            ["C00", "C04"], *model_arguments(serving_state), item_similarity=serving_state.item_similarity
+        )
+
+
+@pytest.mark.parametrize("payload, message", [
+    (None, "'customer_ids' as a list of strings"),
+    ({"customer_ids": "C00"}, "'customer_ids' as a list of strings"),
+    ({"customer_ids": ["C00", 7]}, "'customer_ids' as a list of strings"),
+    ({"customer_ids": ["C00"] * 4}, "At most 3 customer IDs"),
+    ({"customer_ids": ["C00"], "top_n_cluster": "many"}, "non-negative integers"),
+    ({"customer_ids": ["C00"], "top_n_overall": None}, "non-negative integers"),
+    ({"customer_ids": ["C00"], "top_n_cluster": -1}, "non-negative integers"),
+    ({"customer_ids": ["C00"], "top_n_item": "-2"}, "non-negative integers"),
+    ({"customer_ids": ["C00"], "source": "random"}, "'source' must be one of"),
+])
+def test_invalid_batch_requests_are_rejected(payload, message):
+    with pytest.raises(ValueError, match=message):
+        parse_batch_request(payload, max_customers=3)
+
+
+def test_batch_request_defaults_and_coercion():
+    assert parse_batch_request({"customer_ids": []}, 3) == ([], "cluster", 5, 5, 5)
+    assert parse_batch_request({"customer_ids": ["C00"], "top_n_cluster": "0", "source": "item", "top_n_item": 2}, 3) == \
+        (["C00"], "item", 0, 5, 2)
+
+
+def test_batch_endpoint(serving_state, flask_client):
+    response = flask_client.post("/recommendations/batch", json={"customer_ids": CUSTOMER_IDS, "top_n_cluster": 1})
+    assert response.status_code == 200
+    expected = get_recommendations_for_customers(
+        CUSTOMER_IDS, *model_arguments(serving_state), top_n_cluster=1, interactions=serving_state.interactions
+    )
+    assert response.get_json() == {"results": expected}
+
+    response = flask_client.post("/recommendations/batch", json={"customer_ids": ["C00"], "top_n_overall": -1})
+    assert response.status_code == 400
+    assert "non-negative" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("file_name", ["recommendations.csv", "recommendations.parquet"])
+@pytest.mark.parametrize("source", ["cluster", "item"])
+def test_export_matches_batch_recommendations(serving_state, monkeypatch, tmp_path, file_name, source):
+    state = serving_state
+    monkeypatch.setattr(pipeline, "load_models_and_data", lambda: (
+        state.scaler, state.encoder, state.kmeans_latent, state.rfm_df, state.df_orders_clustered,
+        state.cluster_top_items_dict, state.overall_top_products, state.rfm_features
+    ))
+    monkeypatch.setattr(pipeline, "load_interaction_matrix", lambda: state.interactions)
+    monkeypatch.setattr(pipeline, "load_item_similarity", lambda: state.item_similarity)
+
+    output_path = str(tmp_path / file_name)
+    pipeline.export_recommendations(output_path, top_n_cluster=2, chunk_size=4, source=source, top_n_item=2)
+    exported = pd.read_csv(output_path) if file_name.endswith(".csv") else pd.read_parquet(output_path)
+
+    customer_ids = state.rfm_df['Customer ID'].tolist()
+    expected = get_recommendations_for_customers(
+        customer_ids, *model_arguments(state), top_n_cluster=2, interactions=state.interactions,
+        item_similarity=state.item_similarity if source == "item" else None, top_n_item=2
+    )
+    assert exported['customer_id'].tolist() == customer_ids
+    for column in ['cluster_based_recommendations', 'overall_popular_recommendations', 'item_based_recommendations']:
+        if source == "cluster" and column == 'item_based_recommendations':
+            assert column not in exported.columns
+            continue
+        values = exported[column].map(json.loads if file_name.endswith(".csv") else list).tolist()
+        assert values == [result[column] for result in expected], column
+    assert exported['cluster'].tolist() == [result["cluster"] for result in expected]
+    assert 'purchased_products' not in exported.columns
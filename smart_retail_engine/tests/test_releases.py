@@ -0,0 +1,89 @@
+# smart_retail_engine/tests/test_releases.py
+import os
+
+import pandas as pd
+import pytest
+
+from scripts.columnar_store import save_columnar_table
+from scripts.model_version import write_model_version
+from scripts.releases import current_release, list_releases, publish_release, release_dirs, set_current_release
+from scripts.serving_state import ModelWatcher
+
+
+def _write_artifacts(root, scaler_bytes):
+    models_dir, processed_dir = os.path.join(root, "models"), os.path.join(root, "processed")
+    os.makedirs(models_dir, exist_ok=True)
+    os.makedirs(processed_dir, exist_ok=True)
+    with open(os.path.join(models_dir, "rfm_scaler.joblib"), "wb") as f:
+        f.write(scaler_bytes)
+    save_columnar_table(pd.DataFrame({"Customer ID": ["A", "B"], "Cluster_AE": [0, 1]}), os.path.join(processed_dir, "columnar", "rfm_df"))
+    pd.DataFrame({"Customer ID": ["A"], "Product ID": ["P1"]}).to_csv(
+        os.path.join(processed_dir, "df_orders_ca_with_clusters.csv"), index=False
+    )
+    write_model_version(models_dir)
+    return models_dir, processed_dir
+
+
+def test_publish_snapshots_artifacts_and_flips_current(tmp_path):
+    releases_dir = str(tmp_path / "releases")
+    assert current_release(releases_dir) is None
+
+    models_dir, processed_dir = _write_artifacts(str(tmp_path / "work"), b"v1")
+    first = publish_release(models_dir, processed_dir, releases_dir, keep=2)
+    assert current_release(releases_dir) == first
+
+    # Rewriting the working artifacts leaves the published release untouched
+    _write_artifacts(str(tmp_path / "work"), b"v2")
+    release_models_dir, release_processed_dir = release_dirs(first, releases_dir)
+    with open(os.path.join(release_models_dir, "rfm_scaler.joblib"), "rb") as f:
+        assert f.read() == b"v1"
+    assert os.path.exists(os.path.join(release_processed_dir, "columnar", "rfm_df"))
+    assert os.path.exists(os.path.join(release_processed_dir, "df_orders_ca_with_clusters.csv"))
+
+    second = publish_release(models_dir, processed_dir, releases_dir, keep=2)
+    assert current_release(releases_dir) == second
+    set_current_release(first, releases_dir) # roll back
+    assert current_release(releases_dir) == first
+    with pytest.raises(FileNotFoundError):
+        set_current_release("missing", releases_dir)
+
+
+def test_publish_keeps_only_the_newest_releases(tmp_path):
+    releases_dir = str(tmp_path / "releases")
+    versions = []
+    for i in range(4):
+        models_dir, processed_dir = _write_artifacts(str(tmp_path / "work"), str(i).encode())
+        versions.append(publish_release(models_dir, processed_dir, releases_dir, keep=2))
+    assert list_releases(releases_dir) == versions[-2:]
+    assert current_release(releases_dir) == versions[-1]
+
+
+class FakeState:
+    def __init__(self, version):
+        self.version = version
+
+
+def test_watcher_swaps_new_releases_and_keeps_serving_after_a_failed_load(tmp_path):
+    releases_dir = str(tmp_path / "releases")
+    for name in ("v1", "v2", "v3"):
+        os.makedirs(os.path.join(releases_dir, name))
+    set_current_release("v1", releases_dir)
+    served, attempts = [], []
+
+    def load(version, releases_dir):
+        attempts.append(version)
+        if version == "v2":
+            raise OSError("truncated artifact")
+        return FakeState(version)
+
+    watcher = ModelWatcher("v1", served.append, interval=60, releases_dir=releases_dir, load=load)
+    assert not watcher.check()
+
+    set_current_release("v2", releases_dir)
+    assert not watcher.check() and not watcher.check() # not retried until CURRENT changes
+    assert (watcher.current_version, watcher.reload_failures, attempts) == ("v1", 1, ["v2"])
+
+    set_current_release("v3", releases_dir)
+    assert watcher.check()
+    assert [state.version for state in served] == ["v3"]
+    assert (watcher.current_version, watcher.reloads) == ("v3", 1)
@@ -0,0 +1,75 @@
+# smart_retail_engine/tests/test_response_cache.py
+from scripts.model_version import UNVERSIONED, read_model_version, write_model_version
+from scripts.response_cache import InMemoryCacheBackend, ResponseCache, cache_metrics_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingBackend:
+    def get(self, key):
+        raise ConnectionError("backend down")
+
+    def set(self, key, value, ttl_seconds):
+        raise ConnectionError("backend down")
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set("A", ("single",), {"customer": "A"})
+    cache.set("B", ("single",), {"customer": "B"})
+    assert cache.get("A", ("single",)) == {"customer": "A"}
+    cache.set("C", ("single",), {"customer": "C"})
+
+    assert cache.get("B", ("single",)) is None
+    assert cache.get("A", ("single",)) is not None and cache.get("C", ("single",)) is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (3, 1, 1, 2)
+
+
+def test_entries_expire_after_the_ttl_and_params_are_part_of_the_key():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.set("A", ("batch", "cluster", 5), {"top": 5})
+    assert cache.get("A", ("batch", "cluster", 3)) is None
+    clock.now = 59
+    assert cache.get("A", ("batch", "cluster", 5)) == {"top": 5}
+    clock.now = 61
+    assert cache.get("A", ("batch", "cluster", 5)) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_new_model_version_invalidates_local_and_shared_entries():
+    shared = InMemoryCacheBackend()
+    cache = ResponseCache(max_entries=10, shared_backend=shared, model_version="v1")
+    cache.set("A", (), {"cluster": 1})
+    cache.set_model_version("v2")
+    assert cache.stats()["invalidations"] == 1
+    assert cache.get("A", ()) is None
+
+    # A process still on v1 shares entries through the backend
+    other = ResponseCache(max_entries=10, shared_backend=shared, model_version="v1")
+    assert other.get("A", ()) == {"cluster": 1}
+    assert other.stats()["shared_hits"] == 1
+
+
+def test_shared_backend_failures_are_misses_and_none_is_not_cached():
+    cache = ResponseCache(max_entries=10, shared_backend=FailingBackend())
+    assert cache.get_or_compute("A", (), lambda: {"cluster": 2}) == {"cluster": 2}
+    assert cache.get("A", ()) == {"cluster": 2}
+    cache.set("missing", (), None)
+    assert cache.get("missing", ()) is None
+    assert cache.stats()["shared_errors"] == 3
+    assert "retail_response_cache_hits_total 1" in cache_metrics_text(cache.stats())
+
+
+def test_model_version_stamp_round_trips(tmp_path):
+    assert read_model_version(str(tmp_path)) == UNVERSIONED
+    version = write_model_version(str(tmp_path))
+    assert read_model_version(str(tmp_path)) == version
+    assert write_model_version(str(tmp_path)) != version
@@ -0,0 +1,85 @@
+# smart_retail_engine/tests/test_response_shaping.py
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+from scripts import response_shaping
+from scripts.columnar_store import load_columnar_table, save_columnar_table
+from scripts.response_shaping import (
+    encode_body, negotiate_encoding, parse_shape_options, product_id_map, shape_response
+)
+
+RESPONSE = {
+    "customer_id": "AA-1",
+    "cluster": 2,
+    "rfm_segment_label": "Champions",
+    "cluster_based_recommendations": ["Chair", "Desk"],
+    "purchased_products": ["Lamp", "Pen", "Chair", "Stapler"],
+}
+
+
+def test_no_options_return_the_response_unchanged():
+    assert shape_response(RESPONSE, parse_shape_options({})) is RESPONSE
+
+
+def test_fields_and_purchased_page_are_selected():
+    options = parse_shape_options({"fields": "cluster,purchased_products", "purchased_limit": "2", "purchased_offset": "1"})
+    assert shape_response(RESPONSE, options) == {
+        "customer_id": "AA-1", "cluster": 2, "purchased_products_total": 4, "purchased_products": ["Pen", "Chair"]
+    }
+
+
+def test_product_id_mode_maps_names_to_the_most_frequent_id():
+    orders = pd.DataFrame({
+        "Product Name": ["Chair", "Chair", "Chair", "Desk", "Lamp"],
+        "Product ID": ["FUR-1", "FUR-2", "FUR-2", "FUR-3", "OFF-4"],
+    })
+    options = parse_shape_options({"fields": ["cluster_based_recommendations", "purchased_products"], "products": "id"})
+    shaped = shape_response(RESPONSE, options, product_id_map(orders))
+    assert shaped["cluster_based_recommendations"] == ["FUR-2", "FUR-3"]
+    assert shaped["purchased_products"] == ["OFF-4", "Pen", "FUR-2", "Stapler"] # unknown names pass through
+    assert RESPONSE["cluster_based_recommendations"] == ["Chair", "Desk"] # the cached response is not modified
+
+
+def test_product_id_map_of_a_columnar_table(tmp_path):
+    # Ties go to the smallest ID, whatever order the rows (and so the categories) come in
+    orders = pd.DataFrame({
+        "Product Name": ["Lamp", "Chair", "Chair", "Desk", "Chair", "Lamp", "Desk"],
+        "Product ID": ["OFF-9", "FUR-2", "FUR-1", "FUR-3", "FUR-2", "OFF-4", "FUR-3"],
+        "Sales": [1.0] * 7,
+    })
+    save_columnar_table(orders, tmp_path / "orders")
+    loaded = load_columnar_table(tmp_path / "orders")
+    assert isinstance(loaded["Product Name"].dtype, pd.CategoricalDtype)
+
+    expected = {"Chair": "FUR-2", "Desk": "FUR-3", "Lamp": "OFF-4"}
+    assert product_id_map(loaded) == product_id_map(orders) == expected
+
+
+@pytest.mark.parametrize("params", [
+    {"fields": "cluster,unknown"}, {"purchased_limit": "ten"}, {"purchased_offset": "-1"}, {"products": "sku"}
+])
+def test_invalid_options_raise(params):
+    with pytest.raises(ValueError):
+        parse_shape_options(params)
+
+
+def test_encoding_negotiation(monkeypatch):
+    monkeypatch.setattr(response_shaping, "brotli", None)
+    assert negotiate_encoding("gzip, deflate, br", ("br", "gzip")) == "gzip" # no brotli package: falls back to gzip
+    assert negotiate_encoding("gzip;q=0, *", ("gzip",)) is None
+    assert negotiate_encoding("*", ("gzip",)) == "gzip"
+    assert negotiate_encoding("", ("gzip",)) is None
+    assert negotiate_encoding("gzip", ()) is None
+
+
+def test_large_bodies_are_compressed_and_small_ones_are_not(monkeypatch):
+    monkeypatch.setattr(response_shaping, "RESPONSE_COMPRESSION", ("gzip",))
+    payload = {"results": [RESPONSE] * 50}
+    body, encoding = encode_body(payload, "gzip", min_size=1024)
+    assert encoding == "gzip" and json.loads(gzip.decompress(body)) == payload
+
+    body, encoding = encode_body(RESPONSE, "gzip", min_size=1024)
+    assert encoding is None and json.loads(body) == RESPONSE
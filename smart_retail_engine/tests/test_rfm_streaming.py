@@ -0,0 +1,46 @@
+# smart_retail_engine/tests/test_rfm_streaming.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.rfm_streaming import RFMAccumulator, calculate_rfm_streaming
+from scripts.training import calculate_rfm
+
+
+@pytest.fixture
+def orders():
+    rng = np.random.default_rng(1)
+    n_orders, n_rows = 3000, 10000
+    order_customers = rng.choice([f"C-{i:04d}" for i in range(400)], n_orders)
+    order_dates = pd.Timestamp('2014-01-01') + pd.to_timedelta(rng.integers(0, 1400, n_orders), unit='D')
+    # Line items of one order are spread over the table, so orders span several chunks
+    rows = rng.integers(0, n_orders, n_rows)
+    return pd.DataFrame({
+        'Customer ID': order_customers[rows],
+        'Order ID': [f"O-{i:05d}" for i in rows],
+        'Order Date': order_dates[rows],
+        'Sales': rng.lognormal(4, 1, n_rows).round(3),
+    })
+
+
+def assert_rfm_equal(actual, expected):
+    assert actual['Customer ID'].tolist() == expected['Customer ID'].tolist()
+    assert actual['Recency'].tolist() == expected['Recency'].tolist()
+    assert actual['Frequency'].tolist() == expected['Frequency'].tolist()
+    np.testing.assert_allclose(actual['Monetary'], expected['Monetary'], rtol=1e-12)
+
+
+def test_streaming_csv_matches_in_memory_rfm(orders, tmp_path):
+    orders_path = tmp_path / "orders.csv"
+    orders.to_csv(orders_path, index=False)
+
+    rfm_df, _ = calculate_rfm_streaming([str(orders_path)], chunksize=777)
+    assert_rfm_equal(rfm_df, calculate_rfm(orders.copy()))
+
+
+def test_saved_aggregates_continue_with_new_chunks(orders, tmp_path):
+    accumulator = RFMAccumulator().update(orders.iloc[:6000])
+    accumulator.save(tmp_path / "rfm_state.npz")
+
+    restored = RFMAccumulator.load(tmp_path / "rfm_state.npz").update(orders.iloc[6000:])
+    assert_rfm_equal(restored.result(), calculate_rfm(orders.copy()))
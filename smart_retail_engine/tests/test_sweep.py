@@ -0,0 +1,30 @@
+# smart_retail_engine/tests/test_sweep.py
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from scripts.sweep import _evaluate_kmeans, rank_sweep_results
+
+
+def test_ranking_prefers_silhouette_then_davies_bouldin_and_puts_unscored_last():
+    results = pd.DataFrame({
+        'latent_dim': [2, 2, 2, 3],
+        'n_clusters': [2, 3, 4, 2],
+        'silhouette': [0.5, np.nan, 0.7, 0.7],
+        'davies_bouldin': [0.6, np.nan, 0.5, 0.4],
+        'inertia': [10.0, 0.0, 5.0, 4.0],
+    })
+    ranked = rank_sweep_results(results)
+    assert ranked[['latent_dim', 'n_clusters']].values.tolist() == [[3, 2], [2, 4], [2, 2], [2, 3]]
+    assert ranked['rank'].tolist() == [1, 2, 3, 4]
+
+
+def test_collapsed_latent_space_is_not_scored():
+    metrics, kmeans_latent = _evaluate_kmeans(np.zeros((50, 2)), 3, silhouette_sample_size=1000)
+    assert np.isnan(metrics['silhouette']) and np.isnan(metrics['davies_bouldin'])
+
+    separated = np.concatenate([np.zeros((20, 2)), np.full((20, 2), 5.0)])
+    metrics, kmeans_latent = _evaluate_kmeans(separated, 2, silhouette_sample_size=1000)
+    assert metrics['silhouette'] == pytest.approx(1.0) and metrics['inertia'] == pytest.approx(0.0)
@@ -0,0 +1,44 @@
+# smart_retail_engine/tests/test_top_items.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.serving import compute_top_items
+
+
+@pytest.fixture
+def orders():
+    rng = np.random.default_rng(7)
+    n_rows = 4000
+    # Few purchases per product, so many products tie on their counts
+    return pd.DataFrame({
+        'Product Name': rng.choice([f"Product {i:03d}" for i in range(500)], n_rows),
+        'Cluster_AE': rng.integers(0, 4, n_rows),
+        'Order Date': pd.Timestamp('2014-01-01') + pd.to_timedelta(rng.integers(0, 700, n_rows), unit='D'),
+        'Sales': rng.lognormal(4, 1, n_rows),
+    })
+
+
+def test_counts_match_per_cluster_value_counts(orders):
+    cluster_top_items_dict, overall_top_products = compute_top_items(orders)
+    for cluster_id in range(4):
+        names = orders.loc[orders['Cluster_AE'] == cluster_id, 'Product Name']
+        # value_counts orders ties by first appearance for plain string columns
+        expected = names.value_counts(sort=False).sort_values(ascending=False, kind='stable')
+        assert cluster_top_items_dict[cluster_id] == expected.index[:20].tolist()
+    expected = orders['Product Name'].value_counts(sort=False).sort_values(ascending=False, kind='stable')
+    assert overall_top_products == expected.index[:15].tolist()
+
+    categorical = orders.astype({'Product Name': 'category'})
+    assert compute_top_items(categorical) == (cluster_top_items_dict, overall_top_products)
+
+
+def test_weighted_decayed_ranking(orders):
+    cluster_top_items_dict, overall_top_products = compute_top_items(
+        orders, cluster_depth=5, overall_depth=3, weight="sales", half_life_days=30
+    )
+    age_days = (orders['Order Date'].max() - orders['Order Date']).dt.days
+    weighted = orders['Sales'] * 0.5 ** (age_days / 30)
+    expected = weighted.groupby(orders['Product Name']).sum().sort_values(ascending=False)
+    assert overall_top_products == expected.index[:3].tolist()
+    assert all(len(items) == 5 for items in cluster_top_items_dict.values())